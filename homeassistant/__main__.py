@@ -165,6 +165,11 @@ def get_arguments() -> argparse.Namespace:
     parser.add_argument(
         "--log-no-color", action="store_true", help="Disable color logs"
     )
+    parser.add_argument(
+        "--trace-startup",
+        action="store_true",
+        help="Write a trace of the startup to CONFIG/startup_trace.json",
+    )
     parser.add_argument(
         "--runner",
         action="store_true",
@@ -290,6 +295,7 @@ async def setup_and_run_hass(config_dir: str, args: argparse.Namespace) -> int:
             log_rotate_days=args.log_rotate_days,
             log_file=args.log_file,
             log_no_color=args.log_no_color,
+            trace_startup=args.trace_startup,
         )
     else:
         config_file = await ensure_config_file(hass, config_dir)
@@ -302,6 +308,7 @@ async def setup_and_run_hass(config_dir: str, args: argparse.Namespace) -> int:
             log_rotate_days=args.log_rotate_days,
             log_file=args.log_file,
             log_no_color=args.log_no_color,
+            trace_startup=args.trace_startup,
         )
 
     if args.open_ui and hass.config.api is not None:
@@ -11,8 +11,21 @@ from typing import Any, Optional, Dict, Set
 import voluptuous as vol
 
 from homeassistant import core, config as conf_util, config_entries, loader
-from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.const import (
+    CONF_MAX_CONCURRENT_SETUPS,
+    CONF_SETUP_WAIT_TIMEOUT,
+    EVENT_HOMEASSISTANT_CLOSE,
+)
+from homeassistant.helpers import template
 from homeassistant.setup import async_setup_component
+from homeassistant.startup_trace import (
+    CATEGORY_BOOTSTRAP,
+    DATA_STARTUP_TRACE,
+    STARTUP_TRACE_FILENAME,
+    TRACK_BOOTSTRAP,
+    StartupTrace,
+    async_span,
+)
 from homeassistant.util.logging import AsyncHandler
 from homeassistant.util.package import async_get_user_site, is_virtual_env
 from homeassistant.util.yaml import clear_secret_cache
@@ -35,6 +48,11 @@ STAGE_1_INTEGRATIONS = {
     "mqtt_eventstream",
 }
 
+# Default maximum number of integrations set up at the same time in stage 2
+MAX_CONCURRENT_SETUPS = 64
+# Default seconds integrations wait for the integrations they depend on
+SETUP_WAIT_TIMEOUT = 300
+
 
 async def async_from_config_dict(
     config: Dict[str, Any],
@@ -46,6 +64,7 @@ async def async_from_config_dict(
     log_rotate_days: Any = None,
     log_file: Any = None,
     log_no_color: bool = False,
+    trace_startup: bool = False,
 ) -> Optional[core.HomeAssistant]:
     """Try to configure Home Assistant from a configuration dictionary.
 
@@ -54,6 +73,9 @@ async def async_from_config_dict(
     """
     start = time()
 
+    if trace_startup:
+        _async_start_trace(hass)
+
     if enable_log:
         async_enable_logging(hass, verbose, log_rotate_days, log_file, log_no_color)
 
@@ -68,9 +90,10 @@ async def async_from_config_dict(
     trusted_networks = config.get("http", {}).get("trusted_networks")
 
     try:
-        await conf_util.async_process_ha_core_config(
-            hass, core_config, api_password, trusted_networks
-        )
+        with async_span(hass, TRACK_BOOTSTRAP, "core config", CATEGORY_BOOTSTRAP):
+            await conf_util.async_process_ha_core_config(
+                hass, core_config, api_password, trusted_networks
+            )
     except vol.Invalid as config_err:
         conf_util.async_log_exception(config_err, "homeassistant", core_config, hass)
         return None
@@ -94,6 +117,14 @@ async def async_from_config_dict(
 
     await _async_set_up_integrations(hass, config)
 
+    trace = hass.data.get(DATA_STARTUP_TRACE)
+    if trace is not None:
+        trace.async_stop_monitor()
+        await hass.async_add_executor_job(
+            trace.write, hass.config.path(STARTUP_TRACE_FILENAME)
+        )
+        _LOGGER.info("Startup trace written to %s", trace.path)
+
     stop = time()
     _LOGGER.info("Home Assistant initialized in %.2fs", stop - start)
 
@@ -108,12 +139,16 @@ async def async_from_config_file(
     log_rotate_days: Any = None,
     log_file: Any = None,
     log_no_color: bool = False,
+    trace_startup: bool = False,
 ) -> Optional[core.HomeAssistant]:
     """Read the configuration file and try to start all the functionality.
 
     Will add functionality to 'hass' parameter.
     This method is a coroutine.
     """
+    if trace_startup:
+        _async_start_trace(hass)
+
     # Set config dir to directory holding config file
     config_dir = os.path.abspath(os.path.dirname(config_path))
     hass.config.config_dir = config_dir
@@ -126,20 +161,37 @@ async def async_from_config_file(
     await hass.async_add_executor_job(conf_util.process_ha_config_upgrade, hass)
 
     try:
-        config_dict = await hass.async_add_executor_job(
-            conf_util.load_yaml_config_file, config_path
-        )
+        with async_span(hass, TRACK_BOOTSTRAP, "load config", CATEGORY_BOOTSTRAP):
+            config_dict = await hass.async_add_executor_job(
+                conf_util.load_yaml_config_file,
+                config_path,
+                hass.config.path(conf_util.CONFIG_CACHE_FILE),
+            )
     except HomeAssistantError as err:
         _LOGGER.error("Error loading %s: %s", config_path, err)
         return None
     finally:
         clear_secret_cache()
 
+    # Compile the templates before validation compiles them in the event loop
+    with async_span(hass, TRACK_BOOTSTRAP, "precompile templates", CATEGORY_BOOTSTRAP):
+        await hass.async_add_executor_job(template.precompile, config_dict)
+
     return await async_from_config_dict(
         config_dict, hass, enable_log=False, skip_pip=skip_pip
     )
 
 
+@core.callback
+def _async_start_trace(hass: core.HomeAssistant) -> None:
+    """Start tracing the startup."""
+    if DATA_STARTUP_TRACE in hass.data:
+        return
+
+    trace = hass.data[DATA_STARTUP_TRACE] = StartupTrace()
+    trace.async_start_monitor(hass.loop)
+
+
 @core.callback
 def async_enable_logging(
     hass: core.HomeAssistant,
@@ -287,14 +339,15 @@ async def _async_set_up_integrations(
     # Set up core.
     _LOGGER.debug("Setting up %s", CORE_INTEGRATIONS)
 
-    if not all(
-        await asyncio.gather(
+    with async_span(hass, TRACK_BOOTSTRAP, "core", CATEGORY_BOOTSTRAP):
+        core_results = await asyncio.gather(
             *(
                 async_setup_component(hass, domain, config)
                 for domain in CORE_INTEGRATIONS
             )
         )
-    ):
+
+    if not all(core_results):
         _LOGGER.error(
             "Home Assistant core failed to initialize. "
             "Further initialization aborted"
@@ -318,9 +371,13 @@ async def _async_set_up_integrations(
     if logging_domains:
         _LOGGER.info("Setting up %s", logging_domains)
 
-        await asyncio.gather(
-            *(async_setup_component(hass, domain, config) for domain in logging_domains)
-        )
+        with async_span(hass, TRACK_BOOTSTRAP, "logging", CATEGORY_BOOTSTRAP):
+            await asyncio.gather(
+                *(
+                    async_setup_component(hass, domain, config)
+                    for domain in logging_domains
+                )
+            )
 
     # Kick off loading the registries. They don't need to be awaited.
     asyncio.gather(
@@ -330,52 +387,128 @@ async def _async_set_up_integrations(
     )
 
     if stage_1_domains:
-        await asyncio.gather(
-            *(async_setup_component(hass, domain, config) for domain in stage_1_domains)
-        )
+        with async_span(hass, TRACK_BOOTSTRAP, "stage 1", CATEGORY_BOOTSTRAP):
+            await asyncio.gather(
+                *(
+                    async_setup_component(hass, domain, config)
+                    for domain in stage_1_domains
+                )
+            )
 
     # Load all integrations
-    after_dependencies = {}  # type: Dict[str, Set[str]]
+    integrations = {}  # type: Dict[str, loader.Integration]
 
     for int_or_exc in await asyncio.gather(
         *(loader.async_get_integration(hass, domain) for domain in stage_2_domains),
         return_exceptions=True,
     ):
         # Exceptions are handled in async_setup_component.
-        if isinstance(int_or_exc, loader.Integration) and int_or_exc.after_dependencies:
-            after_dependencies[int_or_exc.domain] = set(int_or_exc.after_dependencies)
-
-    last_load = None
-    while stage_2_domains:
-        domains_to_load = set()
-
-        for domain in stage_2_domains:
-            after_deps = after_dependencies.get(domain)
-            # Load if integration has no after_dependencies or they are
-            # all loaded
-            if not after_deps or not after_deps - hass.config.components:
-                domains_to_load.add(domain)
-
-        if not domains_to_load or domains_to_load == last_load:
+        if isinstance(int_or_exc, loader.Integration):
+            integrations[int_or_exc.domain] = int_or_exc
+
+    # Integrations wait for the dependencies and after_dependencies that are
+    # set up in stage 2
+    waits_for = {}  # type: Dict[str, Set[str]]
+    # Integrations with after_dependencies that are not set up in stage 2
+    last_domains = set()  # type: Set[str]
+
+    for domain in stage_2_domains:
+        integration = integrations.get(domain)
+        if integration is None:
+            waits_for[domain] = set()
+            continue
+
+        after_deps = set(integration.after_dependencies or ())
+        if after_deps - stage_2_domains - hass.config.components:
+            last_domains.add(domain)
+
+        deps = (set(integration.dependencies) | after_deps) & stage_2_domains
+        deps.discard(domain)
+        waits_for[domain] = deps
+
+    # Integrations waiting on a cycle or on the last ones are set up last too
+    ordered = set()  # type: Set[str]
+    pending = {
+        domain: deps for domain, deps in waits_for.items() if domain not in last_domains
+    }
+    while True:
+        ready = {domain for domain, deps in pending.items() if deps <= ordered}
+        if not ready:
             break
-
-        _LOGGER.debug("Setting up %s", domains_to_load)
-
-        await asyncio.gather(
-            *(async_setup_component(hass, domain, config) for domain in domains_to_load)
+        ordered |= ready
+        for domain in ready:
+            del pending[domain]
+
+    # Validated with the core config
+    core_config = config.get(core.DOMAIN) or {}
+    max_concurrent = core_config.get(CONF_MAX_CONCURRENT_SETUPS, MAX_CONCURRENT_SETUPS)
+    wait_timeout = core_config.get(CONF_SETUP_WAIT_TIMEOUT, SETUP_WAIT_TIMEOUT)
+
+    _LOGGER.debug("Setting up %s", ordered)
+
+    with async_span(hass, TRACK_BOOTSTRAP, "stage 2", CATEGORY_BOOTSTRAP):
+        await _async_set_up_ordered(
+            hass,
+            config,
+            {domain: waits_for[domain] for domain in ordered},
+            max_concurrent,
+            wait_timeout,
         )
 
-        last_load = domains_to_load
-        stage_2_domains -= domains_to_load
+    stage_2_domains -= ordered
 
     # These are stage 2 domains that never have their after_dependencies
     # satisfied.
     if stage_2_domains:
         _LOGGER.debug("Final set up: %s", stage_2_domains)
 
-        await asyncio.gather(
-            *(async_setup_component(hass, domain, config) for domain in stage_2_domains)
-        )
+        with async_span(hass, TRACK_BOOTSTRAP, "final stage 2", CATEGORY_BOOTSTRAP):
+            await _async_set_up_ordered(
+                hass,
+                config,
+                {domain: set() for domain in stage_2_domains},
+                max_concurrent,
+                wait_timeout,
+            )
 
     # Wrap up startup
-    await hass.async_block_till_done()
+    with async_span(hass, TRACK_BOOTSTRAP, "wrap up", CATEGORY_BOOTSTRAP):
+        await hass.async_block_till_done()
+
+
+async def _async_set_up_ordered(
+    hass: core.HomeAssistant,
+    config: Dict[str, Any],
+    waits_for: Dict[str, Set[str]],
+    max_concurrent: int,
+    wait_timeout: float,
+) -> None:
+    """Set up each integration as soon as the ones it waits for are set up.
+
+    The integrations waited for have to be in waits_for without a cycle.
+    """
+    semaphore = asyncio.Semaphore(max_concurrent)
+    done = {domain: hass.loop.create_future() for domain in waits_for}
+
+    async def async_set_up(domain: str) -> None:
+        """Set up an integration once the ones it waits for are set up."""
+        try:
+            if waits_for[domain]:
+                await asyncio.wait([done[dep] for dep in waits_for[domain]])
+
+            async with semaphore:
+                await asyncio.wait_for(
+                    asyncio.shield(async_setup_component(hass, domain, config)),
+                    wait_timeout,
+                )
+        except asyncio.TimeoutError:
+            _LOGGER.warning(
+                "Setup of %s is taking longer than %s seconds. "
+                "Startup will proceed without waiting any longer.",
+                domain,
+                wait_timeout,
+            )
+        finally:
+            done[domain].set_result(None)
+
+    await asyncio.gather(*(async_set_up(domain) for domain in waits_for))
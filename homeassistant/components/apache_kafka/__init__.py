@@ -2,6 +2,7 @@
 from datetime import datetime
 import json
 import logging
+from types import MappingProxyType
 
 from aiokafka import AIOKafkaProducer
 import voluptuous as vol
@@ -68,6 +69,8 @@ class DateTimeJSONEncoder(json.JSONEncoder):
         """Implement encoding logic."""
         if isinstance(o, datetime):
             return o.isoformat()
+        if isinstance(o, MappingProxyType):
+            return dict(o)
         return super().default(o)
 
 
@@ -76,7 +79,6 @@ class KafkaManager:
 
     def __init__(self, hass, ip_address, port, topic, entities_filter):
         """Initialize."""
-        self._encoder = DateTimeJSONEncoder()
         self._entities_filter = entities_filter
         self._hass = hass
         self._producer = AIOKafkaProducer(
@@ -96,9 +98,7 @@ class KafkaManager:
         ):
             return
 
-        return json.dumps(obj=state.as_dict(), default=self._encoder.encode).encode(
-            "utf-8"
-        )
+        return json.dumps(obj=state.as_dict(), cls=DateTimeJSONEncoder).encode("utf-8")
 
     async def start(self):
         """Start the Kafka manager."""
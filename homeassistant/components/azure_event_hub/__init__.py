@@ -61,8 +61,6 @@ async def async_setup(hass: HomeAssistant, yaml_config: Dict[str, Any]):
     async_sender = client.add_async_sender()
     await client.run_async()
 
-    encoder = JSONEncoder()
-
     async def async_send_to_event_hub(event: Event):
         """Send states to Event Hub."""
         state = event.data.get("new_state")
@@ -74,7 +72,7 @@ async def async_setup(hass: HomeAssistant, yaml_config: Dict[str, Any]):
             return
 
         event_data = EventData(
-            json.dumps(obj=state.as_dict(), default=encoder.encode).encode("utf-8")
+            json.dumps(obj=state.as_dict(), cls=JSONEncoder).encode("utf-8")
         )
         await async_sender.send(event_data)
 
@@ -3,6 +3,7 @@ import datetime
 import json
 import logging
 import os
+from types import MappingProxyType
 from typing import Any, Dict
 
 import voluptuous as vol
@@ -59,8 +60,6 @@ def setup(hass: HomeAssistant, yaml_config: Dict[str, Any]):
 
     topic_path = publisher.topic_path(project_id, topic_name)  # pylint: disable=E1101
 
-    encoder = DateTimeJSONEncoder()
-
     def send_to_pubsub(event: Event):
         """Send states to Pub/Sub."""
         state = event.data.get("new_state")
@@ -72,7 +71,7 @@ def setup(hass: HomeAssistant, yaml_config: Dict[str, Any]):
             return
 
         as_dict = state.as_dict()
-        data = json.dumps(obj=as_dict, default=encoder.encode).encode("utf-8")
+        data = json.dumps(obj=as_dict, cls=DateTimeJSONEncoder).encode("utf-8")
 
         publisher.publish(topic_path, data=data)
 
@@ -91,4 +90,6 @@ class DateTimeJSONEncoder(json.JSONEncoder):
         """Implement encoding logic."""
         if isinstance(o, datetime.datetime):
             return o.isoformat()
+        if isinstance(o, MappingProxyType):
+            return dict(o)
         return super().default(o)
@@ -1,13 +1,19 @@
 """Provide pre-made queries on top of the recorder component."""
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 from datetime import timedelta
 from itertools import groupby
+import json
 import logging
 import time
+from types import MappingProxyType
 
+from aiohttp import web
+from aiohttp.hdrs import CONTENT_TYPE
+from aiohttp.web_exceptions import HTTPInternalServerError
 import voluptuous as vol
 
 from homeassistant.const import (
+    CONTENT_TYPE_JSON,
     HTTP_BAD_REQUEST,
     CONF_DOMAINS,
     CONF_ENTITIES,
@@ -18,8 +24,15 @@ import homeassistant.util.dt as dt_util
 from homeassistant.components import recorder, script
 from homeassistant.components.http import HomeAssistantView
 from homeassistant.const import ATTR_HIDDEN
-from homeassistant.components.recorder.util import session_scope, execute
+from homeassistant.components.recorder import statistics
+from homeassistant.components.recorder.util import (
+    execute,
+    process_timestamp,
+    session_scope,
+)
+from homeassistant.core import Context, State
 import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.json import JSONEncoder
 
 
 # mypy: allow-untyped-defs, no-check-untyped-defs
@@ -41,6 +54,16 @@ CONFIG_SCHEMA = vol.Schema(
 SIGNIFICANT_DOMAINS = ("thermostat", "climate", "water_heater")
 IGNORE_DOMAINS = ("zone", "scene")
 
+EMPTY_ATTRIBUTES = MappingProxyType({})  # type: MappingProxyType
+
+STATISTICS_PERIODS = {
+    "5minute": statistics.PERIOD_5MINUTE,
+    "hour": statistics.PERIOD_HOUR,
+}
+
+# Longest range that is answered with the 5 minute statistics
+STATISTICS_5MINUTE_MAX_RANGE = timedelta(days=7)
+
 
 def get_significant_states(
     hass,
@@ -49,6 +72,8 @@ def get_significant_states(
     entity_ids=None,
     filters=None,
     include_start_time_state=True,
+    no_attributes=False,
+    significant_changes_only=False,
 ):
     """
     Return states changes during UTC period start_time - end_time.
@@ -56,40 +81,107 @@ def get_significant_states(
     Significant states are all states where there is a state change,
     as well as all states from certain domains (for instance
     thermostat so that we get current temperature in our graphs).
+    With significant_changes_only the attribute changes of those
+    domains are left out too.
+
+    With no_attributes the attributes are not loaded and left empty.
     """
     timer_start = time.perf_counter()
+
+    result = {
+        states[0].entity_id: states
+        for states in stream_significant_states(
+            hass,
+            start_time,
+            end_time,
+            entity_ids,
+            filters,
+            include_start_time_state,
+            no_attributes,
+            significant_changes_only,
+        )
+    }
+
+    if _LOGGER.isEnabledFor(logging.DEBUG):
+        elapsed = time.perf_counter() - timer_start
+        _LOGGER.debug("get_significant_states took %fs", elapsed)
+
+    return result
+
+
+def stream_significant_states(
+    hass,
+    start_time,
+    end_time=None,
+    entity_ids=None,
+    filters=None,
+    include_start_time_state=True,
+    no_attributes=False,
+    significant_changes_only=False,
+    entity_order=(),
+):
+    """Yield the significant states of get_significant_states per entity.
+
+    The states are read from the database one entity at a time, so only
+    the states of one entity are held in memory. The entities come in the
+    order of entity_ids, or sorted by entity id, with the entities of
+    entity_order first.
+    """
     from homeassistant.components.recorder.models import States
 
+    # Get the states at the start time, at most one per entity
+    start_states = {}
+    if include_start_time_state:
+        for state in get_states(
+            hass, start_time, entity_ids, filters=filters, no_attributes=no_attributes
+        ):
+            state.last_changed = start_time
+            state.last_updated = start_time
+            start_states[state.entity_id] = state
+
     with session_scope(hass=hass) as session:
-        query = session.query(States).filter(
-            (
-                States.domain.in_(SIGNIFICANT_DOMAINS)
-                | (States.last_changed == States.last_updated)
+        if significant_changes_only:
+            significant = States.last_changed == States.last_updated
+        else:
+            significant = States.domain.in_(SIGNIFICANT_DOMAINS) | (
+                States.last_changed == States.last_updated
             )
-            & (States.last_updated > start_time)
-        )
-
-        if filters:
-            query = filters.apply(query, entity_ids)
 
+        significant &= States.last_updated > start_time
         if end_time is not None:
-            query = query.filter(States.last_updated < end_time)
+            significant &= States.last_updated < end_time
 
-        query = query.order_by(States.last_updated)
+        if entity_ids is not None:
+            found = list(OrderedDict.fromkeys(entity_ids))
+        else:
+            query = session.query(States.entity_id).filter(significant).distinct()
+            if filters:
+                query = filters.apply(query)
+            found = set(start_states)
+            found.update(row.entity_id for row in execute(query, to_native=False))
+            found = sorted(found)
 
-        states = (
-            state
-            for state in execute(query)
-            if (_is_significant(state) and not state.attributes.get(ATTR_HIDDEN, False))
-        )
+        order = [entity_id for entity_id in entity_order if entity_id in found]
+        order.extend(entity_id for entity_id in found if entity_id not in order)
 
-    if _LOGGER.isEnabledFor(logging.DEBUG):
-        elapsed = time.perf_counter() - timer_start
-        _LOGGER.debug("get_significant_states took %fs", elapsed)
+        for entity_id in order:
+            query = (
+                _query_states(session)
+                .filter(significant & (States.entity_id == entity_id))
+                .order_by(States.last_updated)
+            )
+            states = [
+                state
+                for state in _execute_states(query, no_attributes)
+                if _is_significant(state) and not _is_hidden(state)
+            ]
 
-    return states_to_json(
-        hass, states, start_time, entity_ids, filters, include_start_time_state
-    )
+            start_state = start_states.get(entity_id)
+            if start_state is not None:
+                states.insert(0, start_state)
+
+            if states:
+                yield states
 
 
 def state_changes_during_period(hass, start_time, end_time=None, entity_id=None):
@@ -97,7 +189,7 @@ def state_changes_during_period(hass, start_time, end_time=None, entity_id=None)
     from homeassistant.components.recorder.models import States
 
     with session_scope(hass=hass) as session:
-        query = session.query(States).filter(
+        query = _query_states(session).filter(
             (States.last_changed == States.last_updated)
             & (States.last_updated > start_time)
         )
@@ -106,11 +198,11 @@ def state_changes_during_period(hass, start_time, end_time=None, entity_id=None)
             query = query.filter(States.last_updated < end_time)
 
         if entity_id is not None:
-            query = query.filter_by(entity_id=entity_id.lower())
+            query = query.filter(States.entity_id == entity_id.lower())
 
         entity_ids = [entity_id] if entity_id is not None else None
 
-        states = execute(query.order_by(States.last_updated))
+        states = _execute_states(query.order_by(States.last_updated))
 
     return states_to_json(hass, states, start_time, entity_ids)
 
@@ -122,16 +214,16 @@ def get_last_state_changes(hass, number_of_states, entity_id):
     start_time = dt_util.utcnow()
 
     with session_scope(hass=hass) as session:
-        query = session.query(States).filter(
+        query = _query_states(session).filter(
             (States.last_changed == States.last_updated)
         )
 
         if entity_id is not None:
-            query = query.filter_by(entity_id=entity_id.lower())
+            query = query.filter(States.entity_id == entity_id.lower())
 
         entity_ids = [entity_id] if entity_id is not None else None
 
-        states = execute(
+        states = _execute_states(
             query.order_by(States.last_updated.desc()).limit(number_of_states)
         )
 
@@ -140,7 +232,14 @@ def get_last_state_changes(hass, number_of_states, entity_id):
     )
 
 
-def get_states(hass, utc_point_in_time, entity_ids=None, run=None, filters=None):
+def get_states(
+    hass,
+    utc_point_in_time,
+    entity_ids=None,
+    run=None,
+    filters=None,
+    no_attributes=False,
+):
     """Return the states at a specific point in time."""
     from homeassistant.components.recorder.models import States
 
@@ -154,7 +253,7 @@ def get_states(hass, utc_point_in_time, entity_ids=None, run=None, filters=None)
     from sqlalchemy import and_, func
 
     with session_scope(hass=hass) as session:
-        query = session.query(States)
+        query = _query_states(session)
 
         if entity_ids and len(entity_ids) == 1:
             # Use an entirely different (and extremely fast) query if we only
@@ -216,13 +315,40 @@ def get_states(hass, utc_point_in_time, entity_ids=None, run=None, filters=None)
 
         return [
             state
-            for state in execute(query)
-            if not state.attributes.get(ATTR_HIDDEN, False)
+            for state in _execute_states(query, no_attributes)
+            if not _is_hidden(state)
         ]
 
 
+def _query_states(session):
+    """Return a query for the columns of the states that LazyState uses."""
+    from homeassistant.components.recorder.models import States, StateAttributes
+
+    return session.query(
+        States.entity_id,
+        States.state,
+        States.attributes,
+        StateAttributes.shared_attrs,
+        States.last_changed,
+        States.last_updated,
+        States.context_id,
+        States.context_user_id,
+    ).outerjoin(StateAttributes, States.attributes_id == StateAttributes.attributes_id)
+
+
+def _execute_states(query, no_attributes=False):
+    """Run a query of _query_states and return the rows as states."""
+    return [LazyState(row, no_attributes) for row in execute(query, to_native=False)]
+
+
 def states_to_json(
-    hass, states, start_time, entity_ids, filters=None, include_start_time_state=True
+    hass,
+    states,
+    start_time,
+    entity_ids,
+    filters=None,
+    include_start_time_state=True,
+    no_attributes=False,
 ):
     """Convert SQL results into JSON friendly data structure.
 
@@ -242,7 +368,9 @@ def states_to_json(
     # Get the states at the start time
     timer_start = time.perf_counter()
     if include_start_time_state:
-        for state in get_states(hass, start_time, entity_ids, filters=filters):
+        for state in get_states(
+            hass, start_time, entity_ids, filters=filters, no_attributes=no_attributes
+        ):
             state.last_changed = start_time
             state.last_updated = start_time
             result[state.entity_id].append(state)
@@ -259,6 +387,74 @@ def states_to_json(
     return {key: val for key, val in result.items() if val}
 
 
+def get_statistics(hass, start_time, end_time, entity_ids, period=None):
+    """Return the statistics of numeric sensors during UTC period.
+
+    Without a period in seconds, the period is chosen by
+    _statistics_period. Returns
+    {'entity_id': [{'start', 'mean', 'min', 'max'}, ...]}.
+    """
+    timer_start = time.perf_counter()
+    from homeassistant.components.recorder.models import Statistics
+
+    if period is None:
+        period = _statistics_period(hass, start_time, end_time)
+
+    result = {entity_id: [] for entity_id in entity_ids}
+
+    with session_scope(hass=hass) as session:
+        query = (
+            session.query(
+                Statistics.entity_id,
+                Statistics.start,
+                Statistics.mean,
+                Statistics.min,
+                Statistics.max,
+            )
+            .filter(
+                Statistics.entity_id.in_(entity_ids)
+                & (Statistics.period == period)
+                # Include the period that contains start_time
+                & (Statistics.start > start_time - timedelta(seconds=period))
+                & (Statistics.start < end_time)
+            )
+            .order_by(Statistics.entity_id, Statistics.start)
+        )
+
+        for row in execute(query, to_native=False):
+            result[row.entity_id].append(
+                {
+                    "start": process_timestamp(row.start),
+                    "mean": row.mean,
+                    "min": row.min,
+                    "max": row.max,
+                }
+            )
+
+    if _LOGGER.isEnabledFor(logging.DEBUG):
+        elapsed = time.perf_counter() - timer_start
+        _LOGGER.debug("get_statistics took %fs", elapsed)
+
+    return {key: val for key, val in result.items() if val}
+
+
+def _statistics_period(hass, start_time, end_time):
+    """Return the period of the statistics that answer a range.
+
+    The 5 minute statistics are used for ranges up to
+    STATISTICS_5MINUTE_MAX_RANGE that start after the recorder purges them,
+    which is after keep_days. The hourly statistics are never purged.
+    """
+    if end_time - start_time > STATISTICS_5MINUTE_MAX_RANGE:
+        return statistics.PERIOD_HOUR
+
+    keep_days = hass.data[recorder.DATA_INSTANCE].keep_days
+    if keep_days and start_time < dt_util.utcnow() - timedelta(days=keep_days):
+        return statistics.PERIOD_HOUR
+
+    return statistics.PERIOD_5MINUTE
+
+
 def get_state(hass, utc_point_in_time, entity_id, run=None):
     """Return a state at a specific point in time."""
     states = list(get_states(hass, utc_point_in_time, (entity_id,), run))
@@ -280,6 +476,7 @@ async def async_setup(hass, config):
     use_include_order = conf.get(CONF_ORDER)
 
     hass.http.register_view(HistoryPeriodView(filters, use_include_order))
+    hass.http.register_view(HistoryStatisticsView)
     hass.components.frontend.async_register_built_in_panel(
         "history", "history", "hass:poll-box"
     )
@@ -332,37 +529,164 @@ class HistoryPeriodView(HomeAssistantView):
         if entity_ids:
             entity_ids = entity_ids.lower().split(",")
         include_start_time_state = "skip_initial_state" not in request.query
+        no_attributes = "no_attributes" in request.query
+        minimal_response = "minimal_response" in request.query
+        significant_changes_only = "significant_changes_only" in request.query
 
         hass = request.app["hass"]
 
-        result = await hass.async_add_job(
-            get_significant_states,
+        # Optionally order the result to respect the ordering given
+        # by any entities explicitly included in the configuration.
+        entity_order = ()
+        if self.use_include_order:
+            entity_order = self.filters.included_entities
+
+        states = stream_significant_states(
             hass,
             start_time,
             end_time,
             entity_ids,
             self.filters,
             include_start_time_state,
+            no_attributes,
+            significant_changes_only,
+            entity_order,
         )
-        result = list(result.values())
+        try:
+            response = await self._stream_json(request, states, minimal_response)
+        finally:
+            # Releases the database session if the response was not finished
+            await hass.async_add_executor_job(states.close)
+
         if _LOGGER.isEnabledFor(logging.DEBUG):
             elapsed = time.perf_counter() - timer_start
-            _LOGGER.debug("Extracted %d states in %fs", sum(map(len, result)), elapsed)
+            _LOGGER.debug("Streamed history in %fs", elapsed)
 
-        # Optionally reorder the result to respect the ordering given
-        # by any entities explicitly included in the configuration.
-        if self.use_include_order:
-            sorted_result = []
-            for order_entity in self.filters.included_entities:
-                for state_list in result:
-                    if state_list[0].entity_id == order_entity:
-                        sorted_result.append(state_list)
-                        result.remove(state_list)
-                        break
-            sorted_result.extend(result)
-            result = sorted_result
+        return response
+
+    async def _stream_json(self, request, states, minimal_response):
+        """Write the states as chunked JSON, one entity at a time.
+
+        The states of each entity are read from the database and encoded in
+        the executor, and released once they have been written. The first
+        entity is encoded before the status is sent, so it can still fail
+        the request.
+        """
+        hass = request.app["hass"]
+
+        state_list = await hass.async_add_executor_job(next, states, None)
+        msg = b"[]"
+        if state_list is not None:
+            try:
+                msg = b"[" + await hass.async_add_executor_job(
+                    _encode_states, state_list, minimal_response
+                )
+            except (ValueError, TypeError) as err:
+                _LOGGER.error("Unable to serialize to JSON: %s\n%s", err, state_list)
+                raise HTTPInternalServerError
+
+        response = web.StreamResponse(headers={CONTENT_TYPE: CONTENT_TYPE_JSON})
+        response.enable_chunked_encoding()
+        response.enable_compression()
+        await response.prepare(request)
+        await response.write(msg)
+        if state_list is None:
+            await response.write_eof()
+            return response
+
+        while True:
+            state_list = await hass.async_add_executor_job(next, states, None)
+            if state_list is None:
+                break
+            try:
+                msg = await hass.async_add_executor_job(
+                    _encode_states, state_list, minimal_response
+                )
+            except (ValueError, TypeError) as err:
+                # The status was sent already, closing the connection without
+                # ending the chunked body tells the client it is incomplete.
+                _LOGGER.error(
+                    "Unable to serialize to JSON, aborting the response: %s\n%s",
+                    err,
+                    state_list,
+                )
+                request.transport.close()
+                return response
+            await response.write(b"," + msg)
 
-        return await hass.async_add_job(self.json, result)
+        await response.write(b"]")
+        await response.write_eof()
+        return response
+
+
+class HistoryStatisticsView(HomeAssistantView):
+    """Handle history statistics requests."""
+
+    url = "/api/history/statistics"
+    name = "api:history:view-statistics"
+    extra_urls = ["/api/history/statistics/{datetime}"]
+
+    async def get(self, request, datetime=None):
+        """Return statistics of numeric sensors over a period of time."""
+        if datetime:
+            datetime = dt_util.parse_datetime(datetime)
+
+            if datetime is None:
+                return self.json_message("Invalid datetime", HTTP_BAD_REQUEST)
+
+        if datetime:
+            start_time = dt_util.as_utc(datetime)
+        else:
+            start_time = dt_util.utcnow() - timedelta(days=1)
+
+        end_time = request.query.get("end_time")
+        if end_time:
+            end_time = dt_util.parse_datetime(end_time)
+            if end_time:
+                end_time = dt_util.as_utc(end_time)
+            else:
+                return self.json_message("Invalid end_time", HTTP_BAD_REQUEST)
+        else:
+            end_time = start_time + timedelta(days=1)
+
+        entity_ids = request.query.get("filter_entity_id")
+        if not entity_ids:
+            return self.json_message("filter_entity_id is required", HTTP_BAD_REQUEST)
+        entity_ids = entity_ids.lower().split(",")
+
+        period = request.query.get("period")
+        if period is not None:
+            period = STATISTICS_PERIODS.get(period)
+            if period is None:
+                return self.json_message("Invalid period", HTTP_BAD_REQUEST)
+
+        hass = request.app["hass"]
+
+        result = await hass.async_add_executor_job(
+            get_statistics, hass, start_time, end_time, entity_ids, period
+        )
+
+        return await hass.async_add_executor_job(self.json, result)
+
+
+def _encode_states(states, minimal_response):
+    """Encode the states of an entity as JSON.
+
+    With minimal_response only the first and last state carry attributes,
+    the states in between only have their state and last_changed.
+    """
+    if minimal_response and len(states) > 2:
+        states = [
+            states[0],
+            *(
+                {"state": state.state, "last_changed": state.last_changed}
+                for state in states[1:-1]
+            ),
+            states[-1],
+        ]
+
+    msg = json.dumps(states, sort_keys=True, cls=JSONEncoder, allow_nan=False)
+    return msg.encode("UTF-8")
 
 
 class Filters:
@@ -436,4 +760,85 @@ def _is_significant(state):
     Will only test for things that are not filtered out in SQL.
     """
     # scripts that are not cancellable will never change state
-    return state.domain != "script" or state.attributes.get(script.ATTR_CAN_CANCEL)
+    return state.domain != "script" or state.get_attribute(script.ATTR_CAN_CANCEL)
+
+
+def _is_hidden(state):
+    """Test if a state is hidden."""
+    return state.get_attribute(ATTR_HIDDEN) or False
+
+
+class LazyState(State):
+    """A state read from the database.
+
+    The attributes and context are only converted when used.
+    With no_attributes the state has no attributes.
+    """
+
+    __slots__ = ["_row", "_no_attributes", "_attributes", "_context"]
+
+    # pylint: disable=super-init-not-called
+    def __init__(self, row, no_attributes=False):
+        """Initialize the state from a row of _query_states."""
+        self._row = row
+        self._no_attributes = no_attributes
+        self.entity_id = row.entity_id
+        self.state = row.state
+        self._attributes = None
+        self.last_changed = process_timestamp(row.last_changed)
+        self.last_updated = process_timestamp(row.last_updated)
+        self._context = None
+        self._as_dict = None
+
+    @property
+    def shared_attrs(self):
+        """Return the JSON encoded attributes."""
+        if self._row.shared_attrs is None:
+            return self._row.attributes
+        return self._row.shared_attrs
+
+    @property
+    def attributes(self):
+        """Return the attributes of the state."""
+        if self._no_attributes:
+            return EMPTY_ATTRIBUTES
+        return self._decode_attributes()
+
+    def get_attribute(self, name):
+        """Return an attribute, only decoding attributes that mention it."""
+        shared_attrs = self.shared_attrs
+        if not shared_attrs or name not in shared_attrs:
+            return None
+        return self._decode_attributes().get(name)
+
+    def _decode_attributes(self):
+        """Decode the attributes on first use."""
+        if self._attributes is None:
+            shared_attrs = self.shared_attrs
+            try:
+                attributes = json.loads(shared_attrs) if shared_attrs else {}
+            except ValueError:
+                # When json.loads fails
+                _LOGGER.exception("Error converting row to state: %s", self._row)
+                attributes = {}
+            self._attributes = MappingProxyType(attributes)
+        return self._attributes
+
+    @property
+    def context(self):
+        """Return the context of the state."""
+        if self._context is None:
+            self._context = Context(
+                id=self._row.context_id, user_id=self._row.context_user_id
+            )
+        return self._context
+
+    def __eq__(self, other):
+        """Return the comparison with a state."""
+        return (
+            isinstance(other, State)
+            and self.entity_id == other.entity_id
+            and self.state == other.state
+            and self.attributes == other.attributes
+            and self.context == other.context
+        )
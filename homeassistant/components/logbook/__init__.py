@@ -1,8 +1,11 @@
 """Event parser and human readable log generator."""
 from datetime import timedelta
+import heapq
 from itertools import groupby
+import json
 import logging
 
+from aiohttp.hdrs import LINK
 import voluptuous as vol
 
 from homeassistant.loader import bind_hass
@@ -27,13 +30,13 @@ from homeassistant.const import (
     STATE_OFF,
     STATE_ON,
 )
-from homeassistant.core import DOMAIN as HA_DOMAIN, State, callback, split_entity_id
-from homeassistant.components.alexa.smart_home import EVENT_ALEXA_SMART_HOME
-from homeassistant.components.homekit.const import (
-    ATTR_DISPLAY_NAME,
-    ATTR_VALUE,
-    DOMAIN as DOMAIN_HOMEKIT,
-    EVENT_HOMEKIT_CHANGED,
+from homeassistant.core import (
+    DOMAIN as HA_DOMAIN,
+    Context,
+    Event,
+    State,
+    callback,
+    split_entity_id,
 )
 import homeassistant.helpers.config_validation as cv
 import homeassistant.util.dt as dt_util
@@ -50,6 +53,20 @@ DOMAIN = "logbook"
 
 GROUP_BY_MINUTES = 15
 
+# Tables the event of a page cursor is read from. Of events with the same
+# time those of the events table come first.
+CURSOR_EVENTS = "e"
+CURSOR_STATES = "s"
+
+# Events of Alexa and HomeKit, not imported from those integrations as that
+# would import them with all of their dependencies. The tests check that
+# they match the integrations.
+EVENT_ALEXA_SMART_HOME = "alexa_smart_home"
+EVENT_HOMEKIT_CHANGED = "homekit_state_change"
+ATTR_DISPLAY_NAME = "display_name"
+ATTR_VALUE = "value"
+DOMAIN_HOMEKIT = "homekit"
+
 CONFIG_SCHEMA = vol.Schema(
     {
         DOMAIN: vol.Schema(
@@ -87,6 +104,11 @@ ALL_EVENT_TYPES = [
     EVENT_SCRIPT_STARTED,
 ]
 
+# Event types that are read from the events table
+OTHER_EVENT_TYPES = [
+    event_type for event_type in ALL_EVENT_TYPES if event_type != EVENT_STATE_CHANGED
+]
+
 LOG_MESSAGE_SCHEMA = vol.Schema(
     {
         vol.Required(ATTR_NAME): cv.string,
@@ -170,13 +192,35 @@ class LogbookView(HomeAssistantView):
         entity_id = request.query.get("entity")
         start_day = dt_util.as_utc(datetime) - timedelta(days=period - 1)
         end_day = start_day + timedelta(days=period)
+
+        # Continue after the last event of the previous page
+        after = request.query.get("after")
+        if after is not None:
+            after = _parse_cursor(after)
+            if after is None:
+                return self.json_message("Invalid after", HTTP_BAD_REQUEST)
+
+        limit = request.query.get("limit")
+        if limit is not None:
+            try:
+                limit = int(limit)
+            except ValueError:
+                limit = 0
+            if limit < 1:
+                return self.json_message("Invalid limit", HTTP_BAD_REQUEST)
+
         hass = request.app["hass"]
 
         def json_events():
             """Fetch events and generate JSON."""
-            return self.json(
-                _get_events(hass, self.config, start_day, end_day, entity_id)
+            entries, cursor = _get_page(
+                hass, self.config, start_day, end_day, entity_id, limit, after
             )
+            response = self.json(entries)
+            if cursor is not None:
+                next_url = request.rel_url.update_query(after=_format_cursor(cursor))
+                response.headers[LINK] = '<{}>; rel="next"'.format(next_url)
+            return response
 
         return await hass.async_add_job(json_events)
 
@@ -191,9 +235,7 @@ def humanify(hass, events):
     domain_prefixes = tuple("{}.".format(dom) for dom in CONTINUOUS_DOMAINS)
 
     # Group events in batches of GROUP_BY_MINUTES
-    for _, g_events in groupby(
-        events, lambda event: event.time_fired.minute // GROUP_BY_MINUTES
-    ):
+    for _, g_events in groupby(events, _group_key):
 
         events_batch = list(g_events)
 
@@ -370,35 +412,36 @@ def humanify(hass, events):
                 }
 
 
-def _get_related_entity_ids(session, entity_filter):
-    from homeassistant.components.recorder.models import States
-    from homeassistant.components.recorder.util import RETRIES, QUERY_RETRY_WAIT
-    from sqlalchemy.exc import SQLAlchemyError
-    import time
+def _group_key(event):
+    """Return the key of the batch humanify groups an event in."""
+    return event.time_fired.minute // GROUP_BY_MINUTES
 
-    timer_start = time.perf_counter()
 
-    query = session.query(States).with_entities(States.entity_id).distinct()
+def _format_cursor(cursor):
+    """Return the query string value of a page cursor.
 
-    for tryno in range(0, RETRIES):
-        try:
-            result = [row.entity_id for row in query if entity_filter(row.entity_id)]
-
-            if _LOGGER.isEnabledFor(logging.DEBUG):
-                elapsed = time.perf_counter() - timer_start
-                _LOGGER.debug(
-                    "fetching %d distinct domain/entity_id pairs took %fs",
-                    len(result),
-                    elapsed,
-                )
+    The time is written with Z, a + would be read as a space.
+    """
+    time_fired, table, row_id = cursor
+    return "{}/{}{}".format(
+        dt_util.as_utc(time_fired).strftime("%Y-%m-%dT%H:%M:%S.%fZ"), table, row_id
+    )
 
-            return result
-        except SQLAlchemyError as err:
-            _LOGGER.error("Error executing query: %s", err)
 
-            if tryno == RETRIES - 1:
-                raise
-            time.sleep(QUERY_RETRY_WAIT)
+def _parse_cursor(value):
+    """Parse a page cursor, return None if it is invalid.
+
+    A cursor is the time, table and id of the last event of a page, as
+    events can have the same time.
+    """
+    time_fired, _, row = value.rpartition("/")
+    time_fired = dt_util.parse_datetime(time_fired)
+    if time_fired is None or row[:1] not in (CURSOR_STATES, CURSOR_EVENTS):
+        return None
+    try:
+        return dt_util.as_utc(time_fired), row[:1], int(row[1:])
+    except ValueError:
+        return None
 
 
 def _generate_filter_from_config(config):
@@ -424,41 +467,170 @@ def _generate_filter_from_config(config):
 
 
 def _get_events(hass, config, start_day, end_day, entity_id=None):
-    """Get events for a period of time."""
-    from homeassistant.components.recorder.models import Events, States
+    """Get the logbook entries of the events in a period of time."""
+    return _get_page(hass, config, start_day, end_day, entity_id)[0]
+
+
+def _get_page(hass, config, start_day, end_day, entity_id=None, limit=None, after=None):
+    """Get the logbook entries of a page of events after a cursor.
+
+    State changes are read from the states table and the other events from
+    the events table, both in order of time. A page holds limit events and
+    the rest of the batch humanify groups the last of them in, so batches
+    are not split over pages. Returns the entries and the cursor of the
+    last event, or None if there are no more events.
+    """
     from homeassistant.components.recorder.util import session_scope
 
     entities_filter = _generate_filter_from_config(config)
 
-    def yield_events(query):
-        """Yield Events that are not filtered away."""
-        for row in query.yield_per(500):
-            event = row.to_native()
-            if _keep_event(event, entities_filter):
-                yield event
-
     with session_scope(hass=hass) as session:
-        if entity_id is not None:
-            entity_ids = [entity_id.lower()]
+        keyed_events = heapq.merge(
+            _yield_state_changes(
+                session, start_day, end_day, entity_id, entities_filter, after
+            ),
+            _yield_other_events(session, start_day, end_day, entities_filter, after),
+            key=lambda keyed_event: keyed_event[0],
+        )
+
+        events = []
+        cursor = None
+        for key, event in keyed_events:
+            if (
+                limit is not None
+                and len(events) >= limit
+                and _group_key(event) != _group_key(events[-1])
+            ):
+                break
+            events.append(event)
+            cursor = key
         else:
-            entity_ids = _get_related_entity_ids(session, entities_filter)
-
-        query = (
-            session.query(Events)
-            .order_by(Events.time_fired)
-            .outerjoin(States, (Events.event_id == States.event_id))
-            .filter(Events.event_type.in_(ALL_EVENT_TYPES))
-            .filter((Events.time_fired > start_day) & (Events.time_fired < end_day))
-            .filter(
-                (
-                    (States.last_updated == States.last_changed)
-                    & States.entity_id.in_(entity_ids)
-                )
-                | (States.state_id.is_(None))
+            cursor = None
+
+        return list(humanify(hass, events)), cursor
+
+
+def _yield_state_changes(
+    session, start_day, end_day, entity_id, entities_filter, after=None
+):
+    """Yield state_changed events of the states that changed after a cursor.
+
+    The events are yielded with their cursor.
+    """
+    from homeassistant.components.recorder.models import States, StateAttributes
+    from homeassistant.components.recorder.util import process_timestamp
+
+    query = (
+        session.query(
+            States.state_id,
+            States.entity_id,
+            States.domain,
+            States.state,
+            States.attributes,
+            StateAttributes.shared_attrs,
+            States.last_updated,
+            States.context_id,
+            States.context_user_id,
+        )
+        .outerjoin(
+            StateAttributes, States.attributes_id == StateAttributes.attributes_id
+        )
+        .filter((States.last_updated > start_day) & (States.last_updated < end_day))
+        # Leave out attribute changes and new entities
+        .filter(
+            (States.last_changed == States.last_updated)
+            & States.old_state_id.isnot(None)
+        )
+        .order_by(States.last_updated, States.state_id)
+    )
+
+    if after is not None:
+        after_time, after_table, after_id = after
+        if after_table == CURSOR_STATES:
+            query = query.filter(
+                (States.last_updated > after_time)
+                | ((States.last_updated == after_time) & (States.state_id > after_id))
             )
+        else:
+            query = query.filter(States.last_updated >= after_time)
+
+    if entity_id is not None:
+        query = query.filter(States.entity_id == entity_id.lower())
+
+    # entity_id -> if entities_filter keeps the entity
+    keep_entity = {}
+
+    for row in query.yield_per(500):
+        # Removed entities have an empty state
+        if not row.state:
+            continue
+
+        keep = keep_entity.get(row.entity_id)
+        if keep is None:
+            keep = keep_entity[row.entity_id] = entities_filter(row.entity_id)
+        if not keep:
+            continue
+
+        try:
+            attributes = json.loads(row.shared_attrs or row.attributes or "{}")
+        except ValueError:
+            _LOGGER.warning("Error converting row to state: %s", row)
+            continue
+
+        # Continuous sensor values are never shown
+        if row.domain in CONTINUOUS_DOMAINS and attributes.get("unit_of_measurement"):
+            continue
+
+        if not _keep_state(row.domain, attributes):
+            continue
+
+        last_updated = process_timestamp(row.last_updated)
+
+        yield (last_updated, CURSOR_STATES, row.state_id), Event(
+            EVENT_STATE_CHANGED,
+            {
+                "entity_id": row.entity_id,
+                "new_state": {
+                    "entity_id": row.entity_id,
+                    "state": row.state,
+                    "attributes": attributes,
+                    "last_changed": last_updated,
+                    "last_updated": last_updated,
+                },
+            },
+            time_fired=last_updated,
+            context=Context(id=row.context_id, user_id=row.context_user_id),
         )
 
-        return list(humanify(hass, yield_events(query)))
+
+def _yield_other_events(session, start_day, end_day, entities_filter, after=None):
+    """Yield the other events after a cursor that are not filtered away.
+
+    The events are yielded with their cursor.
+    """
+    from homeassistant.components.recorder.models import Events
+
+    query = (
+        session.query(Events)
+        .filter(Events.event_type.in_(OTHER_EVENT_TYPES))
+        .filter((Events.time_fired > start_day) & (Events.time_fired < end_day))
+        .order_by(Events.time_fired, Events.event_id)
+    )
+
+    if after is not None:
+        after_time, after_table, after_id = after
+        if after_table == CURSOR_EVENTS:
+            query = query.filter(
+                (Events.time_fired > after_time)
+                | ((Events.time_fired == after_time) & (Events.event_id > after_id))
+            )
+        else:
+            query = query.filter(Events.time_fired > after_time)
+
+    for row in query.yield_per(500):
+        event = row.to_native()
+        if event is not None and _keep_event(event, entities_filter):
+            yield (event.time_fired, CURSOR_EVENTS, row.event_id), event
 
 
 def _keep_event(event, entities_filter):
@@ -480,8 +652,6 @@ def _keep_event(event, entities_filter):
         if not new_state:
             return False
 
-        attributes = new_state.get("attributes", {})
-
         # If last_changed != last_updated only attributes have changed
         # we do not report on that yet.
         last_changed = new_state.get("last_changed")
@@ -491,13 +661,7 @@ def _keep_event(event, entities_filter):
 
         domain = split_entity_id(entity_id)[0]
 
-        # Also filter auto groups.
-        if domain == "group" and attributes.get("auto", False):
-            return False
-
-        # exclude entities which are customized hidden
-        hidden = attributes.get(ATTR_HIDDEN, False)
-        if hidden:
+        if not _keep_state(domain, new_state.get("attributes", {})):
             return False
 
     elif event.event_type == EVENT_LOGBOOK_ENTRY:
@@ -524,6 +688,16 @@ def _keep_event(event, entities_filter):
     return not entity_id or entities_filter(entity_id)
 
 
+def _keep_state(domain, attributes):
+    """Return if a state with attributes should be shown."""
+    # Also filter auto groups.
+    if domain == "group" and attributes.get("auto", False):
+        return False
+
+    # exclude entities which are customized hidden
+    return not attributes.get(ATTR_HIDDEN, False)
+
+
 def _entry_message_from_state(domain, state):
     """Convert a state to a message for the logbook."""
     # We pass domain in so we don't have to split entity_id again
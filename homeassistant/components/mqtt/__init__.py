@@ -1,5 +1,6 @@
 """Support for MQTT message handling."""
 import asyncio
+from collections import deque
 from functools import partial, wraps
 import inspect
 from itertools import groupby
@@ -10,7 +11,7 @@ import os
 import socket
 import ssl
 import time
-from typing import Any, Callable, List, Optional, Union, cast  # noqa: F401
+from typing import Any, Callable, Dict, List, Optional, Set, Union, cast  # noqa: F401
 
 import attr
 import requests.certs
@@ -115,6 +116,9 @@ ATTR_RETAIN = CONF_RETAIN
 
 MAX_RECONNECT_WAIT = 300  # seconds
 
+# Maximum number of received messages handled per event loop iteration
+MAX_MESSAGE_BATCH_SIZE = 1000
+
 CONNECTION_SUCCESS = "connection_success"
 CONNECTION_FAILED = "connection_failed"
 CONNECTION_FAILED_RECOVERABLE = "connection_failed_recoverable"
@@ -694,6 +698,7 @@ async def async_setup_entry(hass, entry):
     hass.services.async_register(
         DOMAIN, SERVICE_PUBLISH, async_publish_service, schema=MQTT_PUBLISH_SCHEMA
     )
+    hass.components.system_health.async_register_info(DOMAIN, system_health_info)
 
     if conf.get(CONF_DISCOVERY):
         await _async_setup_discovery(
@@ -703,9 +708,26 @@ async def async_setup_entry(hass, entry):
     return True
 
 
-@attr.s(slots=True, frozen=True)
+async def system_health_info(hass):
+    """Get info for the info page."""
+    mqtt = hass.data[DATA_MQTT]
+
+    return {
+        "connected": mqtt.connected,
+        "subscriptions": len(mqtt.subscriptions),
+        "batch_size": mqtt.batch_size,
+        "max_batch_size": mqtt.max_batch_size,
+        "message_latency": mqtt.message_latency,
+    }
+
+
+@attr.s(slots=True, frozen=True, cmp=False)
 class Subscription:
-    """Class to hold data about an active subscription."""
+    """Class to hold data about an active subscription.
+
+    Subscriptions compare and hash by identity, so identical subscriptions
+    can be added and removed independently.
+    """
 
     topic = attr.ib(type=str)
     callback = attr.ib(type=MessageCallbackType)
@@ -736,16 +758,28 @@ class MQTT:
     ) -> None:
         """Initialize Home Assistant MQTT client."""
         import paho.mqtt.client as mqtt
+        from paho.mqtt.matcher import MQTTMatcher
 
         self.hass = hass
         self.broker = broker
         self.port = port
         self.keepalive = keepalive
-        self.subscriptions = []  # type: List[Subscription]
+        self.subscriptions = set()  # type: Set[Subscription]
+        # Trie of topic filters to the list of their subscriptions
+        self._matcher = MQTTMatcher()
         self.birth_message = birth_message
         self.connected = False
         self._mqttc = None  # type: mqtt.Client
         self._paho_lock = asyncio.Lock()
+        # Messages received by the paho thread with their time of arrival
+        self._received = deque()  # type: deque
+        self._process_scheduled = False
+        # Number of messages handled by the latest batch and the largest one
+        self.batch_size = 0
+        self.max_batch_size = 0
+        # Time in ms from arrival to handling of the oldest message of the
+        # latest batch
+        self.message_latency = None  # type: Optional[int]
 
         if protocol == PROTOCOL_31:
             proto = mqtt.MQTTv31  # type: int
@@ -843,7 +877,11 @@ class MQTT:
             raise HomeAssistantError("Topic needs to be a string!")
 
         subscription = Subscription(topic, msg_callback, qos, encoding)
-        self.subscriptions.append(subscription)
+        self.subscriptions.add(subscription)
+        try:
+            self._matcher[topic].append(subscription)
+        except KeyError:
+            self._matcher[topic] = [subscription]
 
         await self._async_perform_subscription(topic, qos)
 
@@ -854,10 +892,14 @@ class MQTT:
                 raise HomeAssistantError("Can't remove subscription twice")
             self.subscriptions.remove(subscription)
 
-            if any(other.topic == topic for other in self.subscriptions):
+            topic_subscriptions = self._matcher[topic]
+            topic_subscriptions.remove(subscription)
+            if topic_subscriptions:
                 # Other subscriptions on topic remaining - don't unsubscribe.
                 return
 
+            del self._matcher[topic]
+
             # Only unsubscribe if currently connected.
             if self.connected:
                 self.hass.async_create_task(self._async_unsubscribe(topic))
@@ -912,8 +954,40 @@ class MQTT:
             self.hass.add_job(self.async_publish(*attr.astuple(self.birth_message)))
 
     def _mqtt_on_message(self, _mqttc, _userdata, msg) -> None:
-        """Message received callback."""
-        self.hass.add_job(self._mqtt_handle_message, msg)
+        """Message received callback.
+
+        Messages are queued and handled in batches, so a burst of messages
+        wakes up the event loop only once.
+        """
+        self._received.append((msg, time.monotonic()))
+
+        if not self._process_scheduled:
+            self._process_scheduled = True
+            self.hass.loop.call_soon_threadsafe(self._async_process_received)
+
+    @callback
+    def _async_process_received(self) -> None:
+        """Handle a batch of received messages."""
+        # Cleared first so a message queued during the batch schedules
+        # another one
+        self._process_scheduled = False
+        received = self._received
+        batch_size = min(len(received), MAX_MESSAGE_BATCH_SIZE)
+
+        if not batch_size:
+            return
+
+        self.message_latency = round((time.monotonic() - received[0][1]) * 1000)
+        self.batch_size = batch_size
+        self.max_batch_size = max(self.max_batch_size, batch_size)
+
+        for _ in range(batch_size):
+            self._mqtt_handle_message(received.popleft()[0])
+
+        # Leave the rest to the next iteration so other jobs can run
+        if received and not self._process_scheduled:
+            self._process_scheduled = True
+            self.hass.loop.call_soon(self._async_process_received)
 
     @callback
     def _mqtt_handle_message(self, msg) -> None:
@@ -924,26 +998,24 @@ class MQTT:
             msg.payload,
         )
 
-        for subscription in self.subscriptions:
-            if not _match_topic(subscription.topic, msg.topic):
-                continue
-
-            payload = msg.payload  # type: SubscribePayloadType
-            if subscription.encoding is not None:
-                try:
-                    payload = msg.payload.decode(subscription.encoding)
-                except (AttributeError, UnicodeDecodeError):
-                    _LOGGER.warning(
-                        "Can't decode payload %s on %s with encoding %s",
-                        msg.payload,
-                        msg.topic,
-                        subscription.encoding,
-                    )
-                    continue
-
-            self.hass.async_run_job(
-                subscription.callback, Message(msg.topic, payload, msg.qos, msg.retain)
-            )
+        # Callbacks may subscribe or unsubscribe while the message is handled
+        subscriptions = [
+            subscription
+            for topic_subscriptions in self._matcher.iter_match(msg.topic)
+            for subscription in topic_subscriptions
+        ]
+        # Encoding -> message with the decoded payload, None if decoding failed
+        messages = {}  # type: Dict[Optional[str], Optional[Message]]
+
+        for subscription in subscriptions:
+            encoding = subscription.encoding
+            if encoding in messages:
+                message = messages[encoding]
+            else:
+                message = messages[encoding] = _decode_message(msg, encoding)
+
+            if message is not None:
+                self.hass.async_run_job(subscription.callback, message)
 
     def _mqtt_on_disconnect(self, _mqttc, _userdata, result_code: int) -> None:
         """Disconnected callback."""
@@ -985,17 +1057,22 @@ def _raise_on_error(result_code: int) -> None:
         )
 
 
-def _match_topic(subscription: str, topic: str) -> bool:
-    """Test if topic matches subscription."""
-    from paho.mqtt.matcher import MQTTMatcher
+def _decode_message(msg, encoding: Optional[str]) -> Optional[Message]:
+    """Return the message with the payload decoded or None if it failed."""
+    payload = msg.payload  # type: SubscribePayloadType
+    if encoding is not None:
+        try:
+            payload = msg.payload.decode(encoding)
+        except (AttributeError, UnicodeDecodeError):
+            _LOGGER.warning(
+                "Can't decode payload %s on %s with encoding %s",
+                msg.payload,
+                msg.topic,
+                encoding,
+            )
+            return None
 
-    matcher = MQTTMatcher()
-    matcher[subscription] = True
-    try:
-        next(matcher.iter_match(topic))
-        return True
-    except StopIteration:
-        return False
+    return Message(msg.topic, payload, msg.qos, msg.retain)
 
 
 class MqttAttributes(Entity):
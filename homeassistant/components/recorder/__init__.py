@@ -1,9 +1,13 @@
 """Support for recording details."""
 import asyncio
-from collections import namedtuple
+from collections import OrderedDict, deque, namedtuple
 import concurrent.futures
+from contextlib import suppress
 from datetime import datetime, timedelta
+from functools import partial
+import json
 import logging
+import os
 import queue
 import threading
 import time
@@ -23,7 +27,7 @@ from homeassistant.const import (
     EVENT_TIME_CHANGED,
     MATCH_ALL,
 )
-from homeassistant.core import CoreState, HomeAssistant, callback
+from homeassistant.core import CoreState, Event, HomeAssistant, callback
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entityfilter import generate_filter
 from homeassistant.helpers.typing import ConfigType
@@ -31,6 +35,8 @@ import homeassistant.util.dt as dt_util
 
 from . import migration, purge
 from .const import DATA_INSTANCE
+from .journal import Journal
+from .statistics import StatisticsCompiler, sample_from_state
 from .util import session_scope
 
 _LOGGER = logging.getLogger(__name__)
@@ -51,11 +57,35 @@ SERVICE_PURGE_SCHEMA = vol.Schema(
 
 DEFAULT_URL = "sqlite:///{hass_config_path}"
 DEFAULT_DB_FILE = "home-assistant_v2.db"
+JOURNAL_FILE = ".recorder_journal"
+PURGE_PROGRESS_FILE = ".purge_progress"
 
 CONF_DB_URL = "db_url"
 CONF_PURGE_KEEP_DAYS = "purge_keep_days"
 CONF_PURGE_INTERVAL = "purge_interval"
 CONF_EVENT_TYPES = "event_types"
+CONF_COMMIT_INTERVAL = "commit_interval"
+CONF_MAX_BATCH_SIZE = "max_batch_size"
+CONF_MAX_QUEUE_SIZE = "max_queue_size"
+CONF_OVERFLOW_POLICY = "overflow_policy"
+
+OVERFLOW_BLOCK = "block"
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_SPILL = "spill"
+
+DEFAULT_COMMIT_INTERVAL = 0
+DEFAULT_MAX_BATCH_SIZE = 1000
+DEFAULT_MAX_QUEUE_SIZE = 50000
+DEFAULT_OVERFLOW_POLICY = OVERFLOW_DROP_OLDEST
+
+# Seconds the block policy waits for room before dropping the event
+QUEUE_BLOCK_TIMEOUT = 10
+
+# Number of state attributes ids kept in memory
+ATTRIBUTES_CACHE_SIZE = 2048
+
+# Entities whose last recorded state is looked up in one query
+OLD_STATE_LOOKUP_CHUNK_SIZE = 500
 
 CONNECT_RETRY_WAIT = 3
 
@@ -88,6 +118,18 @@ CONFIG_SCHEMA = vol.Schema(
                     vol.Coerce(int), vol.Range(min=0)
                 ),
                 vol.Optional(CONF_DB_URL): cv.string,
+                vol.Optional(
+                    CONF_COMMIT_INTERVAL, default=DEFAULT_COMMIT_INTERVAL
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_MAX_BATCH_SIZE, default=DEFAULT_MAX_BATCH_SIZE
+                ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                vol.Optional(
+                    CONF_MAX_QUEUE_SIZE, default=DEFAULT_MAX_QUEUE_SIZE
+                ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                vol.Optional(
+                    CONF_OVERFLOW_POLICY, default=DEFAULT_OVERFLOW_POLICY
+                ): vol.In([OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_SPILL]),
             }
         )
     },
@@ -127,6 +169,10 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     conf = config[DOMAIN]
     keep_days = conf.get(CONF_PURGE_KEEP_DAYS)
     purge_interval = conf.get(CONF_PURGE_INTERVAL)
+    commit_interval = conf.get(CONF_COMMIT_INTERVAL, DEFAULT_COMMIT_INTERVAL)
+    max_batch_size = conf.get(CONF_MAX_BATCH_SIZE, DEFAULT_MAX_BATCH_SIZE)
+    max_queue_size = conf.get(CONF_MAX_QUEUE_SIZE, DEFAULT_MAX_QUEUE_SIZE)
+    overflow_policy = conf.get(CONF_OVERFLOW_POLICY, DEFAULT_OVERFLOW_POLICY)
 
     db_url = conf.get(CONF_DB_URL, None)
     if not db_url:
@@ -141,21 +187,44 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
         uri=db_url,
         include=include,
         exclude=exclude,
+        commit_interval=commit_interval,
+        max_batch_size=max_batch_size,
+        max_queue_size=max_queue_size,
+        overflow_policy=overflow_policy,
     )
     instance.async_initialize()
     instance.start()
 
     async def async_handle_purge_service(service):
         """Handle calls to the purge service."""
-        instance.do_adhoc_purge(**service.data)
+        # Queuing the task may wait for room in the queue
+        await hass.async_add_executor_job(
+            partial(instance.do_adhoc_purge, **service.data)
+        )
 
     hass.services.async_register(
         DOMAIN, SERVICE_PURGE, async_handle_purge_service, schema=SERVICE_PURGE_SCHEMA
     )
+    hass.components.system_health.async_register_info(DOMAIN, system_health_info)
 
     return await instance.async_db_ready
 
 
+async def system_health_info(hass):
+    """Get info for the info page."""
+    instance = hass.data[DATA_INSTANCE]
+
+    return {
+        "queue_depth": instance.queue.qsize(),
+        "max_queue_size": instance.max_queue_size,
+        "journal_size": instance.journal_size,
+        "commit_latency": instance.commit_latency,
+        "dropped_events": instance.dropped_events,
+        "purging": instance.purging,
+        "purged_rows": instance.purged_rows,
+    }
+
+
 PurgeTask = namedtuple("PurgeTask", ["keep_days", "repack"])
 
 
@@ -170,6 +239,10 @@ class Recorder(threading.Thread):
         uri: str,
         include: Dict,
         exclude: Dict,
+        commit_interval: float = DEFAULT_COMMIT_INTERVAL,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE,
+        overflow_policy: str = DEFAULT_OVERFLOW_POLICY,
     ) -> None:
         """Initialize the recorder."""
         threading.Thread.__init__(self, name="Recorder")
@@ -177,7 +250,31 @@ class Recorder(threading.Thread):
         self.hass = hass
         self.keep_days = keep_days
         self.purge_interval = purge_interval
-        self.queue = queue.Queue()  # type: Any
+        self.commit_interval = commit_interval
+        self.max_batch_size = max_batch_size
+        self.max_queue_size = max_queue_size
+        self.overflow_policy = overflow_policy
+        self.queue = queue.Queue(maxsize=max_queue_size)  # type: Any
+        self.journal = None  # type: Optional[Journal]
+        if overflow_policy == OVERFLOW_SPILL:
+            self.journal = Journal(hass.config.path(JOURNAL_FILE))
+        # Events waiting for room in the queue with the time they are dropped
+        self._blocked = deque()  # type: deque
+        self._unblock_task = None  # type: Optional[asyncio.Task]
+        self.dropped_events = 0
+        # Milliseconds it took to write the last batch
+        self.commit_latency = None  # type: Optional[int]
+        # JSON encoded state attributes -> attributes_id, least recent first
+        self.attributes_ids = OrderedDict()  # type: OrderedDict
+        self.statistics = StatisticsCompiler()
+        # entity_id -> state_id of the last recorded state of the entity,
+        # None if there is none. Entities are looked up when first recorded.
+        self.old_state_ids = {}  # type: Dict[str, Optional[int]]
+        self.purging = False
+        # Rows deleted by the current or last purge
+        self.purged_rows = 0
+        # Chunks of the current purge that failed in a row
+        self.purge_failures = 0
         self.recording_start = dt_util.utcnow()
         self.db_url = uri
         self.async_db_ready = asyncio.Future()
@@ -197,7 +294,7 @@ class Recorder(threading.Thread):
     @callback
     def async_initialize(self):
         """Initialize the recorder."""
-        self.hass.bus.async_listen(MATCH_ALL, self.event_listener)
+        self.hass.bus.async_listen(MATCH_ALL, self.event_listener, self.event_filter)
 
     def do_adhoc_purge(self, **kwargs):
         """Trigger an adhoc purge retaining keep_days worth of data."""
@@ -208,9 +305,8 @@ class Recorder(threading.Thread):
 
     def run(self):
         """Start processing events to save."""
-        from .models import States, Events
+        from .models import Events
         from homeassistant.components import persistent_notification
-        from sqlalchemy import exc
 
         tries = 1
         connected = False
@@ -290,7 +386,9 @@ class Recorder(threading.Thread):
             @callback
             def async_purge(now):
                 """Trigger the purge and schedule the next run."""
-                self.queue.put(PurgeTask(self.keep_days, repack=False))
+                self.hass.async_add_executor_job(
+                    self.queue.put, PurgeTask(self.keep_days, repack=False)
+                )
                 self.hass.helpers.event.async_track_point_in_time(
                     async_purge, now + timedelta(days=self.purge_interval)
                 )
@@ -308,84 +406,397 @@ class Recorder(threading.Thread):
 
             self.hass.helpers.event.track_point_in_time(async_purge, run)
 
+        # Events spilled before the last shutdown
+        self._replay_journal()
+
+        # Resume a purge that was interrupted by the last shutdown
+        with suppress(ValueError, TypeError, OSError, queue.Full):
+            with open(self.hass.config.path(PURGE_PROGRESS_FILE)) as fil:
+                self.queue.put_nowait(PurgeTask(**json.load(fil)))
+
+        # Task that ended the last batch and still has to be processed
+        pending = []
+
         while True:
-            event = self.queue.get()
+            event = pending.pop() if pending else self.queue.get()
 
             if event is None:
+                self._replay_journal()
+                if self.journal is not None:
+                    self.journal.close()
                 self._close_run()
                 self._close_connection()
                 self.queue.task_done()
                 return
             if isinstance(event, PurgeTask):
-                purge.purge_old_data(self, event.keep_days, event.repack)
-                self.queue.task_done()
-                continue
-            elif event.event_type == EVENT_TIME_CHANGED:
-                self.queue.task_done()
+                if self._purge(event):
+                    self.queue.task_done()
+                    continue
+
+                # Write the events queued meanwhile before the next chunk
+                pending.append(event)
+                with suppress(queue.Empty):
+                    pending.append(self.queue.get_nowait())
                 continue
-            elif event.event_type in self.exclude_t:
+
+            batch = self._get_batch(event, pending)
+            start = time.monotonic()
+            self._save_batch(batch)
+            self.commit_latency = round((time.monotonic() - start) * 1000)
+
+            # Spilled events are newer than everything in the queue
+            if self.journal_size and not pending and self.queue.empty():
+                self._replay_journal()
+
+            for _ in batch:
                 self.queue.task_done()
-                continue
 
-            entity_id = event.data.get(ATTR_ENTITY_ID)
-            if entity_id is not None:
-                if not self.entity_filter(entity_id):
-                    self.queue.task_done()
-                    continue
+    def _purge(self, task):
+        """Purge one chunk of old data, return True when the purge is done."""
+        progress_path = self.hass.config.path(PURGE_PROGRESS_FILE)
+
+        if not self.purging:
+            self.purging = True
+            self.purged_rows = 0
+            with suppress(OSError):
+                with open(progress_path, "w") as fil:
+                    json.dump(task._asdict(), fil)
+
+        if not purge.purge_old_data(self, task.keep_days, task.repack):
+            _LOGGER.debug("Purged %s rows so far", self.purged_rows)
+            return False
+
+        _LOGGER.debug("Purge done, deleted %s rows", self.purged_rows)
+        self.purging = False
+        with suppress(OSError):
+            os.remove(progress_path)
+        return True
+
+    def _replay_journal(self):
+        """Write the events spilled to the journal."""
+        if self.journal is None:
+            return
 
-            tries = 1
-            updated = False
-            while not updated and tries <= 10:
-                if tries != 1:
-                    time.sleep(CONNECT_RETRY_WAIT)
-                try:
-                    with session_scope(session=self.get_session()) as session:
-                        try:
-                            dbevent = Events.from_event(event)
-                            session.add(dbevent)
-                            session.flush()
-                        except (TypeError, ValueError):
-                            _LOGGER.warning("Event is not JSON serializable: %s", event)
-
-                        if event.event_type == EVENT_STATE_CHANGED:
-                            try:
-                                dbstate = States.from_event(event)
-                                dbstate.event_id = dbevent.event_id
-                                session.add(dbstate)
-                            except (TypeError, ValueError):
-                                _LOGGER.warning(
-                                    "State is not JSON serializable: %s",
-                                    event.data.get("new_state"),
-                                )
-
-                    updated = True
-
-                except exc.OperationalError as err:
-                    _LOGGER.error(
-                        "Error in database connectivity: %s. "
-                        "(retrying in %s seconds)",
-                        err,
-                        CONNECT_RETRY_WAIT,
+        batch = []
+        for event in self.journal.replay():
+            batch.append(event)
+            if len(batch) >= self.max_batch_size:
+                self._save_batch(batch)
+                batch = []
+
+        if batch:
+            self._save_batch(batch)
+
+    def _get_batch(self, event, pending):
+        """Collect the events to write in one transaction.
+
+        Waits up to commit_interval for more events. A stop or purge task
+        ends the batch and is added to pending.
+        """
+        batch = [event]
+        deadline = time.monotonic() + self.commit_interval
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if timeout > 0:
+                    event = self.queue.get(timeout=timeout)
+                else:
+                    event = self.queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if event is None or isinstance(event, PurgeTask):
+                pending.append(event)
+                break
+
+            batch.append(event)
+
+        return batch
+
+    def _save_batch(self, events):
+        """Write events and their states to the database in one transaction."""
+        from sqlalchemy import exc
+
+        tries = 1
+        updated = False
+        while not updated and tries <= 10:
+            if tries != 1:
+                time.sleep(CONNECT_RETRY_WAIT)
+            try:
+                with session_scope(session=self.get_session()) as session:
+                    new_attributes_ids, rollups, state_ids = self._add_events(
+                        session, events
                     )
-                    tries += 1
+                updated = True
 
-                except exc.SQLAlchemyError:
-                    updated = True
-                    _LOGGER.exception("Error saving event: %s", event)
+                for shared_attrs, attributes_id in new_attributes_ids.items():
+                    self._cache_attributes_id(shared_attrs, attributes_id)
+                self.statistics.commit(rollups)
+                self.old_state_ids.update(state_ids)
 
-            if not updated:
+            except exc.OperationalError as err:
                 _LOGGER.error(
-                    "Error in database update. Could not save "
-                    "after %d tries. Giving up",
-                    tries,
+                    "Error in database connectivity: %s. " "(retrying in %s seconds)",
+                    err,
+                    CONNECT_RETRY_WAIT,
                 )
+                tries += 1
 
-            self.queue.task_done()
+            except exc.SQLAlchemyError:
+                updated = True
+                if len(events) == 1:
+                    _LOGGER.exception("Error saving event: %s", events[0])
+                else:
+                    # Save the events one by one to only drop the bad ones
+                    for event in events:
+                        self._save_batch([event])
+
+        if not updated:
+            _LOGGER.error(
+                "Error in database update. Could not save " "after %d tries. Giving up",
+                tries,
+            )
+
+    def _add_events(self, session, events):
+        """Add events and the states of state_changed events to a session.
+
+        Returns the ids of the state attributes that were added, the updated
+        statistics rollups and the ids of the last states of the entities.
+        """
+        from .models import States, Events, StateAttributes
+
+        db_events = []
+        db_states = []
+        # JSON encoded state attributes -> new StateAttributes
+        db_attributes = {}
+        # entity_id -> last States of the entity in this batch
+        last_db_states = {}
+        # (entity_id, last_updated, value) of numeric sensors
+        samples = []
+
+        self._load_old_state_ids(
+            session,
+            {
+                event.data.get(ATTR_ENTITY_ID)
+                for event in events
+                if event.event_type == EVENT_STATE_CHANGED
+                and event.data.get("old_state") is not None
+            },
+        )
+
+        for event in events:
+            try:
+                dbevent = Events.from_event(event)
+                db_events.append(dbevent)
+            except (TypeError, ValueError):
+                _LOGGER.warning("Event is not JSON serializable: %s", event)
+                dbevent = None
+
+            if event.event_type != EVENT_STATE_CHANGED:
+                continue
+
+            try:
+                dbstate = States.from_event(event)
+            except (TypeError, ValueError):
+                _LOGGER.warning(
+                    "State is not JSON serializable: %s", event.data.get("new_state")
+                )
+                continue
+
+            # Store the attributes once in the state_attributes table
+            shared_attrs = dbstate.attributes
+            dbstate.attributes = None
+            dbstate.attributes_id = self._get_attributes_id(session, shared_attrs)
+            dbattr = None
+
+            if dbstate.attributes_id is None:
+                dbattr = db_attributes.get(shared_attrs)
+                if dbattr is None:
+                    dbattr = StateAttributes.from_shared_attrs(shared_attrs)
+                    db_attributes[shared_attrs] = dbattr
+
+            # The old state may be in this batch, it is linked once it has an id
+            old_dbstate = None
+            if event.data.get("old_state") is not None:
+                old_dbstate = last_db_states.get(dbstate.entity_id)
+                if old_dbstate is None:
+                    dbstate.old_state_id = self.old_state_ids.get(dbstate.entity_id)
+            last_db_states[dbstate.entity_id] = dbstate
+
+            db_states.append((dbstate, dbevent, dbattr, old_dbstate))
+
+            new_state = event.data.get("new_state")
+            value = sample_from_state(new_state)
+            if value is not None:
+                samples.append((new_state.entity_id, new_state.last_updated, value))
+
+        # One flush assigns the ids of all events and attributes
+        session.add_all(db_events)
+        session.add_all(db_attributes.values())
+        session.flush()
+
+        for dbstate, dbevent, dbattr, _ in db_states:
+            if dbevent is not None:
+                dbstate.event_id = dbevent.event_id
+            if dbattr is not None:
+                dbstate.attributes_id = dbattr.attributes_id
+
+        session.bulk_save_objects(
+            [dbstate for dbstate, _, _, _ in db_states], return_defaults=True
+        )
+        session.bulk_update_mappings(
+            States,
+            [
+                {"state_id": dbstate.state_id, "old_state_id": old_dbstate.state_id}
+                for dbstate, _, _, old_dbstate in db_states
+                if old_dbstate is not None
+            ],
+        )
+
+        new_attributes_ids = {
+            shared_attrs: dbattr.attributes_id
+            for shared_attrs, dbattr in db_attributes.items()
+        }
+        state_ids = {
+            entity_id: dbstate.state_id for entity_id, dbstate in last_db_states.items()
+        }
+
+        return (
+            new_attributes_ids,
+            self.statistics.compile(session, samples),
+            state_ids,
+        )
+
+    def _get_attributes_id(self, session, shared_attrs):
+        """Return the id of stored state attributes or None if not stored."""
+        from .models import StateAttributes
+
+        attributes_id = self.attributes_ids.get(shared_attrs)
+
+        if attributes_id is not None:
+            self.attributes_ids.move_to_end(shared_attrs)
+            return attributes_id
+
+        query = session.query(
+            StateAttributes.attributes_id, StateAttributes.shared_attrs
+        ).filter(
+            StateAttributes.hash == StateAttributes.hash_shared_attrs(shared_attrs)
+        )
+
+        for attributes_id, db_shared_attrs in query:
+            if db_shared_attrs == shared_attrs:
+                self._cache_attributes_id(shared_attrs, attributes_id)
+                return attributes_id
+
+        return None
+
+    def _cache_attributes_id(self, shared_attrs, attributes_id):
+        """Remember the id of stored state attributes."""
+        self.attributes_ids[shared_attrs] = attributes_id
+
+        if len(self.attributes_ids) > ATTRIBUTES_CACHE_SIZE:
+            self.attributes_ids.popitem(last=False)
+
+    @callback
+    def event_filter(self, event):
+        """Return if an event should be recorded."""
+        if event.event_type == EVENT_TIME_CHANGED or event.event_type in self.exclude_t:
+            return False
+
+        entity_id = event.data.get(ATTR_ENTITY_ID)
+        return entity_id is None or self.entity_filter(entity_id)
+
+    @property
+    def journal_size(self):
+        """Return the number of events waiting in the journal."""
+        return 0 if self.journal is None else self.journal.size
 
     @callback
     def event_listener(self, event):
         """Listen for new events and put them in the process queue."""
-        self.queue.put(event)
+        # Keep the order of events until the journal has been replayed
+        if self.journal_size:
+            self._spill(event)
+            return
+
+        # Keep the order of events until the blocked events are queued
+        if self._blocked:
+            self._block(event)
+            return
+
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self._handle_overflow(event)
+
+    @callback
+    def _handle_overflow(self, event):
+        """Apply the overflow policy to an event that does not fit the queue."""
+        if self.overflow_policy == OVERFLOW_SPILL:
+            self._spill(event)
+            return
+
+        if self.overflow_policy == OVERFLOW_BLOCK:
+            self._block(event)
+            return
+
+        with suppress(queue.Empty, queue.Full):
+            oldest = self.queue.get_nowait()
+            self.queue.task_done()
+            # Never drop a stop or purge task
+            if not isinstance(oldest, Event):
+                oldest, event = event, oldest
+            self.queue.put_nowait(event)
+            event = oldest
+
+        self._drop(event)
+
+    @callback
+    def _block(self, event):
+        """Queue an event as soon as the queue has room.
+
+        The event loop does not wait, the wait happens in the executor. An
+        event that still does not fit after QUEUE_BLOCK_TIMEOUT is dropped.
+        """
+        self._blocked.append((time.monotonic() + QUEUE_BLOCK_TIMEOUT, event))
+
+        if self._unblock_task is None:
+            self._unblock_task = self.hass.async_create_task(self._async_unblock())
+
+    async def _async_unblock(self):
+        """Move the blocked events to the queue in order."""
+        try:
+            while self._blocked:
+                deadline, event = self._blocked[0]
+                timeout = max(deadline - time.monotonic(), 0)
+                try:
+                    await self.hass.async_add_executor_job(
+                        partial(self.queue.put, event, timeout=timeout)
+                    )
+                except queue.Full:
+                    self._drop(event)
+                self._blocked.popleft()
+        finally:
+            self._unblock_task = None
+
+    @callback
+    def _spill(self, event):
+        """Append an event to the journal."""
+        try:
+            self.journal.append(event)
+        except (TypeError, ValueError) as err:
+            _LOGGER.error("Error writing event to the recorder journal: %s", err)
+            self._drop(event)
+
+    @callback
+    def _drop(self, event):
+        """Count an event that will not be recorded."""
+        if not self.dropped_events:
+            _LOGGER.warning(
+                "The recorder queue is full, events are being dropped: %s", event
+            )
+        self.dropped_events += 1
 
     def block_till_done(self):
         """Block till all events processed."""
@@ -406,12 +817,14 @@ class Recorder(threading.Thread):
         # pylint: disable=unused-variable
         @event.listens_for(Engine, "connect")
         def set_sqlite_pragma(dbapi_connection, connection_record):
-            """Set sqlite's WAL mode."""
+            """Set sqlite's WAL and incremental auto vacuum mode."""
             if isinstance(dbapi_connection, Connection):
                 old_isolation = dbapi_connection.isolation_level
                 dbapi_connection.isolation_level = None
                 cursor = dbapi_connection.cursor()
                 cursor.execute("PRAGMA journal_mode=WAL")
+                # Only applies to new databases, others switch on repack
+                cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
                 cursor.close()
                 dbapi_connection.isolation_level = old_isolation
 
@@ -457,6 +870,35 @@ class Recorder(threading.Thread):
             session.flush()
             session.expunge(self.run_info)
 
+    def _load_old_state_ids(self, session, entity_ids):
+        """Look up the last recorded state of entities not recorded yet.
+
+        Entities keep their state over a restart, so their next state is
+        linked to the state recorded last before it.
+        """
+        from sqlalchemy import func
+        from .models import States
+
+        entity_ids = [
+            entity_id for entity_id in entity_ids if entity_id not in self.old_state_ids
+        ]
+        for start in range(0, len(entity_ids), OLD_STATE_LOOKUP_CHUNK_SIZE):
+            chunk = entity_ids[start : start + OLD_STATE_LOOKUP_CHUNK_SIZE]
+            last_state_ids = (
+                session.query(func.max(States.state_id))
+                .filter(States.entity_id.in_(chunk))
+                .group_by(States.entity_id)
+                .subquery()
+            )
+            old_state_ids = dict.fromkeys(chunk)
+            for entity_id, state_id, state in session.query(
+                States.entity_id, States.state_id, States.state
+            ).filter(States.state_id.in_(last_state_ids)):
+                # A removed entity has an empty state, its next state is new
+                if state:
+                    old_state_ids[entity_id] = state_id
+            self.old_state_ids.update(old_state_ids)
+
     def _close_run(self):
         """Save end time for current run."""
         with session_scope(session=self.get_session()) as session:
@@ -0,0 +1,155 @@
+"""On-disk journal for events that do not fit in the recorder queue."""
+from contextlib import suppress
+import json
+import logging
+import os
+import queue
+import threading
+from typing import Optional  # noqa: F401
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import Context, Event, EventOrigin, State
+from homeassistant.helpers.json import JSONEncoder
+import homeassistant.util.dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class Journal:
+    """Append-only file of events waiting to be recorded.
+
+    Events are appended from the event loop and written to disk by a writer
+    thread, so the loop never waits for the disk. The recorder thread
+    replays them once the queue has drained.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize the journal."""
+        self.path = path
+        # Number of events appended since the last replay
+        self.size = 0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()  # type: queue.Queue
+        self._thread = None  # type: Optional[threading.Thread]
+
+    def append(self, event: Event) -> None:
+        """Append an event to the journal."""
+        line = json.dumps(event.as_dict(), cls=JSONEncoder)
+
+        with self._lock:
+            self.size += 1
+            self._ensure_writer()
+        self._queue.put(line)
+
+    def replay(self):
+        """Remove the events from the journal and yield them in order."""
+        replay_path = self.path + ".replay"
+        rotation = _Rotation(replay_path)
+
+        with self._lock:
+            self._ensure_writer()
+        self._queue.put(rotation)
+        rotation.done.wait()
+
+        with self._lock:
+            self.size -= rotation.count
+
+        if not rotation.rotated:
+            return
+
+        with open(replay_path, encoding="utf-8") as fil:
+            for line in fil:
+                try:
+                    yield _event_from_dict(json.loads(line))
+                except (ValueError, KeyError, TypeError):
+                    _LOGGER.warning("Skipping invalid journal entry: %s", line)
+
+        os.remove(replay_path)
+
+    def close(self) -> None:
+        """Write the appended events and stop the writer thread."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _ensure_writer(self) -> None:
+        """Start the writer thread if it is not running."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                name="RecorderJournal", target=self._write, daemon=True
+            )
+            self._thread.start()
+
+    def _write(self) -> None:
+        """Write appended events until the journal is closed."""
+        fil = None
+        # Number of events written since the last rotation
+        written = 0
+
+        while True:
+            item = self._queue.get()
+
+            if item is None:
+                if fil is not None:
+                    fil.close()
+                return
+
+            if isinstance(item, _Rotation):
+                if fil is not None:
+                    fil.close()
+                    fil = None
+                with suppress(OSError):
+                    os.replace(self.path, item.replay_path)
+                    item.rotated = True
+                item.count = written
+                written = 0
+                item.done.set()
+                continue
+
+            try:
+                if fil is None:
+                    fil = open(self.path, "a", encoding="utf-8")
+                fil.write(item + "\n")
+                # Flush once the appended events are written
+                if self._queue.empty():
+                    fil.flush()
+            except OSError as err:
+                _LOGGER.error("Error writing event to the recorder journal: %s", err)
+                # The event is lost and won't be replayed
+                with self._lock:
+                    self.size -= 1
+                continue
+            written += 1
+
+
+class _Rotation:
+    """Request to move the journal aside for a replay."""
+
+    def __init__(self, replay_path: str) -> None:
+        """Initialize the request."""
+        self.replay_path = replay_path
+        self.done = threading.Event()
+        self.rotated = False
+        # Number of events appended to the journal since the last rotation
+        self.count = 0
+
+
+def _event_from_dict(json_dict):
+    """Restore an event written by Journal.append."""
+    data = json_dict["data"]
+
+    if json_dict["event_type"] == EVENT_STATE_CHANGED:
+        for key in ("old_state", "new_state"):
+            data[key] = State.from_dict(data.get(key))
+
+    return Event(
+        json_dict["event_type"],
+        data,
+        EventOrigin(json_dict["origin"]),
+        dt_util.parse_datetime(json_dict["time_fired"]),
+        Context(**json_dict["context"]),
+    )
@@ -1,4 +1,5 @@
 """Schema migration helpers."""
+from collections import OrderedDict
 import logging
 import os
 
@@ -7,6 +8,13 @@ from .util import session_scope
 _LOGGER = logging.getLogger(__name__)
 PROGRESS_FILE = ".migration_progress"
 
+# Number of states moved to the state_attributes table per transaction
+ATTRIBUTES_MIGRATION_CHUNK_SIZE = 10000
+# Number of state attributes ids kept in memory while migrating
+ATTRIBUTES_MIGRATION_CACHE_SIZE = 10000
+# Number of states linked to their old state per transaction
+OLD_STATE_MIGRATION_CHUNK_SIZE = 10000
+
 
 def migrate_schema(instance):
     """Check if the schema needs to be upgraded."""
@@ -256,6 +264,18 @@ def _apply_update(engine, new_version, old_version):
     elif new_version == 7:
         _create_index(engine, "states", "ix_states_entity_id")
     elif new_version == 8:
+        # The state_attributes table is created with the other tables
+        _add_columns(engine, "states", ["attributes_id INTEGER"])
+        _create_index(engine, "states", "ix_states_attributes_id")
+        _migrate_state_attributes(engine)
+    elif new_version == 9:
+        # The statistics table is created with the other tables
+        pass
+    elif new_version == 10:
+        _add_columns(engine, "states", ["old_state_id INTEGER"])
+        _migrate_old_state_ids(engine)
+        _create_index(engine, "events", "ix_events_event_type_time_fired")
+    elif new_version == 11:
         # Pending migration, want to group a few.
         pass
         # _add_columns(engine, "events", [
@@ -268,6 +288,140 @@ def _apply_update(engine, new_version, old_version):
         raise ValueError(f"No schema migration defined for version {new_version}")
 
 
+def _migrate_state_attributes(engine):
+    """Move the attributes of existing states to the state_attributes table."""
+    from sqlalchemy import bindparam, select
+    from .models import States, StateAttributes
+
+    # pylint: disable=no-member
+    states = States.__table__
+    state_attributes = StateAttributes.__table__
+
+    # JSON encoded state attributes -> attributes_id, least recent first
+    attributes_ids = OrderedDict()
+    last_state_id = 0
+    migrated = 0
+
+    def get_attributes_id(conn, shared_attrs):
+        """Return the id of the attributes, storing them if needed."""
+        attributes_id = attributes_ids.get(shared_attrs)
+
+        if attributes_id is not None:
+            attributes_ids.move_to_end(shared_attrs)
+            return attributes_id
+
+        attr_hash = StateAttributes.hash_shared_attrs(shared_attrs)
+        query = select(
+            [state_attributes.c.attributes_id, state_attributes.c.shared_attrs]
+        ).where(state_attributes.c.hash == attr_hash)
+
+        for row_attributes_id, row_shared_attrs in conn.execute(query):
+            if row_shared_attrs == shared_attrs:
+                attributes_id = row_attributes_id
+                break
+        else:
+            attributes_id = conn.execute(
+                state_attributes.insert().values(
+                    hash=attr_hash, shared_attrs=shared_attrs
+                )
+            ).inserted_primary_key[0]
+
+        attributes_ids[shared_attrs] = attributes_id
+        if len(attributes_ids) > ATTRIBUTES_MIGRATION_CACHE_SIZE:
+            attributes_ids.popitem(last=False)
+
+        return attributes_id
+
+    update = (
+        states.update()
+        .where(states.c.state_id == bindparam("b_state_id"))
+        .values(attributes_id=bindparam("b_attributes_id"), attributes=None)
+    )
+
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select([states.c.state_id, states.c.attributes])
+                .where(states.c.state_id > last_state_id)
+                .where(states.c.attributes_id.is_(None))
+                .order_by(states.c.state_id)
+                .limit(ATTRIBUTES_MIGRATION_CHUNK_SIZE)
+            ).fetchall()
+
+            if not rows:
+                break
+
+            conn.execute(
+                update,
+                [
+                    {
+                        "b_state_id": state_id,
+                        "b_attributes_id": get_attributes_id(
+                            conn, shared_attrs or "{}"
+                        ),
+                    }
+                    for state_id, shared_attrs in rows
+                ],
+            )
+
+        last_state_id = rows[-1][0]
+        migrated += len(rows)
+        _LOGGER.info("Moved the attributes of %s states", migrated)
+
+
+def _migrate_old_state_ids(engine):
+    """Link existing states to the previous state of their entity."""
+    from sqlalchemy import bindparam, select
+    from .models import States
+
+    # pylint: disable=no-member
+    states = States.__table__
+
+    # entity_id -> state_id of the last state of the entity
+    last_state_ids = {}
+    last_state_id = 0
+    migrated = 0
+
+    update = (
+        states.update()
+        .where(states.c.state_id == bindparam("b_state_id"))
+        .values(old_state_id=bindparam("b_old_state_id"))
+    )
+
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select([states.c.state_id, states.c.entity_id, states.c.state])
+                .where(states.c.state_id > last_state_id)
+                .order_by(states.c.state_id)
+                .limit(OLD_STATE_MIGRATION_CHUNK_SIZE)
+            ).fetchall()
+
+            if not rows:
+                break
+
+            params = []
+            for state_id, entity_id, state in rows:
+                old_state_id = last_state_ids.get(entity_id)
+                if old_state_id is not None:
+                    params.append(
+                        {"b_state_id": state_id, "b_old_state_id": old_state_id}
+                    )
+
+                # A removed entity has an empty state, its next state is new
+                if state:
+                    last_state_ids[entity_id] = state_id
+                else:
+                    last_state_ids.pop(entity_id, None)
+
+            if params:
+                conn.execute(update, params)
+
+        last_state_id = rows[-1][0]
+        migrated += len(rows)
+        _LOGGER.info("Linked %s states to their old state", migrated)
+
+
 def _inspect_schema_version(engine, session):
     """Determine the schema version by inspecting the db structure.
 
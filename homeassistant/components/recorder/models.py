@@ -2,11 +2,14 @@
 import json
 from datetime import datetime
 import logging
+import zlib
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     Column,
     DateTime,
+    Float,
     ForeignKey,
     Index,
     Integer,
@@ -15,16 +18,18 @@ from sqlalchemy import (
     distinct,
 )
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import relationship
 
-import homeassistant.util.dt as dt_util
 from homeassistant.core import Context, Event, EventOrigin, State, split_entity_id
 from homeassistant.helpers.json import JSONEncoder
 
+from .util import process_timestamp
+
 # SQLAlchemy Schema
 # pylint: disable=invalid-name
 Base = declarative_base()
 
-SCHEMA_VERSION = 7
+SCHEMA_VERSION = 10
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -43,6 +48,11 @@ class Events(Base):  # type: ignore
     context_user_id = Column(String(36), index=True)
     # context_parent_id = Column(String(36), index=True)
 
+    __table_args__ = (
+        # Used for fetching the events of some types in a range (logbook)
+        Index("ix_events_event_type_time_fired", "event_type", "time_fired"),
+    )
+
     @staticmethod
     def from_event(event):
         """Create an event database object from a native event."""
@@ -64,7 +74,7 @@ class Events(Base):  # type: ignore
                 self.event_type,
                 json.loads(self.event_data),
                 EventOrigin(self.origin),
-                _process_timestamp(self.time_fired),
+                process_timestamp(self.time_fired),
                 context=context,
             )
         except ValueError:
@@ -81,14 +91,21 @@ class States(Base):  # type: ignore
     domain = Column(String(64))
     entity_id = Column(String(255), index=True)
     state = Column(String(255))
+    # Only set on rows recorded before schema version 8
     attributes = Column(Text)
     event_id = Column(Integer, ForeignKey("events.event_id"), index=True)
+    attributes_id = Column(
+        Integer, ForeignKey("state_attributes.attributes_id"), index=True
+    )
     last_changed = Column(DateTime(timezone=True), default=datetime.utcnow)
     last_updated = Column(DateTime(timezone=True), default=datetime.utcnow, index=True)
     created = Column(DateTime(timezone=True), default=datetime.utcnow)
     context_id = Column(String(36), index=True)
     context_user_id = Column(String(36), index=True)
     # context_parent_id = Column(String(36), index=True)
+    # The previous state of the entity, None for new entities. Not a foreign
+    # key as the old state may have been purged.
+    old_state_id = Column(Integer)
 
     __table_args__ = (
         # Used for fetching the state of entities at a specific time
@@ -96,6 +113,8 @@ class States(Base):  # type: ignore
         Index("ix_states_entity_id_last_updated", "entity_id", "last_updated"),
     )
 
+    state_attributes = relationship("StateAttributes", lazy="joined")
+
     @staticmethod
     def from_event(event):
         """Create object from a state_changed event."""
@@ -125,6 +144,13 @@ class States(Base):  # type: ignore
 
         return dbstate
 
+    @property
+    def shared_attrs(self):
+        """Return the JSON encoded attributes of the state."""
+        if self.attributes is None and self.state_attributes is not None:
+            return self.state_attributes.shared_attrs
+        return self.attributes
+
     def to_native(self):
         """Convert to an HA state object."""
         context = Context(id=self.context_id, user_id=self.context_user_id)
@@ -132,9 +158,9 @@ class States(Base):  # type: ignore
             return State(
                 self.entity_id,
                 self.state,
-                json.loads(self.attributes),
-                _process_timestamp(self.last_changed),
-                _process_timestamp(self.last_updated),
+                json.loads(self.shared_attrs),
+                process_timestamp(self.last_changed),
+                process_timestamp(self.last_updated),
                 context=context,
                 # Temp, because database can still store invalid entity IDs
                 # Remove with 1.0 or in 2020.
@@ -146,6 +172,50 @@ class States(Base):  # type: ignore
             return None
 
 
+class StateAttributes(Base):  # type: ignore
+    """State attributes shared by state changes."""
+
+    __tablename__ = "state_attributes"
+    attributes_id = Column(Integer, primary_key=True)
+    hash = Column(BigInteger, index=True)
+    shared_attrs = Column(Text)
+
+    @staticmethod
+    def from_shared_attrs(shared_attrs):
+        """Create object from JSON encoded attributes."""
+        return StateAttributes(
+            hash=StateAttributes.hash_shared_attrs(shared_attrs),
+            shared_attrs=shared_attrs,
+        )
+
+    @staticmethod
+    def hash_shared_attrs(shared_attrs):
+        """Return the hash to look up JSON encoded attributes."""
+        return zlib.crc32(shared_attrs.encode("utf-8"))
+
+
+class Statistics(Base):  # type: ignore
+    """Min, mean and max of a numeric sensor over a period."""
+
+    __tablename__ = "statistics"
+    statistics_id = Column(Integer, primary_key=True)
+    entity_id = Column(String(255))
+    # Length of the period in seconds
+    period = Column(Integer)
+    start = Column(DateTime(timezone=True))
+    count = Column(Integer)
+    mean = Column(Float)
+    min = Column(Float)
+    max = Column(Float)
+
+    __table_args__ = (
+        # Used for fetching the statistics of entities over a range
+        Index("ix_statistics_entity_id_period_start", "entity_id", "period", "start"),
+        # Used for purging old statistics
+        Index("ix_statistics_period_start", "period", "start"),
+    )
+
+
 class RecorderRuns(Base):  # type: ignore
     """Representation of recorder run."""
 
@@ -193,13 +263,3 @@ class SchemaChanges(Base):  # type: ignore
     change_id = Column(Integer, primary_key=True)
     schema_version = Column(Integer)
     changed = Column(DateTime(timezone=True), default=datetime.utcnow)
-
-
-def _process_timestamp(ts):
-    """Process a timestamp into datetime object."""
-    if ts is None:
-        return None
-    if ts.tzinfo is None:
-        return dt_util.UTC.localize(ts)
-
-    return dt_util.as_utc(ts)
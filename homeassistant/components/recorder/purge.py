@@ -1,17 +1,37 @@
 """Purge old data helper."""
 from datetime import timedelta
 import logging
+import time
 
 import homeassistant.util.dt as dt_util
 
+from .statistics import PERIOD_5MINUTE
 from .util import session_scope
 
 _LOGGER = logging.getLogger(__name__)
 
+# Maximum number of rows deleted from each table per transaction
+PURGE_CHUNK_SIZE = 1000
+
+# Number of times a chunk is tried before the purge is given up
+PURGE_RETRIES = 3
+
+# Seconds to wait before a failed chunk is tried again
+PURGE_RETRY_WAIT = 3
+
+# Value of PRAGMA auto_vacuum for incremental auto vacuum
+AUTO_VACUUM_INCREMENTAL = 2
+
 
 def purge_old_data(instance, purge_days, repack):
-    """Purge events and states older than purge_days ago."""
-    from .models import States, Events
+    """Purge one chunk of events and states older than purge_days ago.
+
+    Hourly statistics are kept, 5 minute statistics are purged with the
+    states. Returns True when nothing is left to purge. A chunk that fails
+    returns False, so it is tried again, until it failed PURGE_RETRIES times.
+    """
+    from .models import States, StateAttributes, Events, Statistics
+    from sqlalchemy import exists
     from sqlalchemy.exc import SQLAlchemyError
 
     purge_before = dt_util.utcnow() - timedelta(days=purge_days)
@@ -19,24 +39,126 @@ def purge_old_data(instance, purge_days, repack):
 
     try:
         with session_scope(session=instance.get_session()) as session:
-            deleted_rows = (
-                session.query(States)
-                .filter((States.last_updated < purge_before))
-                .delete(synchronize_session=False)
+            purged_states = (
+                session.query(States.state_id, States.event_id)
+                .filter(States.last_updated < purge_before)
+                .order_by(States.last_updated, States.state_id)
+                .limit(PURGE_CHUNK_SIZE)
+                .all()
+            )
+            deleted_states = _delete_ids(
+                session, States.state_id, [state_id for state_id, _ in purged_states]
             )
-            _LOGGER.debug("Deleted %s states", deleted_rows)
+            _LOGGER.debug("Deleted %s states", deleted_states)
 
-            deleted_rows = (
-                session.query(Events)
-                .filter((Events.time_fired < purge_before))
-                .delete(synchronize_session=False)
+            attributes_ids = [
+                attributes_id
+                for attributes_id, in session.query(StateAttributes.attributes_id)
+                .filter(
+                    ~exists().where(
+                        States.attributes_id == StateAttributes.attributes_id
+                    )
+                )
+                .order_by(StateAttributes.attributes_id)
+                .limit(PURGE_CHUNK_SIZE)
+            ]
+            deleted_attributes = _delete_ids(
+                session, StateAttributes.attributes_id, attributes_ids
             )
-            _LOGGER.debug("Deleted %s events", deleted_rows)
+            _LOGGER.debug("Deleted %s state attributes", deleted_attributes)
 
-        # Execute sqlite vacuum command to free up space on disk
-        if repack and instance.engine.driver == "pysqlite":
-            _LOGGER.debug("Vacuuming SQLite to free space")
-            instance.engine.execute("VACUUM")
+            # Delete the events of the purged states and old events no state
+            # refers to, never an event a remaining state still refers to
+            unreferenced_event_ids = [
+                event_id
+                for event_id, in session.query(Events.event_id)
+                .filter(
+                    (Events.time_fired < purge_before)
+                    & ~exists().where(States.event_id == Events.event_id)
+                )
+                .order_by(Events.time_fired, Events.event_id)
+                .limit(PURGE_CHUNK_SIZE)
+            ]
+            event_ids = {
+                event_id for _, event_id in purged_states if event_id is not None
+            }
+            event_ids.update(unreferenced_event_ids)
+            deleted_events = _delete_ids(session, Events.event_id, list(event_ids))
+            _LOGGER.debug("Deleted %s events", deleted_events)
+
+            statistics_ids = [
+                statistics_id
+                for statistics_id, in session.query(Statistics.statistics_id)
+                .filter(
+                    (Statistics.period == PERIOD_5MINUTE)
+                    & (Statistics.start < purge_before)
+                )
+                .order_by(Statistics.start, Statistics.statistics_id)
+                .limit(PURGE_CHUNK_SIZE)
+            ]
+            deleted_statistics = _delete_ids(
+                session, Statistics.statistics_id, statistics_ids
+            )
+            _LOGGER.debug("Deleted %s statistics", deleted_statistics)
+
+        instance.purge_failures = 0
+        instance.purged_rows += (
+            deleted_states + deleted_attributes + deleted_events + deleted_statistics
+        )
+
+        # Deleted attributes may still be cached
+        if deleted_attributes:
+            instance.attributes_ids.clear()
+
+        finished = (
+            max(
+                len(purged_states),
+                len(attributes_ids),
+                len(unreferenced_event_ids),
+                len(statistics_ids),
+            )
+            < PURGE_CHUNK_SIZE
+        )
+
+        if instance.engine.driver == "pysqlite":
+            _vacuum_sqlite(instance.engine, repack and finished)
+
+        return finished
 
     except SQLAlchemyError as err:
-        _LOGGER.warning("Error purging history: %s.", err)
+        instance.purge_failures += 1
+        if instance.purge_failures >= PURGE_RETRIES:
+            _LOGGER.error("Error purging history, giving up: %s", err)
+            instance.purge_failures = 0
+            return True
+
+        _LOGGER.warning("Error purging history, retrying: %s", err)
+        time.sleep(PURGE_RETRY_WAIT)
+        return False
+
+
+def _delete_ids(session, column, ids):
+    """Delete the rows with the given primary keys."""
+    if not ids:
+        return 0
+
+    return (
+        session.query(column.class_)
+        .filter(column.in_(ids))
+        .delete(synchronize_session=False)
+    )
+
+
+def _vacuum_sqlite(engine, repack):
+    """Free the pages of deleted rows.
+
+    Databases created with incremental auto vacuum give the pages back after
+    every chunk. A repack rebuilds the database, which also switches older
+    databases to incremental auto vacuum.
+    """
+    if repack:
+        # Execute sqlite vacuum command to free up space on disk
+        _LOGGER.debug("Vacuuming SQLite to free space")
+        engine.execute("VACUUM")
+    elif engine.execute("PRAGMA auto_vacuum").scalar() == AUTO_VACUUM_INCREMENTAL:
+        engine.execute("PRAGMA incremental_vacuum")
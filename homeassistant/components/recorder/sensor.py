@@ -0,0 +1,81 @@
+"""Sensor reporting the state of the recorder queue."""
+import voluptuous as vol
+
+from homeassistant.components.sensor import PLATFORM_SCHEMA
+from homeassistant.const import CONF_NAME
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.entity import Entity
+
+from .const import DATA_INSTANCE
+
+DEFAULT_NAME = "Recorder queue"
+
+ICON = "mdi:database"
+
+ATTR_COMMIT_LATENCY = "commit_latency"
+ATTR_DROPPED_EVENTS = "dropped_events"
+ATTR_JOURNAL_SIZE = "journal_size"
+ATTR_MAX_QUEUE_SIZE = "max_queue_size"
+ATTR_PURGING = "purging"
+ATTR_PURGED_ROWS = "purged_rows"
+
+PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
+    {vol.Optional(CONF_NAME, default=DEFAULT_NAME): cv.string}
+)
+
+
+async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
+    """Set up the recorder queue sensor platform."""
+    async_add_entities(
+        [RecorderQueueSensor(config[CONF_NAME], hass.data[DATA_INSTANCE])], True
+    )
+
+
+class RecorderQueueSensor(Entity):
+    """Representation of the recorder queue depth."""
+
+    def __init__(self, name, instance):
+        """Initialize the recorder queue sensor."""
+        self._name = name
+        self._instance = instance
+        self._state = None
+        self._attributes = {}
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return self._name
+
+    @property
+    def icon(self):
+        """Icon to display in the front end."""
+        return ICON
+
+    @property
+    def unit_of_measurement(self):
+        """Return the unit of measurement the value is expressed in."""
+        return "events"
+
+    @property
+    def state(self):
+        """Return the state of the sensor."""
+        return self._state
+
+    @property
+    def device_state_attributes(self):
+        """Return the state attributes of the sensor."""
+        return self._attributes
+
+    async def async_update(self):
+        """Update the state of the sensor."""
+        instance = self._instance
+
+        self._state = instance.queue.qsize()
+        self._attributes = {
+            ATTR_COMMIT_LATENCY: instance.commit_latency,
+            ATTR_DROPPED_EVENTS: instance.dropped_events,
+            ATTR_JOURNAL_SIZE: instance.journal_size,
+            ATTR_MAX_QUEUE_SIZE: instance.max_queue_size,
+            ATTR_PURGING: instance.purging,
+            ATTR_PURGED_ROWS: instance.purged_rows,
+        }
@@ -0,0 +1,172 @@
+"""Downsampled statistics of numeric sensors."""
+from collections import namedtuple
+import math
+
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT
+import homeassistant.util.dt as dt_util
+
+# Lengths in seconds of the periods that are rolled up
+PERIOD_5MINUTE = 300
+PERIOD_HOUR = 3600
+PERIODS = (PERIOD_5MINUTE, PERIOD_HOUR)
+
+Rollup = namedtuple("Rollup", ["statistics_id", "start", "count", "mean", "min", "max"])
+
+
+def sample_from_state(state):
+    """Return the value of a numeric sensor state or None."""
+    if state is None or state.domain != "sensor":
+        return None
+
+    if ATTR_UNIT_OF_MEASUREMENT not in state.attributes:
+        return None
+
+    try:
+        value = float(state.state)
+    except ValueError:
+        return None
+
+    return value if math.isfinite(value) else None
+
+
+def period_start(when, period):
+    """Return the start of the period that contains when."""
+    return dt_util.utc_from_timestamp(when.timestamp() // period * period)
+
+
+class StatisticsCompiler:
+    """Keep the rollups of numeric sensors up to date.
+
+    The rollups of the latest period of every entity are kept in memory,
+    so a batch of samples only has to write the rows it changes.
+    """
+
+    def __init__(self):
+        """Initialize the statistics compiler."""
+        # (entity_id, period) -> Rollup of the latest period
+        self.rollups = {}
+
+    def compile(self, session, samples):
+        """Add samples of (entity_id, time, value) to the rollups.
+
+        Returns the updated rollups, which should be passed to commit once
+        the session has been committed.
+        """
+        from .models import Statistics
+
+        updated = {}
+
+        for entity_id, when, value in samples:
+            for period in PERIODS:
+                key = (entity_id, period)
+                start = period_start(when, period)
+                rollup = updated.get(key, self.rollups.get(key))
+
+                if rollup is None or rollup.start != start:
+                    if key in updated:
+                        _save_rollup(session, entity_id, period, rollup)
+                    rollup = _load_rollup(session, entity_id, period, start)
+
+                updated[key] = _add_sample(rollup, value)
+
+        # Write the rollups with one statement per table operation
+        new_statistics = {}
+        mappings = []
+        for (entity_id, period), rollup in updated.items():
+            if rollup.statistics_id is None:
+                new_statistics[entity_id, period] = _new_statistics(
+                    entity_id, period, rollup
+                )
+            else:
+                mappings.append(_statistics_mapping(rollup))
+
+        session.bulk_update_mappings(Statistics, mappings)
+        session.add_all(new_statistics.values())
+        session.flush()
+
+        for key, dbstatistics in new_statistics.items():
+            updated[key] = updated[key]._replace(
+                statistics_id=dbstatistics.statistics_id
+            )
+
+        return updated
+
+    def commit(self, updated):
+        """Remember the rollups written by a committed session."""
+        self.rollups.update(updated)
+
+
+def _add_sample(rollup, value):
+    """Return the rollup with a sample added."""
+    count = rollup.count + 1
+    return rollup._replace(
+        count=count,
+        mean=rollup.mean + (value - rollup.mean) / count,
+        min=min(rollup.min, value),
+        max=max(rollup.max, value),
+    )
+
+
+def _load_rollup(session, entity_id, period, start):
+    """Return the stored rollup of a period or an empty one."""
+    from .models import Statistics
+
+    row = (
+        session.query(
+            Statistics.statistics_id,
+            Statistics.count,
+            Statistics.mean,
+            Statistics.min,
+            Statistics.max,
+        )
+        .filter(
+            (Statistics.entity_id == entity_id)
+            & (Statistics.period == period)
+            & (Statistics.start == start)
+        )
+        .first()
+    )
+
+    if row is None:
+        return Rollup(None, start, 0, 0.0, math.inf, -math.inf)
+
+    return Rollup(row.statistics_id, start, row.count, row.mean, row.min, row.max)
+
+
+def _save_rollup(session, entity_id, period, rollup):
+    """Write a single rollup."""
+    from .models import Statistics
+
+    if rollup.statistics_id is None:
+        session.add(_new_statistics(entity_id, period, rollup))
+    else:
+        session.bulk_update_mappings(Statistics, [_statistics_mapping(rollup)])
+
+    # Make the row visible to _load_rollup
+    session.flush()
+
+
+def _new_statistics(entity_id, period, rollup):
+    """Create the database object of a new rollup."""
+    from .models import Statistics
+
+    return Statistics(
+        entity_id=entity_id,
+        period=period,
+        start=rollup.start,
+        count=rollup.count,
+        mean=rollup.mean,
+        min=rollup.min,
+        max=rollup.max,
+    )
+
+
+def _statistics_mapping(rollup):
+    """Return the columns to update of a stored rollup."""
+    return {
+        "statistics_id": rollup.statistics_id,
+        "count": rollup.count,
+        "mean": rollup.mean,
+        "min": rollup.min,
+        "max": rollup.max,
+    }
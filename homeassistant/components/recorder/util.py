@@ -3,6 +3,8 @@ from contextlib import contextmanager
 import logging
 import time
 
+import homeassistant.util.dt as dt_util
+
 from .const import DATA_INSTANCE
 
 _LOGGER = logging.getLogger(__name__)
@@ -54,9 +56,11 @@ def commit(session, work):
     return False
 
 
-def execute(qry):
+def execute(qry, to_native=True):
     """Query the database and convert the objects to HA native form.
 
+    Rows of column queries are returned as is with to_native=False.
+
     This method also retries a few times in the case of stale connections.
     """
     from sqlalchemy.exc import SQLAlchemyError
@@ -64,9 +68,12 @@ def execute(qry):
     for tryno in range(0, RETRIES):
         try:
             timer_start = time.perf_counter()
-            result = [
-                row for row in (row.to_native() for row in qry) if row is not None
-            ]
+            if to_native:
+                result = [
+                    row for row in (row.to_native() for row in qry) if row is not None
+                ]
+            else:
+                result = qry.all()
 
             if _LOGGER.isEnabledFor(logging.DEBUG):
                 elapsed = time.perf_counter() - timer_start
@@ -83,3 +90,13 @@ def execute(qry):
             if tryno == RETRIES - 1:
                 raise
             time.sleep(QUERY_RETRY_WAIT)
+
+
+def process_timestamp(timestamp):
+    """Process a timestamp into datetime object."""
+    if timestamp is None:
+        return None
+    if timestamp.tzinfo is None:
+        return dt_util.UTC.localize(timestamp)
+
+    return dt_util.as_utc(timestamp)
@@ -11,6 +11,7 @@ from homeassistant.components import websocket_api
 from homeassistant.core import callback
 from homeassistant.helpers.typing import ConfigType, HomeAssistantType
 from homeassistant.loader import bind_hass
+from homeassistant.startup_trace import DATA_STARTUP_TRACE
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -34,9 +35,18 @@ def async_register_info(
 async def async_setup(hass: HomeAssistantType, config: ConfigType):
     """Set up the System Health component."""
     hass.components.websocket_api.async_register_command(handle_info)
+
+    if DATA_STARTUP_TRACE in hass.data:
+        async_register_info(hass, "startup", startup_info)
+
     return True
 
 
+async def startup_info(hass: HomeAssistantType) -> Dict:
+    """Get the summary of the startup trace."""
+    return hass.data[DATA_STARTUP_TRACE].summary()
+
+
 async def _info_wrapper(hass, info_callback):
     """Wrap info callback."""
     try:
@@ -1,5 +1,6 @@
 """Support for exposing a templated binary sensor."""
 import logging
+from functools import partial
 from itertools import chain
 
 import voluptuous as vol
@@ -25,13 +26,19 @@ from homeassistant.const import (
 from homeassistant.exceptions import TemplateError
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entity import async_generate_entity_id
-from homeassistant.helpers.event import async_track_state_change, async_track_same_state
+from homeassistant.helpers.event import (
+    RateLimitedCall,
+    async_track_same_state,
+    async_track_state_change,
+    async_track_template_result,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
 CONF_DELAY_ON = "delay_on"
 CONF_DELAY_OFF = "delay_off"
 CONF_ATTRIBUTE_TEMPLATES = "attribute_templates"
+CONF_RATE_LIMIT = "rate_limit"
 
 SENSOR_SCHEMA = vol.Schema(
     {
@@ -44,6 +51,7 @@ SENSOR_SCHEMA = vol.Schema(
         vol.Optional(CONF_DEVICE_CLASS): DEVICE_CLASSES_SCHEMA,
         vol.Optional(CONF_DELAY_ON): vol.All(cv.time_period, cv.positive_timedelta),
         vol.Optional(CONF_DELAY_OFF): vol.All(cv.time_period, cv.positive_timedelta),
+        vol.Optional(CONF_RATE_LIMIT): vol.All(cv.time_period, cv.positive_timedelta),
     }
 )
 
@@ -94,11 +102,11 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
             entity_ids = list(entity_ids)
 
         if invalid_templates:
-            _LOGGER.warning(
+            _LOGGER.debug(
                 "Template binary sensor %s has no entity ids configured to"
                 " track nor were we able to extract the entities to track"
-                " from the %s template(s). This entity will only be able"
-                " to be updated manually.",
+                " from the %s template(s). This entity will track the states"
+                " read while rendering them.",
                 device,
                 ", ".join(invalid_templates),
             )
@@ -107,6 +115,7 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
         device_class = device_config.get(CONF_DEVICE_CLASS)
         delay_on = device_config.get(CONF_DELAY_ON)
         delay_off = device_config.get(CONF_DELAY_OFF)
+        rate_limit = device_config.get(CONF_RATE_LIMIT)
 
         sensors.append(
             BinarySensorTemplate(
@@ -121,6 +130,7 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
                 delay_on,
                 delay_off,
                 attribute_templates,
+                rate_limit,
             )
         )
     if not sensors:
@@ -147,6 +157,7 @@ class BinarySensorTemplate(BinarySensorDevice):
         delay_on,
         delay_off,
         attribute_templates,
+        rate_limit,
     ):
         """Initialize the Template binary sensor."""
         self.hass = hass
@@ -164,14 +175,58 @@ class BinarySensorTemplate(BinarySensorDevice):
         self._delay_off = delay_off
         self._attribute_templates = attribute_templates
         self._attributes = {}
+        self._rate_limit = rate_limit
+        # Shares the rate limit once added to hass
+        self._async_write_state = self.async_schedule_update_ha_state
 
     async def async_added_to_hass(self):
         """Register callbacks."""
+        rate_limited = None
+        if self._rate_limit is not None:
+            # One limit for all templates, so the sensor renders and writes
+            # its state at most once per period
+            rate_limited = RateLimitedCall(self.hass, self._rate_limit)
+
+        @callback
+        def check_state():
+            """Render the templates and update the state."""
+            self.async_check_state()
+
+        @callback
+        def write_state():
+            """Write the state with the last template results."""
+            self.async_write_ha_state()
+
+        @callback
+        def call_limited(action):
+            """Call an action, at most once per rate limit if there is one."""
+            if rate_limited is None:
+                action()
+            else:
+                rate_limited.async_call_action(action)
+
+        self._async_write_state = partial(call_limited, write_state)
 
         @callback
         def template_bsensor_state_listener(entity, old_state, new_state):
             """Handle the target device state changes."""
-            self.async_check_state()
+            call_limited(check_state)
+
+        @callback
+        def template_bsensor_value_listener(event, result):
+            """Handle changes of the states read by the value template."""
+            self._async_check_state(self._async_state_from_result(result))
+
+        def template_bsensor_render_listener(update):
+            """Return a listener that updates the sensor with a result."""
+
+            @callback
+            def render_listener(event, result):
+                """Handle changes of the states read by a template."""
+                update(result)
+                call_limited(write_state)
+
+            return render_listener
 
         @callback
         def template_bsensor_startup(event):
@@ -181,6 +236,21 @@ class BinarySensorTemplate(BinarySensorDevice):
                 async_track_state_change(
                     self.hass, self._entities, template_bsensor_state_listener
                 )
+            else:
+                # Track the states the templates read while rendering
+                async_track_template_result(
+                    self.hass,
+                    self._template,
+                    template_bsensor_value_listener,
+                    rate_limit=rate_limited,
+                )
+                for update, template in self._template_updates():
+                    async_track_template_result(
+                        self.hass,
+                        template,
+                        template_bsensor_render_listener(update),
+                        rate_limit=rate_limited,
+                    )
 
             self.async_check_state()
 
@@ -188,6 +258,18 @@ class BinarySensorTemplate(BinarySensorDevice):
             EVENT_HOMEASSISTANT_START, template_bsensor_startup
         )
 
+    def _template_updates(self):
+        """Yield the icon, picture and attribute templates with an update."""
+        for key, template in (self._attribute_templates or {}).items():
+            yield partial(self._async_update_attribute, key), template
+
+        for property_name, template in (
+            ("_icon", self._icon_template),
+            ("_entity_picture", self._entity_picture_template),
+        ):
+            if template is not None:
+                yield partial(self._async_update_property, property_name), template
+
     @property
     def name(self):
         """Return the name of the sensor."""
@@ -226,67 +308,80 @@ class BinarySensorTemplate(BinarySensorDevice):
     @callback
     def _async_render(self):
         """Get the state of template."""
-        state = None
-        try:
-            state = self._template.async_render().lower() == "true"
-        except TemplateError as ex:
-            if ex.args and ex.args[0].startswith(
-                "UndefinedError: 'None' has no attribute"
-            ):
-                # Common during HA startup - so just a warning
-                _LOGGER.warning(
-                    "Could not render template %s, " "the state is unknown", self._name
-                )
-                return
-            _LOGGER.error("Could not render template %s: %s", self._name, ex)
-
-        templates = {
-            "_icon": self._icon_template,
-            "_entity_picture": self._entity_picture_template,
-        }
+        result = _render(self._template)
+        state = self._async_state_from_result(result)
+        if _is_startup_error(result):
+            return None
 
-        attrs = {}
         if self._attribute_templates is not None:
-            for key, value in self._attribute_templates.items():
-                try:
-                    attrs[key] = value.async_render()
-                except TemplateError as err:
-                    _LOGGER.error("Error rendering attribute %s: %s", key, err)
-            self._attributes = attrs
-
-        for property_name, template in templates.items():
-            if template is None:
-                continue
+            self._attributes = {}
 
-            try:
-                setattr(self, property_name, template.async_render())
-            except TemplateError as ex:
-                friendly_property_name = property_name[1:].replace("_", " ")
-                if ex.args and ex.args[0].startswith(
-                    "UndefinedError: 'None' has no attribute"
-                ):
-                    # Common during HA startup - so just a warning
-                    _LOGGER.warning(
-                        "Could not render %s template %s," " the state is unknown.",
-                        friendly_property_name,
-                        self._name,
-                    )
-                else:
-                    _LOGGER.error(
-                        "Could not render %s template %s: %s",
-                        friendly_property_name,
-                        self._name,
-                        ex,
-                    )
+        for update, template in self._template_updates():
+            if not update(_render(template)):
                 return state
 
         return state
 
+    @callback
+    def _async_state_from_result(self, result):
+        """Return the state for a result of the value template."""
+        if not isinstance(result, TemplateError):
+            return result.lower() == "true"
+
+        if _is_startup_error(result):
+            # Common during HA startup - so just a warning
+            _LOGGER.warning(
+                "Could not render template %s, " "the state is unknown", self._name
+            )
+        else:
+            _LOGGER.error("Could not render template %s: %s", self._name, result)
+        return None
+
+    @callback
+    def _async_update_attribute(self, key, result):
+        """Update an attribute with the result of its template."""
+        if not isinstance(result, TemplateError):
+            self._attributes[key] = result
+        else:
+            self._attributes.pop(key, None)
+            _LOGGER.error("Error rendering attribute %s: %s", key, result)
+        return True
+
+    @callback
+    def _async_update_property(self, property_name, result):
+        """Update the icon or entity picture with a template result.
+
+        Returns False if the template failed to render.
+        """
+        if not isinstance(result, TemplateError):
+            setattr(self, property_name, result)
+            return True
+
+        friendly_property_name = property_name[1:].replace("_", " ")
+        if _is_startup_error(result):
+            # Common during HA startup - so just a warning
+            _LOGGER.warning(
+                "Could not render %s template %s," " the state is unknown.",
+                friendly_property_name,
+                self._name,
+            )
+        else:
+            _LOGGER.error(
+                "Could not render %s template %s: %s",
+                friendly_property_name,
+                self._name,
+                result,
+            )
+        return False
+
     @callback
     def async_check_state(self):
         """Update the state from the template."""
-        state = self._async_render()
+        self._async_check_state(self._async_render())
 
+    @callback
+    def _async_check_state(self, state):
+        """Update the state with a state rendered from the template."""
         # return if the state don't change or is invalid
         if state is None or state == self.state:
             return
@@ -295,7 +390,7 @@ class BinarySensorTemplate(BinarySensorDevice):
         def set_state():
             """Set state of template binary sensor."""
             self._state = state
-            self.async_schedule_update_ha_state()
+            self._async_write_state()
 
         # state without delay
         if (state and not self._delay_on) or (not state and not self._delay_off):
@@ -314,3 +409,20 @@ class BinarySensorTemplate(BinarySensorDevice):
     async def async_update(self):
         """Force update of the state from the template."""
         self.async_check_state()
+
+
+def _render(template):
+    """Return the result of rendering a template or the TemplateError."""
+    try:
+        return template.async_render()
+    except TemplateError as ex:
+        return ex
+
+
+def _is_startup_error(result):
+    """Return if a template failed to render as a state is not there yet."""
+    return (
+        isinstance(result, TemplateError)
+        and bool(result.args)
+        and result.args[0].startswith("UndefinedError: 'None' has no attribute")
+    )
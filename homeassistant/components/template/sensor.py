@@ -1,5 +1,6 @@
 """Allows the creation of a sensor that breaks out state_attributes."""
 import logging
+from functools import partial
 from typing import Optional
 from itertools import chain
 
@@ -27,9 +28,14 @@ from homeassistant.const import (
 from homeassistant.exceptions import TemplateError
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entity import Entity, async_generate_entity_id
-from homeassistant.helpers.event import async_track_state_change
+from homeassistant.helpers.event import (
+    RateLimitedCall,
+    async_track_state_change,
+    async_track_template_result,
+)
 
 CONF_ATTRIBUTE_TEMPLATES = "attribute_templates"
+CONF_RATE_LIMIT = "rate_limit"
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -46,6 +52,7 @@ SENSOR_SCHEMA = vol.Schema(
         vol.Optional(ATTR_UNIT_OF_MEASUREMENT): cv.string,
         vol.Optional(CONF_DEVICE_CLASS): DEVICE_CLASSES_SCHEMA,
         vol.Optional(ATTR_ENTITY_ID): cv.entity_ids,
+        vol.Optional(CONF_RATE_LIMIT): vol.All(cv.time_period, cv.positive_timedelta),
     }
 )
 
@@ -67,6 +74,7 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
         unit_of_measurement = device_config.get(ATTR_UNIT_OF_MEASUREMENT)
         device_class = device_config.get(CONF_DEVICE_CLASS)
         attribute_templates = device_config[CONF_ATTRIBUTE_TEMPLATES]
+        rate_limit = device_config.get(CONF_RATE_LIMIT)
 
         entity_ids = set()
         manual_entity_ids = device_config.get(ATTR_ENTITY_ID)
@@ -96,11 +104,11 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
                 entity_ids |= set(template_entity_ids)
 
         if invalid_templates:
-            _LOGGER.warning(
+            _LOGGER.debug(
                 "Template sensor %s has no entity ids configured to track nor"
                 " were we able to extract the entities to track from the %s "
-                "template(s). This entity will only be able to be updated "
-                "manually.",
+                "template(s). This entity will track the states read while "
+                "rendering them.",
                 device,
                 ", ".join(invalid_templates),
             )
@@ -123,6 +131,7 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
                 entity_ids,
                 device_class,
                 attribute_templates,
+                rate_limit,
             )
         )
     if not sensors:
@@ -149,6 +158,7 @@ class SensorTemplate(Entity):
         entity_ids,
         device_class,
         attribute_templates,
+        rate_limit,
     ):
         """Initialize the sensor."""
         self.hass = hass
@@ -168,14 +178,49 @@ class SensorTemplate(Entity):
         self._device_class = device_class
         self._attribute_templates = attribute_templates
         self._attributes = {}
+        self._rate_limit = rate_limit
 
     async def async_added_to_hass(self):
         """Register callbacks."""
+        rate_limited = None
+        if self._rate_limit is not None:
+            # One limit for all templates, so the sensor renders and writes
+            # its state at most once per period
+            rate_limited = RateLimitedCall(self.hass, self._rate_limit)
+
+        @callback
+        def update_state():
+            """Render the templates and write the state."""
+            self.async_schedule_update_ha_state(True)
+
+        @callback
+        def write_state():
+            """Write the state with the last template results."""
+            self.async_write_ha_state()
+
+        @callback
+        def call_limited(action):
+            """Call an action, at most once per rate limit if there is one."""
+            if rate_limited is None:
+                action()
+            else:
+                rate_limited.async_call_action(action)
 
         @callback
         def template_sensor_state_listener(entity, old_state, new_state):
             """Handle device state changes."""
-            self.async_schedule_update_ha_state(True)
+            call_limited(update_state)
+
+        def template_sensor_render_listener(update):
+            """Return a listener that updates the sensor with a result."""
+
+            @callback
+            def render_listener(event, result):
+                """Handle changes of the states read by a template."""
+                update(result)
+                call_limited(write_state)
+
+            return render_listener
 
         @callback
         def template_sensor_startup(event):
@@ -185,6 +230,15 @@ class SensorTemplate(Entity):
                 async_track_state_change(
                     self.hass, self._entities, template_sensor_state_listener
                 )
+            else:
+                # Track the states the templates read while rendering
+                for update, template in self._template_updates():
+                    async_track_template_result(
+                        self.hass,
+                        template,
+                        template_sensor_render_listener(update),
+                        rate_limit=rate_limited,
+                    )
 
             self.async_schedule_update_ha_state(True)
 
@@ -192,6 +246,21 @@ class SensorTemplate(Entity):
             EVENT_HOMEASSISTANT_START, template_sensor_startup
         )
 
+    def _template_updates(self):
+        """Yield the templates with a function taking their result."""
+        yield self._async_update_state, self._template
+
+        for key, template in self._attribute_templates.items():
+            yield partial(self._async_update_attribute, key), template
+
+        for property_name, template in (
+            ("_icon", self._icon_template),
+            ("_entity_picture", self._entity_picture_template),
+            ("_name", self._friendly_name_template),
+        ):
+            if template is not None:
+                yield partial(self._async_update_property, property_name), template
+
     @property
     def name(self):
         """Return the name of the sensor."""
@@ -234,60 +303,66 @@ class SensorTemplate(Entity):
 
     async def async_update(self):
         """Update the state from the template."""
-        try:
-            self._state = self._template.async_render()
-        except TemplateError as ex:
-            if ex.args and ex.args[0].startswith(
-                "UndefinedError: 'None' has no attribute"
-            ):
-                # Common during HA startup - so just a warning
-                _LOGGER.warning(
-                    "Could not render template %s," " the state is unknown.", self._name
-                )
-            else:
-                self._state = None
-                _LOGGER.error("Could not render template %s: %s", self._name, ex)
-
-        templates = {
-            "_icon": self._icon_template,
-            "_entity_picture": self._entity_picture_template,
-            "_name": self._friendly_name_template,
-        }
-
-        attrs = {}
-        for key, value in self._attribute_templates.items():
-            try:
-                attrs[key] = value.async_render()
-            except TemplateError as err:
-                _LOGGER.error("Error rendering attribute %s: %s", key, err)
-
-        self._attributes = attrs
-
-        for property_name, template in templates.items():
-            if template is None:
-                continue
+        self._attributes = {}
 
+        for update, template in self._template_updates():
             try:
-                setattr(self, property_name, template.async_render())
+                result = template.async_render()
             except TemplateError as ex:
-                friendly_property_name = property_name[1:].replace("_", " ")
-                if ex.args and ex.args[0].startswith(
-                    "UndefinedError: 'None' has no attribute"
-                ):
-                    # Common during HA startup - so just a warning
-                    _LOGGER.warning(
-                        "Could not render %s template %s," " the state is unknown.",
-                        friendly_property_name,
-                        self._name,
-                    )
-                    continue
-
-                try:
-                    setattr(self, property_name, getattr(super(), property_name))
-                except AttributeError:
-                    _LOGGER.error(
-                        "Could not render %s template %s: %s",
-                        friendly_property_name,
-                        self._name,
-                        ex,
-                    )
+                result = ex
+            update(result)
+
+    @callback
+    def _async_update_state(self, result):
+        """Update the state with the result of the value template."""
+        if not isinstance(result, TemplateError):
+            self._state = result
+        elif result.args and result.args[0].startswith(
+            "UndefinedError: 'None' has no attribute"
+        ):
+            # Common during HA startup - so just a warning
+            _LOGGER.warning(
+                "Could not render template %s," " the state is unknown.", self._name
+            )
+        else:
+            self._state = None
+            _LOGGER.error("Could not render template %s: %s", self._name, result)
+
+    @callback
+    def _async_update_attribute(self, key, result):
+        """Update an attribute with the result of its template."""
+        if not isinstance(result, TemplateError):
+            self._attributes[key] = result
+            return
+
+        self._attributes.pop(key, None)
+        _LOGGER.error("Error rendering attribute %s: %s", key, result)
+
+    @callback
+    def _async_update_property(self, property_name, result):
+        """Update the icon, entity picture or name with a template result."""
+        if not isinstance(result, TemplateError):
+            setattr(self, property_name, result)
+            return
+
+        friendly_property_name = property_name[1:].replace("_", " ")
+        if result.args and result.args[0].startswith(
+            "UndefinedError: 'None' has no attribute"
+        ):
+            # Common during HA startup - so just a warning
+            _LOGGER.warning(
+                "Could not render %s template %s," " the state is unknown.",
+                friendly_property_name,
+                self._name,
+            )
+            return
+
+        try:
+            setattr(self, property_name, getattr(super(), property_name))
+        except AttributeError:
+            _LOGGER.error(
+                "Could not render %s template %s: %s",
+                friendly_property_name,
+                self._name,
+                result,
+            )
@@ -52,27 +52,31 @@ def handle_subscribe_events(hass, connection, msg):
     if event_type == EVENT_STATE_CHANGED:
 
         @callback
-        def forward_events(event):
-            """Forward state changed events to websocket."""
-            if not connection.user.permissions.check_entity(
+        def event_filter(event):
+            """Filter state changed events the user is not allowed to read."""
+            return connection.user.permissions.check_entity(
                 event.data["entity_id"], POLICY_READ
-            ):
-                return
+            )
 
-            connection.send_message(messages.event_message(msg["id"], event))
+        @callback
+        def forward_events(event):
+            """Forward state changed events to websocket."""
+            connection.send_message(messages.cached_event_message(msg["id"], event))
 
     else:
 
+        @callback
+        def event_filter(event):
+            """Filter time changed events."""
+            return event.event_type != EVENT_TIME_CHANGED
+
         @callback
         def forward_events(event):
             """Forward events to websocket."""
-            if event.event_type == EVENT_TIME_CHANGED:
-                return
-
-            connection.send_message(messages.event_message(msg["id"], event.as_dict()))
+            connection.send_message(messages.cached_event_message(msg["id"], event))
 
     connection.subscriptions[msg["id"]] = hass.bus.async_listen(
-        event_type, forward_events
+        event_type, forward_events, event_filter
     )
 
     connection.send_message(messages.result_message(msg["id"]))
@@ -16,6 +16,9 @@ MINIMAL_MESSAGE_SCHEMA = vol.Schema(
 # Base schema to extend by message handlers
 BASE_COMMAND_MESSAGE_SCHEMA = vol.Schema({vol.Required("id"): cv.positive_int})
 
+# Event message with the message id and the JSON of the event filled in
+EVENT_MESSAGE_TEMPLATE = '{{"id": {}, "type": "event", "event": {}}}'
+
 
 def result_message(iden, result=None):
     """Return a success result message."""
@@ -35,3 +38,19 @@ def error_message(iden, code, message):
 def event_message(iden, event):
     """Return an event message."""
     return {"id": iden, "type": "event", "event": event}
+
+
+def cached_event_message(iden, event):
+    """Return an event message serialized to JSON.
+
+    The JSON of the event is kept on the event, so it is serialized once
+    and shared by all subscribers. If the event can't be serialized, the
+    message is returned as dict so the error is reported when it is sent.
+    """
+    if event.json_payload is None:
+        try:
+            event.json_payload = const.JSON_DUMP(event)
+        except (ValueError, TypeError):
+            return event_message(iden, event)
+
+    return EVENT_MESSAGE_TEMPLATE.format(iden, event.json_payload)
@@ -33,8 +33,10 @@ from homeassistant.const import (
     ATTR_ASSUMED_STATE,
     CONF_LATITUDE,
     CONF_LONGITUDE,
+    CONF_MAX_CONCURRENT_SETUPS,
     CONF_NAME,
     CONF_PACKAGES,
+    CONF_SETUP_WAIT_TIMEOUT,
     CONF_UNIT_SYSTEM,
     CONF_TIME_ZONE,
     CONF_ELEVATION,
@@ -58,7 +60,7 @@ from homeassistant.requirements import (
     async_get_integration_with_requirements,
     RequirementsNotFound,
 )
-from homeassistant.util.yaml import load_yaml, SECRET_YAML
+from homeassistant.util.yaml import load_yaml, load_yaml_cached, SECRET_YAML
 from homeassistant.util.package import is_docker_env
 import homeassistant.helpers.config_validation as cv
 from homeassistant.util.unit_system import IMPERIAL_SYSTEM, METRIC_SYSTEM
@@ -73,6 +75,7 @@ RE_ASCII = re.compile(r"\033\[[^m]*m")
 HA_COMPONENT_URL = "[{}](https://home-assistant.io/components/{}/)"
 YAML_CONFIG_FILE = "configuration.yaml"
 VERSION_FILE = ".HA_VERSION"
+CONFIG_CACHE_FILE = ".config_cache"
 CONFIG_DIR_NAME = ".homeassistant"
 DATA_CUSTOMIZE = "hass_customize"
 
@@ -194,6 +197,8 @@ CORE_CONFIG_SCHEMA = CUSTOMIZE_CONFIG_SCHEMA.extend(
         # pylint: disable=no-value-for-parameter
         vol.All(cv.ensure_list, [vol.IsDir()]),
         vol.Optional(CONF_PACKAGES, default={}): PACKAGES_CONFIG_SCHEMA,
+        vol.Optional(CONF_MAX_CONCURRENT_SETUPS): vol.All(int, vol.Range(min=1)),
+        vol.Optional(CONF_SETUP_WAIT_TIMEOUT): vol.All(int, vol.Range(min=1)),
         vol.Optional(CONF_AUTH_PROVIDERS): vol.All(
             cv.ensure_list,
             [
@@ -319,7 +324,7 @@ async def async_hass_config_yaml(hass: HomeAssistant) -> Dict:
             raise HomeAssistantError(
                 f"Config file not found in: {hass.config.config_dir}"
             )
-        config = load_yaml_config_file(path)
+        config = load_yaml_config_file(path, hass.config.path(CONFIG_CACHE_FILE))
         return config
 
     # Not using async_add_executor_job because this is an internal method.
@@ -338,14 +343,21 @@ def find_config_file(config_dir: Optional[str]) -> Optional[str]:
     return config_path if os.path.isfile(config_path) else None
 
 
-def load_yaml_config_file(config_path: str) -> Dict[Any, Any]:
+def load_yaml_config_file(
+    config_path: str, cache_path: Optional[str] = None
+) -> Dict[Any, Any]:
     """Parse a YAML configuration file.
 
+    The parsed configuration is cached in cache_path if given.
+
     Raises FileNotFoundError or HomeAssistantError.
 
     This method needs to run in an executor.
     """
-    conf_dict = load_yaml(config_path)
+    if cache_path is None:
+        conf_dict = load_yaml(config_path)
+    else:
+        conf_dict = load_yaml_cached(config_path, cache_path)
 
     if not isinstance(conf_dict, dict):
         msg = "The configuration file {} does not contain a dictionary".format(
@@ -97,6 +97,7 @@ CONF_LONGITUDE = "longitude"
 CONF_LIGHTS = "lights"
 CONF_MAC = "mac"
 CONF_METHOD = "method"
+CONF_MAX_CONCURRENT_SETUPS = "max_concurrent_setups"
 CONF_MAXIMUM = "maximum"
 CONF_MINIMUM = "minimum"
 CONF_MODE = "mode"
@@ -131,6 +132,7 @@ CONF_SCAN_INTERVAL = "scan_interval"
 CONF_SENDER = "sender"
 CONF_SENSOR_TYPE = "sensor_type"
 CONF_SENSORS = "sensors"
+CONF_SETUP_WAIT_TIMEOUT = "setup_wait_timeout"
 CONF_SHOW_ON_MAP = "show_on_map"
 CONF_SLAVE = "slave"
 CONF_SOURCE = "source"
@@ -28,7 +28,10 @@ from typing import (  # noqa: F401 pylint: disable=unused-import
     Set,
     TYPE_CHECKING,
     Awaitable,
+    Iterable,
     Iterator,
+    Mapping,
+    Tuple,
 )
 
 from async_timeout import timeout
@@ -87,6 +90,8 @@ if TYPE_CHECKING:
 T = TypeVar("T")
 CALLABLE_T = TypeVar("CALLABLE_T", bound=Callable)
 CALLBACK_TYPE = Callable[[], None]
+# A listener and the optional filter deciding if an event is passed to it
+FILTERABLE_LISTENER_TYPE = Tuple[Callable, Optional[Callable[["Event"], bool]]]
 # pylint: enable=invalid-name
 
 CORE_STORAGE_KEY = "core.config"
@@ -113,6 +118,7 @@ def split_entity_id(entity_id: str) -> List[str]:
     return entity_id.split(".", 1)
 
 
+@functools.lru_cache(maxsize=16384)
 def valid_entity_id(entity_id: str) -> bool:
     """Test if an entity ID is a valid format.
 
@@ -464,7 +470,14 @@ class EventOrigin(enum.Enum):
 class Event:
     """Representation of an event within the bus."""
 
-    __slots__ = ["event_type", "data", "origin", "time_fired", "context"]
+    __slots__ = [
+        "event_type",
+        "data",
+        "origin",
+        "time_fired",
+        "context",
+        "json_payload",
+    ]
 
     def __init__(
         self,
@@ -480,6 +493,8 @@ class Event:
         self.origin = origin
         self.time_fired = time_fired or dt_util.utcnow()
         self.context: Context = context or Context()
+        # JSON of the event, kept by the first subscriber that serializes it
+        self.json_payload: Optional[str] = None
 
     def as_dict(self) -> Dict:
         """Create a dict representation of this Event.
@@ -521,8 +536,16 @@ class EventBus:
 
     def __init__(self, hass: HomeAssistant) -> None:
         """Initialize a new event bus."""
-        self._listeners: Dict[str, List[Callable]] = {}
+        self._listeners: Dict[str, List[FILTERABLE_LISTENER_TYPE]] = {}
+        # state_changed listeners indexed by the entity_id they track
+        self._entity_listeners: Dict[str, List[FILTERABLE_LISTENER_TYPE]] = {}
+        self._entity_listeners_count = 0
         self._hass = hass
+        # Run @callback listeners directly in async_fire instead of
+        # scheduling each of them on the event loop.
+        self.inline_callbacks = True
+        self.inline_dispatch_count = 0
+        self.scheduled_dispatch_count = 0
 
     @callback
     def async_listeners(self) -> Dict[str, int]:
@@ -530,7 +553,14 @@ class EventBus:
 
         This method must be run in the event loop.
         """
-        return {key: len(self._listeners[key]) for key in self._listeners}
+        listeners = {key: len(self._listeners[key]) for key in self._listeners}
+
+        if self._entity_listeners_count:
+            listeners[EVENT_STATE_CHANGED] = (
+                listeners.get(EVENT_STATE_CHANGED, 0) + self._entity_listeners_count
+            )
+
+        return listeners
 
     @property
     def listeners(self) -> Dict[str, int]:
@@ -565,6 +595,13 @@ class EventBus:
         """
         listeners = self._listeners.get(event_type, [])
 
+        if event_type == EVENT_STATE_CHANGED and event_data:
+            entity_id = event_data.get("entity_id")
+            if entity_id is not None:
+                entity_listeners = self._entity_listeners.get(entity_id)
+                if entity_listeners:
+                    listeners = listeners + entity_listeners
+
         # EVENT_HOMEASSISTANT_CLOSE should go only to his listeners
         match_all_listeners = self._listeners.get(MATCH_ALL)
         if match_all_listeners is not None and event_type != EVENT_HOMEASSISTANT_CLOSE:
@@ -578,17 +615,42 @@ class EventBus:
         if not listeners:
             return
 
-        for func in listeners:
-            self._hass.async_add_job(func, event)
+        # Iterate over a copy, listeners may remove themselves when called
+        for func, event_filter in tuple(listeners):
+            if event_filter is not None:
+                try:
+                    if not event_filter(event):
+                        continue
+                except Exception:  # pylint: disable=broad-except
+                    _LOGGER.exception(
+                        "Error running event filter %s for %s", event_filter, event
+                    )
+                    continue
+
+            if not self.inline_callbacks or not is_callback(func):
+                self._hass.async_add_job(func, event)
+                self.scheduled_dispatch_count += 1
+                continue
+
+            self.inline_dispatch_count += 1
+            try:
+                func(event)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error running listener %s for %s", func, event)
 
-    def listen(self, event_type: str, listener: Callable) -> CALLBACK_TYPE:
+    def listen(
+        self,
+        event_type: str,
+        listener: Callable,
+        event_filter: Optional[Callable[[Event], bool]] = None,
+    ) -> CALLBACK_TYPE:
         """Listen for all events or events of a specific type.
 
         To listen to all events specify the constant ``MATCH_ALL``
         as event_type.
         """
         async_remove_listener = run_callback_threadsafe(
-            self._hass.loop, self.async_listen, event_type, listener
+            self._hass.loop, self.async_listen, event_type, listener, event_filter
         ).result()
 
         def remove_listener() -> None:
@@ -598,22 +660,62 @@ class EventBus:
         return remove_listener
 
     @callback
-    def async_listen(self, event_type: str, listener: Callable) -> CALLBACK_TYPE:
+    def async_listen(
+        self,
+        event_type: str,
+        listener: Callable,
+        event_filter: Optional[Callable[[Event], bool]] = None,
+    ) -> CALLBACK_TYPE:
         """Listen for all events or events of a specific type.
 
         To listen to all events specify the constant ``MATCH_ALL``
         as event_type.
 
+        An optional event_filter is called with the event inside async_fire
+        and the listener is only called or scheduled if it returns True.
+        The filter must be a cheap function that is safe to run in the
+        event loop.
+
         This method must be run in the event loop.
         """
+        filterable_listener = (listener, event_filter)
+
         if event_type in self._listeners:
-            self._listeners[event_type].append(listener)
+            self._listeners[event_type].append(filterable_listener)
         else:
-            self._listeners[event_type] = [listener]
+            self._listeners[event_type] = [filterable_listener]
+
+        def remove_listener() -> None:
+            """Remove the listener."""
+            self._async_remove_listener(event_type, filterable_listener)
+
+        return remove_listener
+
+    @callback
+    def async_listen_entity_state(
+        self, entity_ids: Iterable[str], listener: Callable
+    ) -> CALLBACK_TYPE:
+        """Listen for state_changed events of specific entities.
+
+        The listener is only invoked for state changes of the given entity
+        ids instead of being scheduled for every state change.
+
+        This method must be run in the event loop.
+        """
+        entity_ids = tuple({entity_id.lower(): None for entity_id in entity_ids})
+        filterable_listener = (listener, None)
+
+        for entity_id in entity_ids:
+            if entity_id in self._entity_listeners:
+                self._entity_listeners[entity_id].append(filterable_listener)
+            else:
+                self._entity_listeners[entity_id] = [filterable_listener]
+
+        self._entity_listeners_count += 1
 
         def remove_listener() -> None:
             """Remove the listener."""
-            self._async_remove_listener(event_type, listener)
+            self._async_remove_entity_listener(entity_ids, filterable_listener)
 
         return remove_listener
 
@@ -658,19 +760,21 @@ class EventBus:
             # multiple times as well.
             # This will make sure the second time it does nothing.
             setattr(onetime_listener, "run", True)
-            self._async_remove_listener(event_type, onetime_listener)
+            self._async_remove_listener(event_type, (onetime_listener, None))
             self._hass.async_run_job(listener, event)
 
         return self.async_listen(event_type, onetime_listener)
 
     @callback
-    def _async_remove_listener(self, event_type: str, listener: Callable) -> None:
+    def _async_remove_listener(
+        self, event_type: str, filterable_listener: FILTERABLE_LISTENER_TYPE
+    ) -> None:
         """Remove a listener of a specific event_type.
 
         This method must be run in the event loop.
         """
         try:
-            self._listeners[event_type].remove(listener)
+            self._listeners[event_type].remove(filterable_listener)
 
             # delete event_type list if empty
             if not self._listeners[event_type]:
@@ -678,7 +782,31 @@ class EventBus:
         except (KeyError, ValueError):
             # KeyError is key event_type listener did not exist
             # ValueError if listener did not exist within event_type
-            _LOGGER.warning("Unable to remove unknown listener %s", listener)
+            _LOGGER.warning(
+                "Unable to remove unknown listener %s", filterable_listener[0]
+            )
+
+    @callback
+    def _async_remove_entity_listener(
+        self, entity_ids: Iterable[str], filterable_listener: FILTERABLE_LISTENER_TYPE
+    ) -> None:
+        """Remove a listener of state changes of specific entities.
+
+        This method must be run in the event loop.
+        """
+        for entity_id in entity_ids:
+            try:
+                self._entity_listeners[entity_id].remove(filterable_listener)
+
+                if not self._entity_listeners[entity_id]:
+                    self._entity_listeners.pop(entity_id)
+            except (KeyError, ValueError):
+                _LOGGER.warning(
+                    "Unable to remove unknown listener %s", filterable_listener[0]
+                )
+                return
+
+        self._entity_listeners_count -= 1
 
 
 class State:
@@ -699,13 +827,14 @@ class State:
         "last_changed",
         "last_updated",
         "context",
+        "_as_dict",
     ]
 
     def __init__(
         self,
         entity_id: str,
         state: Any,
-        attributes: Optional[Dict] = None,
+        attributes: Optional[Mapping] = None,
         last_changed: Optional[datetime.datetime] = None,
         last_updated: Optional[datetime.datetime] = None,
         context: Optional[Context] = None,
@@ -734,10 +863,16 @@ class State:
 
         self.entity_id = entity_id.lower()
         self.state = state  # type: str
-        self.attributes = MappingProxyType(attributes or {})
+        # Attributes that are already read-only are shared, not wrapped again
+        self.attributes: MappingProxyType = (
+            attributes
+            if isinstance(attributes, MappingProxyType)
+            else MappingProxyType(attributes or {})
+        )
         self.last_updated = last_updated or dt_util.utcnow()
         self.last_changed = last_changed or self.last_updated
         self.context = context or Context()
+        self._as_dict: Optional[Mapping[str, Any]] = None
 
     @property
     def domain(self) -> str:
@@ -756,25 +891,32 @@ class State:
             "_", " "
         )
 
-    def as_dict(self) -> Dict:
-        """Return a dict representation of the State.
+    def as_dict(self) -> Mapping[str, Any]:
+        """Return a read-only dict representation of the State.
 
         Async friendly.
 
         To be used for JSON serialization.
         Ensures: state == State.from_dict(state.as_dict())
+
+        The representation is built on first use and shared by all callers,
+        so it is read-only. Copy it to make changes.
         """
-        return {
-            "entity_id": self.entity_id,
-            "state": self.state,
-            "attributes": dict(self.attributes),
-            "last_changed": self.last_changed,
-            "last_updated": self.last_updated,
-            "context": self.context.as_dict(),
-        }
+        if self._as_dict is None:
+            self._as_dict = MappingProxyType(
+                {
+                    "entity_id": self.entity_id,
+                    "state": self.state,
+                    "attributes": self.attributes,
+                    "last_changed": self.last_changed,
+                    "last_updated": self.last_updated,
+                    "context": MappingProxyType(self.context.as_dict()),
+                }
+            )
+        return self._as_dict
 
     @classmethod
-    def from_dict(cls, json_dict: Dict) -> Any:
+    def from_dict(cls, json_dict: Mapping[str, Any]) -> Any:
         """Initialize a state from a dict.
 
         Async friendly.
@@ -952,7 +1094,7 @@ class StateMachine:
         self,
         entity_id: str,
         new_state: Any,
-        attributes: Optional[Dict] = None,
+        attributes: Optional[Mapping] = None,
         force_update: bool = False,
         context: Optional[Context] = None,
     ) -> None:
@@ -975,9 +1117,13 @@ class StateMachine:
             last_changed = None
         else:
             same_state = old_state.state == new_state and not force_update
-            same_attr = old_state.attributes == MappingProxyType(attributes)
+            same_attr = old_state.attributes == attributes
             last_changed = old_state.last_changed if same_state else None
 
+            if same_attr:
+                # Share the unchanged attributes with the previous state
+                attributes = old_state.attributes
+
         if same_state and same_attr:
             return
 
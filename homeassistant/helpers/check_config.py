@@ -11,6 +11,7 @@ from homeassistant.config import (
     CONF_CORE,
     CORE_CONFIG_SCHEMA,
     CONF_PACKAGES,
+    CONFIG_CACHE_FILE,
     merge_packages_config,
     _format_config_error,
     find_config_file,
@@ -75,7 +76,9 @@ async def async_check_ha_config_file(hass: HomeAssistant) -> HomeAssistantConfig
         config_path = await hass.async_add_executor_job(find_config_file, config_dir)
         if not config_path:
             return result.add_error("File configuration.yaml not found.")
-        config = await hass.async_add_executor_job(load_yaml_config_file, config_path)
+        config = await hass.async_add_executor_job(
+            load_yaml_config_file, config_path, hass.config.path(CONFIG_CACHE_FILE)
+        )
     except FileNotFoundError:
         return result.add_error(f"File not found: {config_path}")
     except HomeAssistantError as err:
@@ -211,7 +211,7 @@ def async_numeric_state(
         variables = dict(variables or {})
         variables["state"] = entity
         try:
-            value = value_template.async_render(variables)
+            value = value_template.async_render_fast(variables)
         except TemplateError as ex:
             _LOGGER.error("Template error: %s", ex)
             return False
@@ -398,9 +398,17 @@ def async_template(
 ) -> bool:
     """Test if template condition matches."""
     try:
-        value = value_template.async_render(variables)
+        value = value_template.async_render_fast(variables)
     except TemplateError as ex:
-        _LOGGER.error("Error during template condition: %s", ex)
+        return async_template_result(ex)
+
+    return async_template_result(value)
+
+
+def async_template_result(value: Union[str, TemplateError]) -> bool:
+    """Test if a rendered template or its error matches."""
+    if isinstance(value, TemplateError):
+        _LOGGER.error("Error during template condition: %s", value)
         return False
 
     return value.lower() == "true"
@@ -6,6 +6,7 @@ from typing import Optional
 from homeassistant.const import DEVICE_DEFAULT_NAME
 from homeassistant.core import callback, valid_entity_id, split_entity_id
 from homeassistant.exceptions import HomeAssistantError, PlatformNotReady
+from homeassistant.startup_trace import CATEGORY_PLATFORM, async_span
 from homeassistant.util.async_ import run_callback_threadsafe, run_coroutine_threadsafe
 
 from .entity_registry import DISABLED_INTEGRATION
@@ -145,17 +146,20 @@ class EntityPlatform:
         )
 
         try:
-            task = async_create_setup_task()
+            # Platforms of an integration are set up concurrently, so every
+            # platform gets its own track
+            with async_span(hass, full_name, "setup", CATEGORY_PLATFORM):
+                task = async_create_setup_task()
 
-            await asyncio.wait_for(asyncio.shield(task), SLOW_SETUP_MAX_WAIT)
+                await asyncio.wait_for(asyncio.shield(task), SLOW_SETUP_MAX_WAIT)
 
-            # Block till all entities are done
-            if self._tasks:
-                pending = [task for task in self._tasks if not task.done()]
-                self._tasks.clear()
+                # Block till all entities are done
+                if self._tasks:
+                    pending = [task for task in self._tasks if not task.done()]
+                    self._tasks.clear()
 
-                if pending:
-                    await asyncio.wait(pending)
+                    if pending:
+                        await asyncio.wait(pending)
 
             hass.config.components.add(full_name)
             return True
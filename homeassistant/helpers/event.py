@@ -1,15 +1,21 @@
 """Helpers for listening to events."""
-from datetime import timedelta
+from collections import OrderedDict
+from datetime import datetime, timedelta
 import functools as ft
+import heapq
+import itertools
+import logging
 from typing import Callable
 
 import attr
 
+from homeassistant.exceptions import TemplateError
 from homeassistant.loader import bind_hass
 from homeassistant.helpers.sun import get_astral_event_next
-from homeassistant.core import HomeAssistant, callback, CALLBACK_TYPE
+from homeassistant.core import HomeAssistant, callback, split_entity_id, CALLBACK_TYPE
 from homeassistant.const import (
     ATTR_NOW,
+    EVENT_HOMEASSISTANT_STOP,
     EVENT_STATE_CHANGED,
     EVENT_TIME_CHANGED,
     MATCH_ALL,
@@ -26,6 +32,196 @@ from homeassistant.util.async_ import run_callback_threadsafe
 # PyLint does not like the use of threaded_listener_factory
 # pylint: disable=invalid-name
 
+_LOGGER = logging.getLogger(__name__)
+
+DATA_TIME_SCHEDULER = "event_time_scheduler"
+DATA_LIFECYCLE_LISTENERS = "event_lifecycle_listeners"
+
+# Point in time that is due on the first time check
+_FIRST_TICK = datetime.min.replace(tzinfo=dt_util.UTC)
+
+# Rebuild the heap once it holds more cancelled than active entries and
+# at least this many cancelled entries
+_MIN_COMPACT_SIZE = 64
+
+
+class TimeScheduler:
+    """Schedule actions at points in UTC time.
+
+    Scheduled points are kept in a heap. A single loop timer is armed for
+    the earliest point and each time_changed event only checks the top of
+    the heap, so trackers that are not due cost nothing per tick. Actions
+    that are due also run on time_changed events, which keeps firing
+    time_changed events to simulate time working.
+    """
+
+    def __init__(self, hass):
+        """Initialize the scheduler."""
+        self.hass = hass
+        self._heap = []
+        self._counter = itertools.count()
+        self._cancelled = 0
+        self._timer = None
+        self._timer_when = None
+        self._stopped = False
+        self._last_now = None
+        self._rollback_listeners = {}
+
+        hass.bus.async_listen(EVENT_TIME_CHANGED, self._async_time_changed)
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, self._async_stop)
+
+    def __len__(self):
+        """Return the number of scheduled actions."""
+        return len(self._heap) - self._cancelled
+
+    @callback
+    def async_schedule(self, point_in_time, action) -> CALLBACK_TYPE:
+        """Call action with the current time once point_in_time passed.
+
+        Returns a function that can be called to cancel the action.
+        """
+        entry = [point_in_time, next(self._counter), action]
+        heapq.heappush(self._heap, entry)
+
+        if self._heap[0] is entry:
+            self._async_arm_timer()
+
+        @callback
+        def cancel():
+            """Cancel the scheduled action."""
+            if entry[2] is None:
+                return
+            entry[2] = None
+            self._cancelled += 1
+            if self._cancelled > _MIN_COMPACT_SIZE and self._cancelled * 2 > len(
+                self._heap
+            ):
+                self._async_compact()
+
+        return cancel
+
+    @callback
+    def async_listen_rollback(self, listener) -> CALLBACK_TYPE:
+        """Call listener with the current time when time rolls back."""
+        self._rollback_listeners[listener] = None
+
+        @callback
+        def remove():
+            """Remove the listener."""
+            self._rollback_listeners.pop(listener, None)
+
+        return remove
+
+    @callback
+    def _async_compact(self):
+        """Drop cancelled entries from the heap."""
+        self._heap = [entry for entry in self._heap if entry[2] is not None]
+        heapq.heapify(self._heap)
+        self._cancelled = 0
+
+    @callback
+    def _async_pop_cancelled(self):
+        """Drop cancelled entries from the top of the heap."""
+        heap = self._heap
+        while heap and heap[0][2] is None:
+            heapq.heappop(heap)
+            self._cancelled -= 1
+
+    @callback
+    def _async_arm_timer(self):
+        """Arm the loop timer for the earliest point that lies ahead."""
+        self._async_pop_cancelled()
+
+        if self._stopped or not self._heap:
+            return
+
+        point_in_time = self._heap[0][0]
+
+        if self._timer is not None:
+            if self._timer_when == point_in_time:
+                return
+            self._timer.cancel()
+            self._timer = None
+
+        # Points that are already due wait for the next time check
+        delay = (point_in_time - dt_util.utcnow()).total_seconds()
+        if delay <= 0:
+            return
+
+        self._timer_when = point_in_time
+        self._timer = self.hass.loop.call_at(
+            self.hass.loop.time() + delay, self._async_timer_fired
+        )
+
+    @callback
+    def _async_timer_fired(self):
+        """Handle the loop timer."""
+        self._timer = None
+        self._async_run_due(dt_util.utcnow())
+
+    @callback
+    def _async_time_changed(self, event):
+        """Handle a time changed event."""
+        now = dt_util.as_utc(event.data[ATTR_NOW])
+
+        if self._last_now is not None and now < self._last_now:
+            for listener in list(self._rollback_listeners):
+                self._async_call(listener, now)
+
+        self._last_now = now
+
+        heap = self._heap
+        if heap and heap[0][0] <= now:
+            self._async_run_due(now)
+
+    @callback
+    def _async_run_due(self, now):
+        """Call the actions of all points that passed."""
+        heap = self._heap
+        due = []
+
+        while heap and heap[0][0] <= now:
+            entry = heapq.heappop(heap)
+            if entry[2] is None:
+                self._cancelled -= 1
+                continue
+            due.append(entry[2])
+            entry[2] = None
+
+        # Actions scheduled by these actions are handled on the next check
+        for action in due:
+            self._async_call(action, now)
+
+        self._async_arm_timer()
+
+    @staticmethod
+    @callback
+    def _async_call(action, now):
+        """Call an action, isolating errors from other actions."""
+        try:
+            action(now)
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Error running time tracker %s", action)
+
+    @callback
+    def _async_stop(self, _event):
+        """Stop arming the loop timer."""
+        self._stopped = True
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+
+@callback
+def async_get_time_scheduler(hass) -> TimeScheduler:
+    """Return the time scheduler of this Home Assistant instance."""
+    scheduler = hass.data.get(DATA_TIME_SCHEDULER)
+
+    if scheduler is None:
+        scheduler = hass.data[DATA_TIME_SCHEDULER] = TimeScheduler(hass)
+
+    return scheduler
+
 
 def threaded_listener_factory(async_factory):
     """Convert an async event helper to a threaded one."""
@@ -66,20 +262,9 @@ def async_track_state_change(hass, entity_ids, action, from_state=None, to_state
     match_from_state = _process_state_match(from_state)
     match_to_state = _process_state_match(to_state)
 
-    # Ensure it is a lowercase list with entity ids we want to match on
-    if entity_ids == MATCH_ALL:
-        pass
-    elif isinstance(entity_ids, str):
-        entity_ids = (entity_ids.lower(),)
-    else:
-        entity_ids = tuple(entity_id.lower() for entity_id in entity_ids)
-
     @callback
     def state_change_listener(event):
         """Handle specific state changes."""
-        if entity_ids != MATCH_ALL and event.data.get("entity_id") not in entity_ids:
-            return
-
         old_state = event.data.get("old_state")
         if old_state is not None:
             old_state = old_state.state
@@ -96,7 +281,14 @@ def async_track_state_change(hass, entity_ids, action, from_state=None, to_state
                 event.data.get("new_state"),
             )
 
-    return hass.bus.async_listen(EVENT_STATE_CHANGED, state_change_listener)
+    if entity_ids == MATCH_ALL:
+        return hass.bus.async_listen(EVENT_STATE_CHANGED, state_change_listener)
+
+    if isinstance(entity_ids, str):
+        entity_ids = (entity_ids,)
+
+    # The bus only dispatches state changes of these entities to the listener
+    return hass.bus.async_listen_entity_state(entity_ids, state_change_listener)
 
 
 track_state_change = threaded_listener_factory(async_track_state_change)
@@ -104,34 +296,342 @@ track_state_change = threaded_listener_factory(async_track_state_change)
 
 @callback
 @bind_hass
-def async_track_template(hass, template, action, variables=None):
-    """Add a listener that track state changes with template condition."""
+def async_track_template(hass, template, action, variables=None, rate_limit=None):
+    """Add a listener that track state changes with template condition.
+
+    With a rate_limit the condition is checked at most once per rate_limit.
+    """
     from . import condition
 
     # Local variable to keep track of if the action has already been triggered
     already_triggered = False
 
     @callback
-    def template_condition_listener(entity_id, from_s, to_s):
+    def template_condition_listener(event, result):
         """Check if condition is correct and run action."""
         nonlocal already_triggered
-        template_result = condition.async_template(hass, template, variables)
+        template_result = condition.async_template_result(result)
 
         # Check to see if template returns true
         if template_result and not already_triggered:
             already_triggered = True
-            hass.async_run_job(action, entity_id, from_s, to_s)
+            hass.async_run_job(
+                action,
+                event.data.get("entity_id"),
+                event.data.get("old_state"),
+                event.data.get("new_state"),
+            )
         elif not template_result:
             already_triggered = False
 
-    return async_track_state_change(
-        hass, template.extract_entities(variables), template_condition_listener
+    # Without states to track, the condition is checked on every state change
+    tracker = _TemplateRenderTracker(
+        hass, template, template_condition_listener, variables, rate_limit, True
     )
+    tracker.async_setup()
+    return tracker.async_remove
 
 
 track_template = threaded_listener_factory(async_track_template)
 
 
+@callback
+@bind_hass
+def async_track_template_result(
+    hass, template, action, variables=None, rate_limit=None
+):
+    """Re-render a template when the states it read change.
+
+    The template is rendered right away to collect the entities and domains
+    it accesses. It is rendered again when one of these entities changes or
+    when an entity of an iterated domain is added or removed, and action is
+    called with the state_changed event and the result. Failed renders pass
+    the TemplateError as result. The listeners are updated after every
+    render, so templates with conditions follow the states they currently
+    read.
+
+    With a rate_limit timedelta the template is rendered at most once per
+    rate_limit. State changes during that time are coalesced into a single
+    render once it has passed, which is passed the last of their events.
+    Trackers that are passed the same RateLimitedCall as rate_limit share
+    the limit, so together they render at most once per period.
+
+    Returns a function that can be called to stop tracking.
+    """
+    tracker = _TemplateRenderTracker(
+        hass, template, action, variables, rate_limit, False
+    )
+    tracker.async_setup()
+    return tracker.async_remove
+
+
+track_template_result = threaded_listener_factory(async_track_template_result)
+
+
+class _TemplateRenderTracker:
+    """Track the states read by the last render of a template."""
+
+    def __init__(
+        self, hass, template, action, variables, rate_limit, track_all_without_states
+    ):
+        """Initialize the tracker."""
+        self.hass = hass
+        self._template = template
+        self._action = action
+        self._variables = variables
+        self._refresh = self._async_refresh
+        self._rate_limited = None
+        if isinstance(rate_limit, RateLimitedCall):
+            self._rate_limited = rate_limit
+        elif rate_limit is not None:
+            self._rate_limited = RateLimitedCall(hass, rate_limit)
+        if self._rate_limited is not None:
+            self._refresh = ft.partial(
+                self._rate_limited.async_call_action, self._async_refresh
+            )
+        # Render templates that read no states on every state change
+        self._track_all_without_states = (
+            track_all_without_states and not template.is_static
+        )
+        # States read by the last render, None until the first render
+        self._entities = None
+        self._domains = None
+        self._all_states = None
+        self._unsub_entities = None
+        self._unsub_lifecycle = None
+
+    @callback
+    def async_setup(self):
+        """Render the template and listen to the states it read."""
+        self._async_render()
+
+    @callback
+    def async_remove(self):
+        """Stop tracking the template."""
+        self._async_unsubscribe()
+        if self._rate_limited is not None:
+            self._rate_limited.async_cancel_action(self._async_refresh)
+
+    @callback
+    def _async_render(self):
+        """Render the template and update the listeners."""
+        info = self._template.async_render_to_info(self._variables)
+        entities = info.entities
+        domains = info.domains
+        all_states = info.all_states
+
+        if (
+            entities != self._entities
+            or domains != self._domains
+            or all_states != self._all_states
+        ):
+            self._async_unsubscribe()
+            self._entities = entities
+            self._domains = domains
+            self._all_states = all_states
+            self._async_subscribe()
+
+        try:
+            return info.result
+        except TemplateError as ex:
+            return ex
+
+    @callback
+    def _async_subscribe(self):
+        """Listen to the states read by the last render."""
+        if self._entities:
+            self._unsub_entities = self.hass.bus.async_listen_entity_state(
+                self._entities, self._async_state_changed
+            )
+
+        if self._all_states or self._domains:
+            self._unsub_lifecycle = _async_listen_lifecycle(
+                self.hass,
+                (MATCH_ALL,) if self._all_states else self._domains,
+                self._async_lifecycle_changed,
+            )
+        elif not self._entities and self._track_all_without_states:
+            self._unsub_lifecycle = self.hass.bus.async_listen(
+                EVENT_STATE_CHANGED, self._async_state_changed
+            )
+
+    @callback
+    def _async_unsubscribe(self):
+        """Remove the listeners of the last render."""
+        if self._unsub_entities is not None:
+            self._unsub_entities()
+            self._unsub_entities = None
+
+        if self._unsub_lifecycle is not None:
+            self._unsub_lifecycle()
+            self._unsub_lifecycle = None
+
+    @callback
+    def _async_lifecycle_changed(self, event):
+        """Handle an entity of a read domain being added or removed."""
+        # Changes of accessed entities reach the entity listener
+        if event.data["entity_id"] not in self._entities:
+            self._async_state_changed(event)
+
+    @callback
+    def _async_state_changed(self, event):
+        """Handle a change of the states read by the template."""
+        self._refresh(event)
+
+    @callback
+    def _async_refresh(self, event):
+        """Render the template again and pass the result to the action."""
+        self.hass.async_run_job(self._action, event, self._async_render())
+
+
+class RateLimitedCall:
+    """Call actions at most once per period.
+
+    Calls are run together shortly after the first of them. Calls during
+    the period after that run are coalesced into a single run once the
+    period has passed. A run calls every action once, with the arguments
+    of its last call. Several callers can share one limit by passing their
+    own action to async_call_action. Those actions are told apart by
+    equality, so they need to be hashable. Actions called by an action
+    during a run are called in the same run.
+    """
+
+    def __init__(self, hass, period, action=None):
+        """Initialize the rate limited call."""
+        self.hass = hass
+        self._period = period
+        self._action = action
+        self._last_call = None
+        # Action, or None for the action of the limiter -> the action with
+        # the arguments of its last call
+        self._pending = OrderedDict()
+        self._running = False
+        self._unsub_run = None
+
+    @callback
+    def async_call(self, *args):
+        """Call the action now or once the period has passed."""
+        self._async_call(None, self._action, args)
+
+    @callback
+    def async_call_action(self, action, *args):
+        """Call an action now or once the period has passed."""
+        self._async_call(action, action, args)
+
+    @callback
+    def async_cancel(self):
+        """Cancel all pending calls."""
+        self._pending.clear()
+        self._async_cancel_run()
+
+    @callback
+    def async_cancel_action(self, action):
+        """Cancel a pending call of an action."""
+        self._pending.pop(action, None)
+        if not self._pending:
+            self._async_cancel_run()
+
+    @callback
+    def _async_call(self, key, action, args):
+        """Add a call to the next run and schedule that run."""
+        self._pending[key] = (action, args)
+
+        if self._running or self._unsub_run is not None:
+            return
+
+        if self._last_call is not None and dt_util.utcnow() < (
+            self._last_call + self._period
+        ):
+            self._async_schedule_trailing()
+            return
+
+        # Calls made meanwhile, like by other listeners of the same event,
+        # join the run
+        self._unsub_run = self.hass.loop.call_soon(self._async_run).cancel
+
+    @callback
+    def _async_schedule_trailing(self):
+        """Run the pending calls once the period has passed."""
+        self._unsub_run = async_track_point_in_utc_time(
+            self.hass, self._async_run, self._last_call + self._period
+        )
+
+    @callback
+    def _async_cancel_run(self):
+        """Cancel the scheduled run."""
+        if self._unsub_run is not None:
+            self._unsub_run()
+            self._unsub_run = None
+
+    @callback
+    def _async_run(self, _now=None):
+        """Run the pending actions with the arguments of their last call."""
+        self._unsub_run = None
+        self._last_call = dt_util.utcnow()
+        self._running = True
+        ran = set()
+
+        try:
+            while self._pending:
+                key = next(iter(self._pending))
+                # An action that calls itself again waits for the next period
+                if key in ran:
+                    break
+                action, args = self._pending.pop(key)
+                ran.add(key)
+                self.hass.async_run_job(action, *args)
+        finally:
+            self._running = False
+
+        if self._pending:
+            self._async_schedule_trailing()
+
+
+def _is_lifecycle_event(event):
+    """Return if a state_changed event adds or removes an entity."""
+    return event.data.get("old_state") is None or event.data.get("new_state") is None
+
+
+@callback
+def _async_listen_lifecycle(hass, domains, listener):
+    """Listen for entities of domains being added or removed.
+
+    All listeners share a single bus listener, so state changes of existing
+    entities only cost one filter call however many templates read domains.
+    MATCH_ALL as domain listens to entities of all domains.
+    """
+    listeners = hass.data.get(DATA_LIFECYCLE_LISTENERS)
+
+    if listeners is None:
+        listeners = hass.data[DATA_LIFECYCLE_LISTENERS] = {}
+
+        @callback
+        def lifecycle_dispatcher(event):
+            """Pass the event to the listeners of its domain."""
+            domain = split_entity_id(event.data["entity_id"])[0]
+            for domain_listener in tuple(listeners.get(domain, ())) + tuple(
+                listeners.get(MATCH_ALL, ())
+            ):
+                domain_listener(event)
+
+        hass.bus.async_listen(
+            EVENT_STATE_CHANGED, lifecycle_dispatcher, _is_lifecycle_event
+        )
+
+    for domain in domains:
+        listeners.setdefault(domain, []).append(listener)
+
+    @callback
+    def remove_listener():
+        """Remove the listener."""
+        for domain in domains:
+            listeners[domain].remove(listener)
+            if not listeners[domain]:
+                del listeners[domain]
+
+    return remove_listener
+
+
 @callback
 @bind_hass
 def async_track_same_state(
@@ -210,26 +710,13 @@ def async_track_point_in_utc_time(hass, action, point_in_time) -> CALLBACK_TYPE:
     point_in_time = dt_util.as_utc(point_in_time)
 
     @callback
-    def point_in_time_listener(event):
-        """Listen for matching time_changed events."""
-        now = event.data[ATTR_NOW]
-
-        if now < point_in_time or hasattr(point_in_time_listener, "run"):
-            return
-
-        # Set variable so that we will never run twice.
-        # Because the event bus might have to wait till a thread comes
-        # available to execute this listener it might occur that the
-        # listener gets lined up twice to be executed. This will make
-        # sure the second time it does nothing.
-        point_in_time_listener.run = True
-        async_unsub()
-
+    def point_in_time_listener(now):
+        """Run the action once point in time has passed."""
         hass.async_run_job(action, now)
 
-    async_unsub = hass.bus.async_listen(EVENT_TIME_CHANGED, point_in_time_listener)
-
-    return async_unsub
+    return async_get_time_scheduler(hass).async_schedule(
+        point_in_time, point_in_time_listener
+    )
 
 
 track_point_in_utc_time = threaded_listener_factory(async_track_point_in_utc_time)
@@ -392,31 +879,49 @@ def async_track_utc_time_change(
             localized_now, matching_seconds, matching_minutes, matching_hours
         )
 
-    # Make sure rolling back the clock doesn't prevent the timer from
-    # triggering.
-    last_now = None
+    scheduler = async_get_time_scheduler(hass)
+    cancel_next = None
 
     @callback
-    def pattern_time_change_listener(event):
-        """Listen for matching time_changed events."""
-        nonlocal next_time, last_now
-
-        now = event.data[ATTR_NOW]
+    def pattern_time_change_listener(now, rolled_back=False):
+        """Run the action if now matches and schedule the next match."""
+        nonlocal cancel_next
 
-        if last_now is None or now < last_now:
-            # Time rolled back or next time not yet calculated
+        if next_time is None or rolled_back:
+            # Next time not yet calculated or time rolled back
             calculate_next(now)
 
-        last_now = now
+        due = next_time <= now
+        if due:
+            calculate_next(now + timedelta(seconds=1))
 
-        if next_time <= now:
+        # Schedule the next match first, so an action that removes the
+        # listener also cancels it.
+        cancel_next = scheduler.async_schedule(
+            dt_util.as_utc(next_time), pattern_time_change_listener
+        )
+
+        if due:
             hass.async_run_job(action, dt_util.as_local(now) if local else now)
-            calculate_next(now + timedelta(seconds=1))
 
-    # We can't use async_track_point_in_utc_time here because it would
-    # break in the case that the system time abruptly jumps backwards.
-    # Our custom last_now logic takes care of resolving that scenario.
-    return hass.bus.async_listen(EVENT_TIME_CHANGED, pattern_time_change_listener)
+    @callback
+    def rollback_listener(now):
+        """Recalculate the next time when the time rolls back."""
+        cancel_next()
+        pattern_time_change_listener(now, True)
+
+    # The next time is calculated on the first time check. Make sure rolling
+    # back the clock doesn't prevent the timer from triggering.
+    cancel_next = scheduler.async_schedule(_FIRST_TICK, pattern_time_change_listener)
+    remove_rollback_listener = scheduler.async_listen_rollback(rollback_listener)
+
+    @callback
+    def remove_listener():
+        """Remove the pattern listener."""
+        cancel_next()
+        remove_rollback_listener()
+
+    return remove_listener
 
 
 track_utc_time_change = threaded_listener_factory(async_track_utc_time_change)
@@ -2,6 +2,7 @@
 from datetime import datetime
 import json
 import logging
+from types import MappingProxyType
 from typing import Any
 
 _LOGGER = logging.getLogger(__name__)
@@ -20,6 +21,8 @@ class JSONEncoder(json.JSONEncoder):
             return o.isoformat()
         if isinstance(o, set):
             return list(o)
+        if isinstance(o, MappingProxyType):
+            return dict(o)
         if hasattr(o, "as_dict"):
             return o.as_dict()
 
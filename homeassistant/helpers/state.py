@@ -20,7 +20,6 @@ from homeassistant.loader import bind_hass, async_get_integration, IntegrationNo
 import homeassistant.util.dt as dt_util
 from homeassistant.components.notify import ATTR_MESSAGE, SERVICE_NOTIFY
 from homeassistant.components.sun import STATE_ABOVE_HORIZON, STATE_BELOW_HORIZON
-from homeassistant.components.mysensors.switch import ATTR_IR_CODE, SERVICE_SEND_IR_CODE
 from homeassistant.components.cover import ATTR_POSITION, ATTR_TILT_POSITION
 from homeassistant.const import (
     ATTR_ENTITY_ID,
@@ -60,6 +59,11 @@ _LOGGER = logging.getLogger(__name__)
 
 GROUP_DOMAIN = "group"
 
+# Service of mysensors switches, not imported from mysensors as that would
+# import MQTT with it. The tests check that they match mysensors.
+ATTR_IR_CODE = "V_IR_SEND"
+SERVICE_SEND_IR_CODE = "mysensors_send_ir_code"
+
 # Update this dict of lists when new services are added to HA.
 # Each item is a service with a list of required attributes.
 SERVICE_ATTRIBUTES = {
@@ -1,16 +1,21 @@
 """Template helper methods for rendering strings with Home Assistant data."""
 import base64
+from collections import OrderedDict
 import json
 import logging
 import math
+import operator
 import random
 import re
+import sys
+import threading
 from datetime import datetime
 from functools import wraps
-from typing import Iterable
+from types import CodeType
+from typing import Any, FrozenSet, Iterable, Optional
 
 import jinja2
-from jinja2 import contextfilter, contextfunction
+from jinja2 import contextfilter, contextfunction, nodes
 from jinja2.sandbox import ImmutableSandboxedEnvironment
 from jinja2.utils import Namespace  # type: ignore
 
@@ -49,6 +54,9 @@ _RE_GET_ENTITIES = re.compile(
 )
 _RE_JINJA_DELIMITERS = re.compile(r"\{%|\{\{")
 
+# Maximum number of bytes of compiled template code kept in memory
+MAX_COMPILED_CACHE_SIZE = 8 * 1024 * 1024
+
 
 @bind_hass
 def attach(hass, obj):
@@ -135,6 +143,21 @@ class RenderInfo:
             or entity_id in self._entities
         )
 
+    @property
+    def entities(self) -> FrozenSet[str]:
+        """Entity ids of the states the template read."""
+        return frozenset(self._entities)
+
+    @property
+    def domains(self) -> FrozenSet[str]:
+        """Domains of which the template read all states."""
+        return frozenset(getattr(self, "_domains", ()))
+
+    @property
+    def all_states(self) -> bool:
+        """Return if the template read all states."""
+        return self._all_states
+
     @property
     def result(self) -> str:
         """Results of the template computation."""
@@ -155,6 +178,379 @@ class RenderInfo:
             self.filter_lifecycle = self._filter_lifecycle
 
 
+def _code_size(code: CodeType) -> int:
+    """Return the approximate number of bytes used by compiled code."""
+    size = sys.getsizeof(code) + sys.getsizeof(code.co_code)
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            size += _code_size(const)
+        else:
+            size += sys.getsizeof(const)
+    return size
+
+
+def _node_size(node: nodes.Node) -> int:
+    """Return the approximate number of bytes used by a parsed node."""
+    size = sys.getsizeof(node) + sys.getsizeof(vars(node))
+    for child in node.find_all(nodes.Node):
+        size += sys.getsizeof(child) + sys.getsizeof(vars(child))
+    return size
+
+
+class CompiledTemplateCache:
+    """Least recently used cache of compiled template code.
+
+    The code and the parsed expression of a template are keyed by the
+    template source and shared by all Template instances and environments,
+    so identical templates are only parsed and compiled once. Compiling may
+    happen in any thread.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        """Initialize the cache."""
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # source -> [code, expression, size], code and expression are None
+        # until they are needed
+        self._entries: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        """Return the number of cached templates."""
+        return len(self._entries)
+
+    def get(self, source: str) -> Optional[CodeType]:
+        """Return the compiled code of a source if cached."""
+        with self._lock:
+            return self._lookup(source, 0)
+
+    def compile(self, env: jinja2.Environment, source: str) -> CodeType:
+        """Return the compiled code of a source, compiling it if needed."""
+        with self._lock:
+            code = self._lookup(source, 0)
+            if code is not None:
+                self.hits += 1
+                return code
+            self.misses += 1
+
+        try:
+            code = env.compile(source)
+        except jinja2.exceptions.TemplateSyntaxError as err:
+            raise TemplateError(err)
+
+        self._store(source, 0, code, _code_size(code))
+        return code
+
+    def expression(self, env: jinja2.Environment, source: str) -> Any:
+        """Return the expression node of a source, parsing it if needed.
+
+        Returns False if the template is not made of a single expression.
+        """
+        with self._lock:
+            node = self._lookup(source, 1)
+            if node is not None:
+                self.hits += 1
+                return node
+            self.misses += 1
+
+        node = _parse_expression(env, source)
+        self._store(source, 1, node, _node_size(node) if node else 0)
+        return node
+
+    def _lookup(self, source: str, index: int) -> Any:
+        """Return a cached value of a source. Needs to hold the lock."""
+        entry = self._entries.get(source)
+        if entry is None:
+            return None
+        self._entries.move_to_end(source)
+        return entry[index]
+
+    def _store(self, source: str, index: int, value: Any, size: int) -> None:
+        """Cache a value of a source, evicting the least recently used."""
+        with self._lock:
+            entry = self._entries.get(source)
+            if entry is None:
+                size += sys.getsizeof(source)
+                if size > self.max_size:
+                    return
+                entry = self._entries[source] = [None, None, 0]
+            elif entry[index] is not None or entry[2] + size > self.max_size:
+                return
+
+            entry[index] = value
+            entry[2] += size
+            self.size += size
+
+            while self.size > self.max_size:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+
+    def clear(self) -> None:
+        """Remove all compiled templates."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+_COMPILED_CACHE = CompiledTemplateCache(MAX_COMPILED_CACHE_SIZE)
+
+
+def precompile(config: Any) -> int:
+    """Compile the templates found in a configuration into the cache.
+
+    Configuration validation finds the compiled code of the templates in
+    the cache instead of compiling them one by one in the event loop.
+    Strings that fail to compile are left to the validation to report.
+    Returns the number of compiled templates.
+
+    This method needs to run in an executor.
+    """
+    compiled = 0
+    search = [config]
+
+    while search:
+        value = search.pop()
+        if isinstance(value, dict):
+            search.extend(value.values())
+        elif isinstance(value, list):
+            search.extend(value)
+        elif isinstance(value, str) and _RE_JINJA_DELIMITERS.search(value):
+            try:
+                _COMPILED_CACHE.compile(_NO_HASS_ENV, value)
+            except TemplateError:
+                continue
+            compiled += 1
+
+    return compiled
+
+
+_COMPARE_OPERATORS = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "gt": operator.gt,
+    "gteq": operator.ge,
+    "lt": operator.lt,
+    "lteq": operator.le,
+    "in": lambda left, right: left in right,
+    "notin": lambda left, right: left not in right,
+}
+
+_BINARY_OPERATORS = {
+    nodes.Add: operator.add,
+    nodes.Sub: operator.sub,
+    nodes.Mul: operator.mul,
+    nodes.Div: operator.truediv,
+    nodes.FloorDiv: operator.floordiv,
+    nodes.Mod: operator.mod,
+}
+
+
+class _NotCompilable(Exception):
+    """The expression uses a construct that is evaluated by Jinja only."""
+
+
+def _parse_expression(env, source):
+    """Return the node of a template made of a single expression.
+
+    Returns False if the template has to be rendered by Jinja.
+    """
+    try:
+        tree = env.parse(source)
+    except jinja2.TemplateSyntaxError:
+        return False
+
+    if len(tree.body) != 1 or not isinstance(tree.body[0], nodes.Output):
+        return False
+
+    # Surrounding whitespace is stripped from the result
+    output = [
+        node
+        for node in tree.body[0].nodes
+        if not isinstance(node, nodes.TemplateData) or node.data.strip()
+    ]
+    if len(output) != 1 or isinstance(output[0], nodes.TemplateData):
+        return False
+
+    return output[0]
+
+
+def _compile_expression(env, source):
+    """Compile a template made of a single expression to Python.
+
+    Returns a tuple of a function that evaluates the expression with the
+    render variables and the names of the called functions, or False if
+    the template has to be rendered by Jinja. The function uses the
+    getattr, getitem, globals and filters of the environment, so it behaves
+    like the compiled template.
+    """
+    node = _COMPILED_CACHE.expression(env, source)
+    if not node:
+        return False
+
+    called_names = set()
+    try:
+        evaluate = _compile_node(env, node, called_names)
+    except _NotCompilable:
+        return False
+
+    return evaluate, frozenset(called_names)
+
+
+def _compile_node(env, node, called_names):
+    """Return a function that evaluates an expression node."""
+    # pylint: disable=too-many-return-statements
+    if isinstance(node, nodes.Const):
+        value = node.value
+        return lambda variables: value
+
+    if isinstance(node, (nodes.List, nodes.Tuple)):
+        items = [_compile_node(env, item, called_names) for item in node.items]
+        factory = list if isinstance(node, nodes.List) else tuple
+        return lambda variables: factory(item(variables) for item in items)
+
+    if isinstance(node, nodes.Name):
+        return _compile_name(env, node.name)
+
+    if isinstance(node, nodes.Getattr):
+        obj = _compile_node(env, node.node, called_names)
+        attr = node.attr
+        return lambda variables: env.getattr(obj(variables), attr)
+
+    if isinstance(node, nodes.Getitem):
+        if isinstance(node.arg, nodes.Slice):
+            raise _NotCompilable
+        obj = _compile_node(env, node.node, called_names)
+        arg = _compile_node(env, node.arg, called_names)
+        return lambda variables: env.getitem(obj(variables), arg(variables))
+
+    if isinstance(node, nodes.Call):
+        return _compile_call(env, node, called_names)
+
+    if isinstance(node, nodes.Filter):
+        return _compile_filter(env, node, called_names)
+
+    if isinstance(node, nodes.Compare):
+        return _compile_compare(env, node, called_names)
+
+    if isinstance(node, (nodes.And, nodes.Or)):
+        left = _compile_node(env, node.left, called_names)
+        right = _compile_node(env, node.right, called_names)
+        if isinstance(node, nodes.And):
+            return lambda variables: left(variables) and right(variables)
+        return lambda variables: left(variables) or right(variables)
+
+    if isinstance(node, nodes.Not):
+        operand = _compile_node(env, node.node, called_names)
+        return lambda variables: not operand(variables)
+
+    if isinstance(node, nodes.Neg):
+        operand = _compile_node(env, node.node, called_names)
+        return lambda variables: operator.neg(operand(variables))
+
+    binary_operator = _BINARY_OPERATORS.get(type(node))
+    if binary_operator is not None:
+        left = _compile_node(env, node.left, called_names)
+        right = _compile_node(env, node.right, called_names)
+        return lambda variables: binary_operator(left(variables), right(variables))
+
+    raise _NotCompilable
+
+
+def _compile_name(env, name):
+    """Return a function that looks a name up like the template context."""
+    global_value = env.globals.get(name, _SENTINEL)
+
+    def evaluate(variables):
+        """Return the value of a variable or global."""
+        if name in variables:
+            return variables[name]
+        if global_value is not _SENTINEL:
+            return global_value
+        return env.undefined(name=name)
+
+    return evaluate
+
+
+def _compile_args(env, node, called_names):
+    """Return the functions that evaluate the positional arguments."""
+    if node.kwargs or node.dyn_args is not None or node.dyn_kwargs is not None:
+        raise _NotCompilable
+    return [_compile_node(env, arg, called_names) for arg in node.args]
+
+
+def _compile_call(env, node, called_names):
+    """Return a function that calls a global function."""
+    if not isinstance(node.node, nodes.Name) or node.node.name not in env.globals:
+        raise _NotCompilable
+
+    func = env.globals[node.node.name]
+    args = _compile_args(env, node, called_names)
+
+    if not callable(func) or not env.is_safe_callable(func):
+        raise _NotCompilable
+
+    if getattr(func, "contextfunction", False):
+        # Functions depending on hass ignore the template context
+        if getattr(func, "__wrapped__", None) not in _HASS_FUNCTIONS:
+            raise _NotCompilable
+        args = [lambda variables: None] + args
+    elif getattr(func, "evalcontextfunction", False) or getattr(
+        func, "environmentfunction", False
+    ):
+        raise _NotCompilable
+
+    called_names.add(node.node.name)
+    return lambda variables: func(*[arg(variables) for arg in args])
+
+
+def _compile_filter(env, node, called_names):
+    """Return a function that applies a filter."""
+    func = env.filters.get(node.name)
+    if (
+        node.node is None
+        or func is None
+        or getattr(func, "contextfilter", False)
+        or getattr(func, "evalcontextfilter", False)
+        or getattr(func, "environmentfilter", False)
+    ):
+        raise _NotCompilable
+
+    value = _compile_node(env, node.node, called_names)
+    args = _compile_args(env, node, called_names)
+    return lambda variables: func(value(variables), *[arg(variables) for arg in args])
+
+
+def _compile_compare(env, node, called_names):
+    """Return a function that evaluates a chained comparison."""
+    expr = _compile_node(env, node.expr, called_names)
+    ops = []
+    for operand in node.ops:
+        if operand.op not in _COMPARE_OPERATORS:
+            raise _NotCompilable
+        ops.append(
+            (
+                _COMPARE_OPERATORS[operand.op],
+                _compile_node(env, operand.expr, called_names),
+            )
+        )
+
+    def evaluate(variables):
+        """Compare the operands like a Python comparison chain."""
+        left = expr(variables)
+        result = True
+        for compare, right in ops:
+            right_value = right(variables)
+            result = compare(left, right_value)
+            if not result:
+                return result
+            left = right_value
+        return result
+
+    return evaluate
+
+
 class Template:
     """Class to hold a template and manage caching and rendering."""
 
@@ -166,6 +562,8 @@ class Template:
         self.template = template
         self._compiled_code = None
         self._compiled = None
+        # Python evaluation of a simple expression, False if not possible
+        self._expression = None
         self.hass = hass
 
     @property
@@ -182,10 +580,12 @@ class Template:
         if self._compiled_code is not None:
             return
 
-        try:
-            self._compiled_code = self._env.compile(self.template)
-        except jinja2.exceptions.TemplateSyntaxError as err:
-            raise TemplateError(err)
+        self._compiled_code = _COMPILED_CACHE.compile(self._env, self.template)
+
+    @property
+    def is_static(self) -> bool:
+        """Return if the template renders to its own text."""
+        return _RE_JINJA_DELIMITERS.search(self.template) is None
 
     def extract_entities(self, variables=None):
         """Extract all entities for state_changed listener."""
@@ -216,6 +616,38 @@ class Template:
         except jinja2.TemplateError as err:
             raise TemplateError(err)
 
+    @callback
+    def async_render_fast(self, variables: TemplateVarsType = None, **kwargs) -> str:
+        """Render the template, evaluating simple expressions in Python.
+
+        Templates made of one expression of state lookups, comparisons,
+        arithmetic and boolean operators are evaluated without running the
+        compiled Jinja code. Other templates are rendered with Jinja.
+
+        This method must be run in the event loop.
+        """
+        if self.hass is None:
+            return self.async_render(variables, **kwargs)
+
+        if self._expression is None:
+            self._expression = _compile_expression(self._env, self.template)
+
+        if not self._expression:
+            return self.async_render(variables, **kwargs)
+
+        if variables is not None:
+            kwargs.update(variables)
+
+        evaluate, called_names = self._expression
+        # Variables replace the functions resolved at compile time
+        if kwargs and not called_names.isdisjoint(kwargs):
+            return self.async_render(kwargs)
+
+        try:
+            return str(evaluate(kwargs)).strip()
+        except jinja2.TemplateError as err:
+            raise TemplateError(err)
+
     @callback
     def async_render_to_info(
         self, variables: TemplateVarsType = None, **kwargs
@@ -984,3 +1416,14 @@ class TemplateEnvironment(ImmutableSandboxedEnvironment):
 
 
 _NO_HASS_ENV = TemplateEnvironment(None)
+
+# Functions that are passed hass instead of the template context
+_HASS_FUNCTIONS = {
+    expand,
+    closest,
+    closest_filter,
+    distance,
+    is_state,
+    is_state_attr,
+    state_attr,
+}
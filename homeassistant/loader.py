@@ -9,8 +9,10 @@ import functools as ft
 import importlib
 import json
 import logging
+import os
 import pathlib
 import sys
+import time
 from types import ModuleType
 from typing import (
     Optional,
@@ -25,6 +27,9 @@ from typing import (
     cast,
 )
 
+from homeassistant.const import __version__
+from homeassistant.startup_trace import CATEGORY_IMPORT, async_span
+
 # Typing imports that create a circular dependency
 # pylint: disable=using-constant-test,unused-import
 if TYPE_CHECKING:
@@ -39,6 +44,8 @@ _LOGGER = logging.getLogger(__name__)
 DATA_COMPONENTS = "components"
 DATA_INTEGRATIONS = "integrations"
 DATA_CUSTOM_COMPONENTS = "custom_components"
+DATA_MANIFEST_INDEX = "manifest_index"
+DATA_IMPORT_TIMES = "import_times"
 PACKAGE_CUSTOM_COMPONENTS = "custom_components"
 PACKAGE_BUILTIN = "homeassistant.components"
 LOOKUP_PATHS = [PACKAGE_CUSTOM_COMPONENTS, PACKAGE_BUILTIN]
@@ -50,6 +57,10 @@ CUSTOM_WARNING = (
 )
 _UNDEF = object()
 
+MANIFEST_INDEX_STORAGE_KEY = "core.manifest_index"
+MANIFEST_INDEX_STORAGE_VERSION = 1
+MANIFEST_INDEX_SAVE_DELAY = 10
+
 
 def manifest_from_legacy_module(domain: str, module: ModuleType) -> Dict:
     """Generate a manifest from a legacy module."""
@@ -72,27 +83,21 @@ async def _async_get_custom_components(
     except ImportError:
         return {}
 
-    def get_sub_directories(paths: List) -> List:
-        """Return all sub directories in a set of paths."""
+    index = await async_get_manifest_index(hass)
+
+    def resolve_sub_directories(paths: List) -> List:
+        """Resolve the integrations of all sub directories in a set of paths."""
         return [
-            entry
+            index.resolve(custom_components, entry.name)
             for path in paths
             for entry in pathlib.Path(path).iterdir()
             if entry.is_dir()
         ]
 
-    dirs = await hass.async_add_executor_job(
-        get_sub_directories, custom_components.__path__
-    )
-
-    integrations = await asyncio.gather(
-        *(
-            hass.async_add_executor_job(
-                Integration.resolve_from_root, hass, custom_components, comp.name
-            )
-            for comp in dirs
-        )
+    integrations = await hass.async_add_executor_job(
+        resolve_sub_directories, custom_components.__path__
     )
+    index.async_schedule_save()
 
     return {
         integration.domain: integration
@@ -201,6 +206,7 @@ class Integration:
         self.hass = hass
         self.pkg_path = pkg_path
         self.file_path = file_path
+        self.manifest = manifest
         self.name = manifest["name"]  # type: str
         self.domain = manifest["domain"]  # type: str
         self.dependencies = manifest["dependencies"]  # type: List[str]
@@ -220,7 +226,8 @@ class Integration:
         """Return the component."""
         cache = self.hass.data.setdefault(DATA_COMPONENTS, {})
         if self.domain not in cache:
-            cache[self.domain] = importlib.import_module(self.pkg_path)
+            with async_span(self.hass, self.domain, "import", CATEGORY_IMPORT):
+                cache[self.domain] = self._import(self.pkg_path)
         return cache[self.domain]  # type: ignore
 
     def get_platform(self, platform_name: str) -> ModuleType:
@@ -228,11 +235,25 @@ class Integration:
         cache = self.hass.data.setdefault(DATA_COMPONENTS, {})
         full_name = f"{self.domain}.{platform_name}"
         if full_name not in cache:
-            cache[full_name] = importlib.import_module(
-                f"{self.pkg_path}.{platform_name}"
-            )
+            with async_span(
+                self.hass, self.domain, f"import {full_name}", CATEGORY_IMPORT
+            ):
+                cache[full_name] = self._import(f"{self.pkg_path}.{platform_name}")
         return cache[full_name]  # type: ignore
 
+    def _import(self, path: str) -> ModuleType:
+        """Import a module and record how long it took.
+
+        The time includes the modules imported by the module itself, like
+        other integrations it imports from.
+        """
+        start = time.perf_counter()
+        module = importlib.import_module(path)
+        self.hass.data.setdefault(DATA_IMPORT_TIMES, {})[path] = (
+            time.perf_counter() - start
+        )
+        return module
+
     def __repr__(self) -> str:
         """Text representation of class."""
         return f"<Integration {self.domain}: {self.pkg_path}>"
@@ -276,9 +297,14 @@ async def async_get_integration(hass: "HomeAssistant", domain: str) -> Integrati
 
     from homeassistant import components
 
-    integration = await hass.async_add_executor_job(
-        Integration.resolve_from_root, hass, components, domain
-    )
+    index = await async_get_manifest_index(hass)
+    integration = index.lookup(components, domain)
+
+    if integration is None:
+        integration = await hass.async_add_executor_job(
+            index.resolve, components, domain
+        )
+        index.async_schedule_save()
 
     if integration is not None:
         cache[domain] = integration
@@ -300,6 +326,120 @@ async def async_get_integration(hass: "HomeAssistant", domain: str) -> Integrati
     return integration
 
 
+class ManifestIndex:
+    """Index of the manifests of the integrations that have been resolved.
+
+    The index is stored in a single file, so integrations are resolved without
+    reading their manifest.json. Manifests are invalidated when the modified
+    time of their manifest.json or the version of Home Assistant changes.
+    """
+
+    def __init__(self, hass: "HomeAssistant", store: Any, data: Dict) -> None:
+        """Initialize the manifest index."""
+        self.hass = hass
+        self._store = store
+        # Path of manifest.json -> [modified time, manifest]
+        self._manifests = data  # type: Dict[str, List]
+        self._unsaved = False
+
+    def lookup(self, root_module: ModuleType, domain: str) -> Optional[Integration]:
+        """Return an indexed integration of a root module."""
+        for base in root_module.__path__:  # type: ignore
+            manifest_path = pathlib.Path(base) / domain / "manifest.json"
+            entry = self._manifests.get(str(manifest_path))
+
+            if entry is not None:
+                return Integration(
+                    self.hass,
+                    f"{root_module.__name__}.{domain}",
+                    manifest_path.parent,
+                    entry[1],
+                )
+
+        return None
+
+    def resolve(self, root_module: ModuleType, domain: str) -> Optional[Integration]:
+        """Resolve an integration and add its manifest to the index.
+
+        This method reads from disk and should not be run in the event loop.
+        """
+        integration = self.lookup(root_module, domain)
+
+        if integration is not None:
+            return integration
+
+        integration = Integration.resolve_from_root(self.hass, root_module, domain)
+
+        if integration is not None:
+            manifest_path = integration.file_path / "manifest.json"
+            self._manifests[str(manifest_path)] = [
+                manifest_path.stat().st_mtime,
+                integration.manifest,
+            ]
+            self._unsaved = True
+
+        return integration
+
+    def async_schedule_save(self) -> None:
+        """Save the index if integrations were added."""
+        if self._unsaved:
+            self._unsaved = False
+            self._store.async_delay_save(self._data_to_save, MANIFEST_INDEX_SAVE_DELAY)
+
+    def _data_to_save(self) -> Dict:
+        """Return the data of the index to store."""
+        return {"ha_version": __version__, "manifests": dict(self._manifests)}
+
+
+async def async_get_manifest_index(hass: "HomeAssistant") -> ManifestIndex:
+    """Return the manifest index, loading it from disk the first time."""
+    index_or_evt = hass.data.get(DATA_MANIFEST_INDEX)
+
+    if isinstance(index_or_evt, asyncio.Event):
+        await index_or_evt.wait()
+        return cast(ManifestIndex, hass.data[DATA_MANIFEST_INDEX])
+
+    if index_or_evt is not None:
+        return cast(ManifestIndex, index_or_evt)
+
+    from homeassistant.helpers.storage import Store
+
+    evt = hass.data[DATA_MANIFEST_INDEX] = asyncio.Event()
+
+    store = Store(hass, MANIFEST_INDEX_STORAGE_VERSION, MANIFEST_INDEX_STORAGE_KEY)
+    data = cast(Optional[Dict[str, Any]], await store.async_load())
+
+    manifests = {}  # type: Dict[str, List]
+    if (
+        isinstance(data, dict)
+        and data.get("ha_version") == __version__
+        and isinstance(data.get("manifests"), dict)
+    ):
+        manifests = await hass.async_add_executor_job(
+            _unchanged_manifests, data["manifests"]
+        )
+
+    index = hass.data[DATA_MANIFEST_INDEX] = ManifestIndex(hass, store, manifests)
+    evt.set()
+    return index
+
+
+def _unchanged_manifests(manifests: Dict[str, Any]) -> Dict[str, List]:
+    """Return the manifests of which manifest.json has not been modified."""
+    unchanged = {}
+
+    for path, entry in manifests.items():
+        if not isinstance(entry, list) or len(entry) != 2:
+            continue
+        try:
+            if os.stat(path).st_mtime == entry[0]:
+                unchanged[path] = entry
+        except OSError:
+            pass
+
+    return unchanged
+
+
 class LoaderError(Exception):
     """Loader base error."""
 
@@ -2,13 +2,29 @@
 import argparse
 import asyncio
 from contextlib import suppress
-from datetime import datetime
+from datetime import datetime, timedelta
+import json
 import logging
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
 from timeit import default_timer as timer
+import tracemalloc
 from typing import Callable, Dict
 
 from homeassistant import core
-from homeassistant.const import ATTR_NOW, EVENT_STATE_CHANGED, EVENT_TIME_CHANGED
+from homeassistant.const import (
+    ATTR_NOW,
+    EVENT_HOMEASSISTANT_START,
+    EVENT_HOMEASSISTANT_STOP,
+    EVENT_STATE_CHANGED,
+    EVENT_TIME_CHANGED,
+)
+from homeassistant.helpers.template import Template
 from homeassistant.util import dt as dt_util
 
 
@@ -68,16 +84,53 @@ async def async_million_events(hass):
 
     hass.bus.async_listen(event_name, listener)
 
+    # Callback listeners run while firing, so include firing in the runtime
+    start = timer()
+
     for _ in range(10 ** 6):
         hass.bus.async_fire(event_name)
 
-    start = timer()
-
     await event.wait()
 
     return timer() - start
 
 
+@benchmark
+async def async_filtered_events(hass):
+    """Schedule 100k events with a growing fraction filtered out."""
+    event_name = "benchmark_event"
+    total = 0
+    hass.bus.inline_callbacks = False
+
+    @core.callback
+    def listener(_):
+        """Handle event."""
+
+    for filtered in range(5):
+        # Let the filter reject filtered/4 of the events
+        @core.callback
+        def event_filter(event, filtered=filtered):
+            """Filter events."""
+            return event.data["idx"] % 4 >= filtered
+
+        unsub = hass.bus.async_listen(event_name, listener, event_filter)
+
+        start = timer()
+
+        for idx in range(10 ** 5):
+            hass.bus.async_fire(event_name, {"idx": idx})
+
+        # Run the listeners that were scheduled with call_soon
+        await asyncio.sleep(0)
+
+        runtime = timer() - start
+        total += runtime
+        print(f"{filtered * 25}% of events filtered out done in {runtime}s")
+        unsub()
+
+    return total
+
+
 @benchmark
 async def async_million_time_changed_helper(hass):
     """Run a million events through time changed helper."""
@@ -94,13 +147,52 @@ async def async_million_time_changed_helper(hass):
             event.set()
 
     hass.helpers.event.async_track_time_change(listener, minute=0, second=0)
-    event_data = {ATTR_NOW: datetime(2017, 10, 10, 15, 0, 0, tzinfo=dt_util.UTC)}
+    now = datetime(2017, 10, 10, 15, 0, 0, tzinfo=dt_util.UTC)
 
-    for _ in range(10 ** 6):
-        hass.bus.async_fire(EVENT_TIME_CHANGED, event_data)
+    # Every hour matches the time pattern
+    start = timer()
+
+    for hour in range(10 ** 6):
+        hass.bus.async_fire(EVENT_TIME_CHANGED, {ATTR_NOW: now + timedelta(hours=hour)})
+
+    await event.wait()
+
+    return timer() - start
+
+
+@benchmark
+async def async_thousand_idle_time_trackers(hass):
+    """Run 10k time changed events with 1000 time trackers that are not due."""
+    count = 0
+    event = asyncio.Event()
+    now = datetime(2017, 10, 10, 15, 0, 0, tzinfo=dt_util.UTC)
+
+    @core.callback
+    def listener(_):
+        """Handle event."""
+        nonlocal count
+        count += 1
+
+        if count == 10 ** 4:
+            event.set()
+
+    @core.callback
+    def idle_listener(_):
+        """Handle a time tracker that is never due."""
+
+    for idx in range(1000):
+        hass.helpers.event.async_track_point_in_utc_time(
+            idle_listener, now + timedelta(days=1, seconds=idx)
+        )
+    hass.bus.async_listen(EVENT_TIME_CHANGED, listener)
 
     start = timer()
 
+    for second in range(10 ** 4):
+        hass.bus.async_fire(
+            EVENT_TIME_CHANGED, {ATTR_NOW: now + timedelta(seconds=second)}
+        )
+
     await event.wait()
 
     return timer() - start
@@ -139,6 +231,642 @@ async def async_million_state_changed_helper(hass):
     return timer() - start
 
 
+@benchmark
+async def async_thousand_trackers_one_entity(hass):
+    """Run 10k state changes of one entity with 1000 trackers registered."""
+    count = 0
+    entity_id = "light.kitchen"
+    event = asyncio.Event()
+
+    @core.callback
+    def listener(*args):
+        """Handle event."""
+        nonlocal count
+        count += 1
+
+        if count == 10 ** 4:
+            event.set()
+
+    @core.callback
+    def other_listener(*args):
+        """Handle event of an entity that does not change."""
+
+    for idx in range(999):
+        hass.helpers.event.async_track_state_change(
+            f"light.other_{idx}", other_listener
+        )
+    hass.helpers.event.async_track_state_change(entity_id, listener)
+
+    event_data = {
+        "entity_id": entity_id,
+        "old_state": core.State(entity_id, "off"),
+        "new_state": core.State(entity_id, "on"),
+    }
+
+    start = timer()
+
+    for _ in range(10 ** 4):
+        hass.bus.async_fire(EVENT_STATE_CHANGED, event_data)
+
+    await event.wait()
+
+    return timer() - start
+
+
+@benchmark
+async def async_template_domain_trackers(hass):
+    """Run 3k state changes with 500 templates reading the sensor domain."""
+    template_count = 500
+    sensor_ids = [f"sensor.benchmark_{idx}" for idx in range(100)]
+    entity_ids = [
+        f"{domain}.benchmark_{idx}"
+        for domain in ("light", "switch")
+        for idx in range(1500)
+    ]
+    renders = 0
+
+    @core.callback
+    def listener(event, result):
+        """Handle a render."""
+        nonlocal renders
+        renders += 1
+
+    for entity_id in sensor_ids + entity_ids:
+        hass.states.async_set(entity_id, "off")
+
+    for _ in range(template_count):
+        hass.helpers.event.async_track_template_result(
+            Template(
+                "{{ states.sensor | selectattr('state', 'eq', 'on') | list | count }}",
+                hass,
+            ),
+            listener,
+        )
+
+    start = timer()
+
+    for entity_id in entity_ids:
+        hass.states.async_set(entity_id, "on")
+
+    await hass.async_block_till_done()
+
+    runtime = timer() - start
+    print("Renders:", renders)
+
+    return runtime
+
+
+@benchmark
+async def template_condition_evaluations(hass):
+    """Evaluate 100k simple template conditions with Jinja and in Python."""
+    from homeassistant.helpers import condition
+
+    count = 10 ** 5
+    hass.states.async_set("sensor.power", "25.5", {"unit_of_measurement": "W"})
+    hass.states.async_set("light.kitchen", "on")
+    templates = [
+        Template("{{ states('sensor.power') | float > 20 }}", hass),
+        Template(
+            "{{ is_state('light.kitchen', 'on') and "
+            "state_attr('sensor.power', 'unit_of_measurement') == 'W' }}",
+            hass,
+        ),
+    ]
+
+    start = timer()
+    for idx in range(count):
+        condition.async_template_result(templates[idx % 2].async_render())
+    jinja_runtime = timer() - start
+
+    start = timer()
+    for idx in range(count):
+        condition.async_template(hass, templates[idx % 2])
+    runtime = timer() - start
+
+    print("Jinja evaluations per second:", round(count / jinja_runtime))
+    print("Evaluations per second:", round(count / runtime))
+
+    return runtime
+
+
+@benchmark
+async def async_state_memory(hass):
+    """Measure memory of 10k entities with 15 attributes and their updates."""
+    entity_count = 10 ** 4
+    entity_ids = [f"sensor.benchmark_{idx}" for idx in range(entity_count)]
+
+    def attributes(idx):
+        """Return attributes as entities write them, a new dict each time."""
+        attrs = {f"attribute_{num}": f"value_{num}" for num in range(14)}
+        attrs["friendly_name"] = f"Benchmark {idx}"
+        return attrs
+
+    tracemalloc.start()
+    blocks = sys.getallocatedblocks()
+    traced, _ = tracemalloc.get_traced_memory()
+    start = timer()
+
+    for idx, entity_id in enumerate(entity_ids):
+        hass.states.async_set(entity_id, 0, attributes(idx))
+
+    for state in range(1, 4):
+        for idx, entity_id in enumerate(entity_ids):
+            hass.states.async_set(entity_id, state, attributes(idx))
+
+    runtime = timer() - start
+    updates = entity_count * 4
+    print(
+        "Allocated blocks per async_set:", (sys.getallocatedblocks() - blocks) / updates
+    )
+    print(
+        "Traced bytes per entity:",
+        (tracemalloc.get_traced_memory()[0] - traced) / entity_count,
+    )
+    print("Max RSS in MB:", resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+    tracemalloc.stop()
+
+    return runtime
+
+
+@benchmark
+async def async_recorder_throughput(hass):
+    """Write 10k state changes to a SQLite recorder database."""
+    from homeassistant.components import recorder
+
+    entity_count = 100
+    event_count = 10 ** 4
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        hass.config.config_dir = tmpdir
+        instance = hass.data[recorder.DATA_INSTANCE] = recorder.Recorder(
+            hass,
+            keep_days=7,
+            purge_interval=0,
+            uri=f"sqlite:///{os.path.join(tmpdir, 'benchmark.db')}",
+            include={},
+            exclude={},
+            commit_interval=1,
+        )
+        instance.async_initialize()
+        instance.start()
+        await instance.async_db_ready
+        hass.bus.async_fire(EVENT_HOMEASSISTANT_START)
+
+        start = timer()
+
+        for idx in range(event_count):
+            hass.states.async_set(
+                f"sensor.benchmark_{idx % entity_count}", idx, {"unit": "W"}
+            )
+
+        await hass.async_add_executor_job(instance.block_till_done)
+
+        runtime = timer() - start
+        print("Events per second:", event_count / runtime)
+
+        hass.bus.async_fire(EVENT_HOMEASSISTANT_STOP)
+        await hass.async_add_executor_job(instance.join)
+
+    return runtime
+
+
+@benchmark
+async def recorder_attributes_migration(hass):
+    """Move the attributes of 1M recorded states to the state_attributes table."""
+    return await hass.async_add_executor_job(_recorder_attributes_migration)
+
+
+def _recorder_attributes_migration():
+    from sqlalchemy import create_engine
+    from homeassistant.components.recorder import migration, models
+
+    state_count = 10 ** 6
+    entity_count = 1000
+    chunk_size = 10 ** 5
+    now = dt_util.utcnow()
+    attributes = [
+        json.dumps(
+            {
+                "friendly_name": f"Benchmark {idx}",
+                "unit_of_measurement": "W",
+                "device_class": "power",
+                "icon": "mdi:flash",
+            }
+        )
+        for idx in range(entity_count)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, "benchmark.db")
+        engine = create_engine(f"sqlite:///{db_path}")
+        models.Base.metadata.create_all(engine)
+
+        # pylint: disable=no-member
+        for chunk_start in range(0, state_count, chunk_size):
+            engine.execute(
+                models.States.__table__.insert(),
+                [
+                    {
+                        "domain": "sensor",
+                        "entity_id": f"sensor.benchmark_{idx % entity_count}",
+                        "state": str(idx),
+                        "attributes": attributes[idx % entity_count],
+                        "last_changed": now,
+                        "last_updated": now,
+                    }
+                    for idx in range(chunk_start, chunk_start + chunk_size)
+                ],
+            )
+
+        print("Database size in MB:", os.path.getsize(db_path) / 2 ** 20)
+
+        start = timer()
+        # pylint: disable=protected-access
+        migration._migrate_state_attributes(engine)
+        runtime = timer() - start
+
+        engine.dispose()
+
+    return runtime
+
+
+@benchmark
+async def history_statistics_year(hass):
+    """Query 90 days of a sensor from a year of states and of statistics."""
+    from homeassistant.components import recorder
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        hass.config.config_dir = tmpdir
+        instance = hass.data[recorder.DATA_INSTANCE] = recorder.Recorder(
+            hass,
+            keep_days=365,
+            purge_interval=0,
+            uri=f"sqlite:///{os.path.join(tmpdir, 'benchmark.db')}",
+            include={},
+            exclude={},
+        )
+        return await hass.async_add_executor_job(
+            _history_statistics_year, hass, instance
+        )
+
+
+def _history_statistics_year(hass, instance):
+    from homeassistant.components import history
+    from homeassistant.components.recorder import models, statistics
+
+    entity_id = "sensor.benchmark"
+    # One year of a sensor updating every minute
+    state_count = 365 * 24 * 60
+    chunk_size = 10 ** 5
+    end = dt_util.utcnow().replace(second=0, microsecond=0)
+    year_ago = end - timedelta(days=365)
+    rollups = {}
+
+    # pylint: disable=protected-access, no-member
+    instance._setup_connection()
+    engine = instance.engine
+    attributes_id = engine.execute(
+        models.StateAttributes.__table__.insert(),
+        shared_attrs=json.dumps({"unit_of_measurement": "W"}),
+    ).inserted_primary_key[0]
+
+    for chunk_start in range(0, state_count, chunk_size):
+        rows = []
+        for idx in range(chunk_start, min(chunk_start + chunk_size, state_count)):
+            when = year_ago + timedelta(minutes=idx)
+            value = idx % 1000
+            rows.append(
+                {
+                    "domain": "sensor",
+                    "entity_id": entity_id,
+                    "state": str(value),
+                    "attributes_id": attributes_id,
+                    "last_changed": when,
+                    "last_updated": when,
+                }
+            )
+            for period in statistics.PERIODS:
+                rollups.setdefault(
+                    (period, statistics.period_start(when, period)), []
+                ).append(value)
+        engine.execute(models.States.__table__.insert(), rows)
+
+    engine.execute(
+        models.Statistics.__table__.insert(),
+        [
+            {
+                "entity_id": entity_id,
+                "period": period,
+                "start": start,
+                "count": len(values),
+                "mean": sum(values) / len(values),
+                "min": min(values),
+                "max": max(values),
+            }
+            for (period, start), values in rollups.items()
+        ],
+    )
+
+    start_time = end - timedelta(days=90)
+
+    start = timer()
+    states = history.get_significant_states(
+        hass, start_time, end, [entity_id], include_start_time_state=False
+    )
+    print("States query in seconds:", timer() - start)
+    print("States returned:", len(states[entity_id]))
+
+    start = timer()
+    result = history.get_statistics(hass, start_time, end, [entity_id])
+    runtime = timer() - start
+    print("Statistics query in seconds:", runtime)
+    print("Statistics returned:", len(result[entity_id]))
+
+    engine.dispose()
+
+    return runtime
+
+
+@benchmark
+async def bootstrap_slow_integrations(hass):
+    """Set up chains of integrations next to a slow integration."""
+    from types import ModuleType
+    from homeassistant import bootstrap, config_entries, loader
+
+    hass.config_entries = config_entries.ConfigEntries(hass, {})
+    integrations = hass.data[loader.DATA_INTEGRATIONS] = {}
+    components = hass.data[loader.DATA_COMPONENTS] = {}
+
+    def add_integration(domain, duration, after_dependencies=None):
+        """Add an integration that takes duration seconds to set up."""
+
+        async def async_setup(hass, config):
+            """Set up the integration."""
+            await asyncio.sleep(duration)
+            return True
+
+        integrations[domain] = loader.Integration(
+            hass,
+            f"homeassistant.components.{domain}",
+            None,
+            {
+                "domain": domain,
+                "name": domain,
+                "dependencies": [],
+                "after_dependencies": after_dependencies,
+                "requirements": [],
+            },
+        )
+        components[domain] = ModuleType(domain)
+        components[domain].async_setup = async_setup
+
+    for domain in bootstrap.CORE_INTEGRATIONS:
+        add_integration(domain, 0)
+
+    # The critical path is the slow integration, the chains take less time
+    add_integration("slow", 1)
+    for chain in range(3):
+        previous = None
+        for idx in range(4):
+            domain = f"chain_{chain}_{idx}"
+            add_integration(domain, 0.2, previous and [previous])
+            previous = domain
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        hass.config.config_dir = tmpdir
+        start = timer()
+        # pylint: disable=protected-access
+        await bootstrap._async_set_up_integrations(
+            hass, {domain: {} for domain in integrations}
+        )
+        return timer() - start
+
+
+@benchmark
+async def mqtt_retained_messages(hass):
+    """Receive 50k retained messages from a local broker."""
+    from homeassistant.components import mqtt
+
+    message_count = 5 * 10 ** 4
+    count = 0
+    event = asyncio.Event()
+
+    @core.callback
+    def message_received(msg):
+        """Handle a message."""
+        nonlocal count
+        count += 1
+
+        if count == message_count:
+            event.set()
+
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    broker = threading.Thread(
+        target=_mqtt_fake_broker, args=(server, message_count), daemon=True
+    )
+    broker.start()
+
+    client = mqtt.MQTT(
+        hass,
+        *server.getsockname(),
+        None,
+        60,
+        None,
+        None,
+        None,
+        None,
+        None,
+        None,
+        mqtt.PROTOCOL_311,
+        None,
+        None,
+        None,
+    )
+    assert await client.async_connect() == mqtt.CONNECTION_SUCCESS
+
+    start = timer()
+
+    await client.async_subscribe("benchmark/#", message_received, 0)
+    await event.wait()
+
+    runtime = timer() - start
+    print("Messages per second:", message_count / runtime)
+    print("Largest batch:", client.max_batch_size)
+
+    await client.async_disconnect()
+    broker.join()
+    server.close()
+
+    return runtime
+
+
+def _mqtt_fake_broker(server, message_count):
+    """Accept a single client and publish retained messages on subscribe."""
+    conn, _ = server.accept()
+
+    def read_packet():
+        """Return the type and the body of the next packet."""
+        header = conn.recv(1)
+        if not header:
+            return None, b""
+        packet_type = header[0] >> 4
+        length = shift = 0
+        while True:
+            byte = conn.recv(1)[0]
+            length += (byte & 0x7F) << shift
+            shift += 7
+            if byte < 0x80:
+                break
+        body = b""
+        while len(body) < length:
+            body += conn.recv(length - len(body))
+        return packet_type, body
+
+    def publish(topic, payload):
+        """Return a retained PUBLISH packet."""
+        topic = topic.encode()
+        body = len(topic).to_bytes(2, "big") + topic + payload
+        length = len(body)
+        header = bytearray([0x31])
+        while True:
+            byte, length = length & 0x7F, length >> 7
+            header.append(byte | 0x80 if length else byte)
+            if not length:
+                return bytes(header) + body
+
+    with conn:
+        while True:
+            packet_type, body = read_packet()
+
+            if packet_type == 1:  # CONNECT
+                conn.sendall(b"\x20\x02\x00\x00")
+            elif packet_type == 8:  # SUBSCRIBE
+                conn.sendall(b"\x90\x03" + body[:2] + b"\x00")
+                conn.sendall(
+                    b"".join(
+                        publish(f"benchmark/sensor_{idx % 1000}/state", b"21.5")
+                        for idx in range(message_count)
+                    )
+                )
+            elif packet_type == 12:  # PINGREQ
+                conn.sendall(b"\xd0\x00")
+            elif packet_type in (14, None):  # DISCONNECT
+                return
+
+
+@benchmark
+async def default_config_imports(hass):
+    """Import the integrations of default_config in a new interpreter."""
+    stdout = await hass.async_add_executor_job(
+        subprocess.check_output,
+        [
+            sys.executable,
+            "-c",
+            "from homeassistant.scripts.benchmark import _default_config_imports;"
+            "_default_config_imports()",
+        ],
+    )
+    result = json.loads(stdout)
+
+    print("Integrations imported:", ", ".join(result["integrations"]))
+    for path, duration in result["slowest"]:
+        print(f"Imported {path} in {duration:.3f}s")
+
+    return result["runtime"]
+
+
+def _default_config_imports():
+    from homeassistant import loader
+
+    loop = asyncio.get_event_loop()
+    hass = core.HomeAssistant(loop)
+
+    async def import_integrations(domain, imported):
+        """Import an integration and its dependencies like setup does."""
+        if domain in imported:
+            return
+        imported.add(domain)
+
+        integration = await loader.async_get_integration(hass, domain)
+        for dependency in integration.dependencies:
+            await import_integrations(dependency, imported)
+
+        with suppress(ImportError):
+            integration.get_component()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        hass.config.config_dir = tmpdir
+        start = timer()
+        loop.run_until_complete(import_integrations("default_config", set()))
+        runtime = timer() - start
+
+    import_times = hass.data.get(loader.DATA_IMPORT_TIMES, {})
+    print(
+        json.dumps(
+            {
+                "runtime": runtime,
+                "integrations": sorted(
+                    {
+                        module.split(".")[2]
+                        for module in sys.modules
+                        if module.startswith("homeassistant.components.")
+                    }
+                ),
+                "slowest": sorted(
+                    import_times.items(), key=lambda item: item[1], reverse=True
+                )[:10],
+            }
+        )
+    )
+
+
+@benchmark
+async def yaml_config_tree(hass):
+    """Load a configuration of 400 files, parsed and then from the cache."""
+    return await hass.async_add_executor_job(_yaml_config_tree)
+
+
+def _yaml_config_tree():
+    from homeassistant.util import yaml
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        config_path = os.path.join(tmpdir, "configuration.yaml")
+        cache_path = os.path.join(tmpdir, ".config_cache")
+
+        with open(config_path, "w") as fil:
+            fil.write("sensor: !include_dir_merge_named sensors\n")
+        with open(os.path.join(tmpdir, yaml.SECRET_YAML), "w") as fil:
+            fil.write("".join(f"password_{idx}: secret_{idx}\n" for idx in range(400)))
+
+        os.mkdir(os.path.join(tmpdir, "sensors"))
+        for idx in range(400):
+            with open(os.path.join(tmpdir, "sensors", f"{idx}.yaml"), "w") as fil:
+                for sensor in range(10):
+                    fil.write(
+                        f"sensor_{idx}_{sensor}:\n"
+                        "  platform: rest\n"
+                        f"  resource: http://192.168.1.{idx % 250}/{sensor}\n"
+                        f"  password: !secret password_{idx}\n"
+                        "  headers:\n"
+                        "    Accept: application/json\n"
+                        "  json_attributes:\n"
+                        "    - temperature\n"
+                        "    - humidity\n"
+                        "  value_template: '{{ value_json.state }}'\n"
+                    )
+
+        start = timer()
+        yaml.load_yaml_cached(config_path, cache_path)
+        print("Parsed and cached in", timer() - start)
+        yaml.clear_secret_cache()
+
+        start = timer()
+        yaml.load_yaml_cached(config_path, cache_path)
+        return timer() - start
+
+
 @benchmark
 @asyncio.coroutine
 def logbook_filtering_state(hass):
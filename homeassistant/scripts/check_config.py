@@ -24,6 +24,10 @@ _LOGGER = logging.getLogger(__name__)
 MOCKS = {
     "load": ("homeassistant.util.yaml.loader.load_yaml", yaml_loader.load_yaml),
     "load*": ("homeassistant.config.load_yaml", yaml_loader.load_yaml),
+    "load_cached": (
+        "homeassistant.config.load_yaml_cached",
+        yaml_loader.load_yaml_cached,
+    ),
     "secrets": ("homeassistant.util.yaml.loader.secret_yaml", yaml_loader.secret_yaml),
 }  # type: Dict[str, Tuple[str, Callable]]
 SILENCE = ("homeassistant.scripts.check_config.yaml_loader.clear_secret_cache",)
@@ -167,6 +171,11 @@ def check(config_dir, secrets=False):
         res["yaml_files"][filename] = True
         return MOCKS["load"][1](filename)
 
+    # pylint: disable=possibly-unused-variable
+    def mock_load_cached(filename, cache_path):
+        """Mock hass.util.load_yaml_cached to load every file without cache."""
+        return mock_load(filename)
+
     # pylint: disable=possibly-unused-variable
     def mock_secrets(ldr, node):
         """Mock _get_secrets."""
@@ -197,6 +206,7 @@ def check(config_dir, secrets=False):
     if secrets:
         # Ensure !secrets point to the patched function
         yaml_loader.yaml.SafeLoader.add_constructor("!secret", yaml_loader.secret_yaml)
+        yaml_loader.FastSafeLoader.add_constructor("!secret", yaml_loader.secret_yaml)
 
     try:
         hass = core.HomeAssistant()
@@ -225,6 +235,9 @@ def check(config_dir, secrets=False):
             yaml_loader.yaml.SafeLoader.add_constructor(
                 "!secret", yaml_loader.secret_yaml
             )
+            yaml_loader.FastSafeLoader.add_constructor(
+                "!secret", yaml_loader.secret_yaml
+            )
         bootstrap.clear_secret_cache()
 
     return res
@@ -10,6 +10,13 @@ from homeassistant import requirements, core, loader, config as conf_util
 from homeassistant.config import async_notify_setup_error
 from homeassistant.const import EVENT_COMPONENT_LOADED, PLATFORM_FORMAT
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.startup_trace import (
+    CATEGORY_CONFIG,
+    CATEGORY_DEPENDENCIES,
+    CATEGORY_REQUIREMENTS,
+    CATEGORY_SETUP,
+    async_span,
+)
 from homeassistant.util.async_ import run_coroutine_threadsafe
 
 
@@ -133,9 +140,10 @@ async def _async_setup_component(
         log_error(str(err))
         return False
 
-    processed_config = await conf_util.async_process_component_config(
-        hass, config, integration
-    )
+    with async_span(hass, domain, "config", CATEGORY_CONFIG):
+        processed_config = await conf_util.async_process_component_config(
+            hass, config, integration
+        )
 
     if processed_config is None:
         log_error("Invalid config.")
@@ -163,17 +171,18 @@ async def _async_setup_component(
         )
 
     try:
-        if hasattr(component, "async_setup"):
-            result = await component.async_setup(  # type: ignore
-                hass, processed_config
-            )
-        elif hasattr(component, "setup"):
-            result = await hass.async_add_executor_job(
-                component.setup, hass, processed_config  # type: ignore
-            )
-        else:
-            log_error("No setup function defined.")
-            return False
+        with async_span(hass, domain, "setup", CATEGORY_SETUP):
+            if hasattr(component, "async_setup"):
+                result = await component.async_setup(  # type: ignore
+                    hass, processed_config
+                )
+            elif hasattr(component, "setup"):
+                result = await hass.async_add_executor_job(
+                    component.setup, hass, processed_config  # type: ignore
+                )
+            else:
+                log_error("No setup function defined.")
+                return False
     except Exception:  # pylint: disable=broad-except
         _LOGGER.exception("Error during setup of component %s", domain)
         async_notify_setup_error(hass, domain, True)
@@ -196,7 +205,8 @@ async def _async_setup_component(
 
     if hass.config_entries:
         for entry in hass.config_entries.async_entries(domain):
-            await entry.async_setup(hass, integration=integration)
+            with async_span(hass, domain, f"setup entry {entry.title}", CATEGORY_SETUP):
+                await entry.async_setup(hass, integration=integration)
 
     hass.config.components.add(domain)
 
@@ -278,15 +288,23 @@ async def async_process_deps_reqs(
     elif integration.domain in processed:
         return
 
-    if integration.dependencies and not await _async_process_dependencies(
-        hass, config, integration.domain, integration.dependencies
-    ):
-        raise HomeAssistantError("Could not set up all dependencies.")
+    if integration.dependencies:
+        with async_span(
+            hass, integration.domain, "dependencies", CATEGORY_DEPENDENCIES
+        ):
+            dependencies_set_up = await _async_process_dependencies(
+                hass, config, integration.domain, integration.dependencies
+            )
+        if not dependencies_set_up:
+            raise HomeAssistantError("Could not set up all dependencies.")
 
     if not hass.config.skip_pip and integration.requirements:
-        await requirements.async_process_requirements(
-            hass, integration.domain, integration.requirements
-        )
+        with async_span(
+            hass, integration.domain, "requirements", CATEGORY_REQUIREMENTS
+        ):
+            await requirements.async_process_requirements(
+                hass, integration.domain, integration.requirements
+            )
 
     processed.add(integration.domain)
 
@@ -0,0 +1,269 @@
+"""Trace the startup of Home Assistant.
+
+The trace records a span for every phase of setting up an integration and
+flags the periods the event loop was blocked. It is written as a Chrome
+trace event file that can be opened in chrome://tracing or Perfetto.
+"""
+import asyncio
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+import logging
+import re
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Dict, Iterator, List, Optional, TYPE_CHECKING
+
+from homeassistant.util.json import save_json
+
+# Typing imports that create a circular dependency
+# pylint: disable=using-constant-test,unused-import
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant  # NOQA
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_STARTUP_TRACE = "startup_trace"
+
+STARTUP_TRACE_FILENAME = "startup_trace.json"
+
+CATEGORY_BOOTSTRAP = "bootstrap"
+CATEGORY_IMPORT = "import"
+CATEGORY_REQUIREMENTS = "requirements"
+CATEGORY_DEPENDENCIES = "dependencies"
+CATEGORY_CONFIG = "config"
+CATEGORY_SETUP = "setup"
+CATEGORY_PLATFORM = "platform"
+CATEGORY_BLOCKED = "blocked"
+
+TRACK_BOOTSTRAP = "bootstrap"
+TRACK_EVENT_LOOP = "event loop"
+
+# Event loop callbacks running longer than this are flagged, in seconds
+DEFAULT_BLOCK_THRESHOLD = 0.1
+
+# Number of innermost frames recorded of a blocked event loop
+BLOCKED_STACK_DEPTH = 10
+
+# Number of integrations listed in the summary
+SUMMARY_TOP = 5
+
+RE_INTEGRATION_PATH = re.compile(
+    r"(?:homeassistant[/\\]components|custom_components)[/\\](\w+)"
+)
+
+Span = namedtuple("Span", ["track", "name", "category", "start", "end", "args"])
+
+
+class StartupTrace:
+    """Record the phases of startup as spans on tracks.
+
+    Every integration and entity platform has its own track, so phases of
+    integrations and platforms that are set up concurrently don't overlap.
+    """
+
+    def __init__(self, block_threshold: float = DEFAULT_BLOCK_THRESHOLD) -> None:
+        """Initialize the trace."""
+        self.block_threshold = block_threshold
+        self.spans = []  # type: List[Span]
+        self.path = None  # type: Optional[str]
+        self._origin = time.perf_counter()
+        self._end = None  # type: Optional[float]
+        self._loop = None  # type: Optional[asyncio.AbstractEventLoop]
+        self._heartbeat = None  # type: Optional[asyncio.TimerHandle]
+        self._heartbeat_due = 0.0
+        # Stack of the event loop sampled while it was blocked
+        self._blocked_stack = None  # type: Optional[List[traceback.FrameSummary]]
+        self._stop_watchdog = threading.Event()
+
+    @contextmanager
+    def span(self, track: str, name: str, category: str, **args: Any) -> Iterator:
+        """Record the time spent in the context as a span."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append(
+                Span(track, name, category, start, time.perf_counter(), args)
+            )
+
+    def async_start_monitor(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Start flagging the periods the event loop is blocked.
+
+        A heartbeat on the event loop detects that it ran late, while a
+        watchdog thread samples the stack of the event loop at that time.
+        """
+        self._loop = loop
+        self._async_heartbeat()
+        threading.Thread(
+            target=self._watchdog,
+            args=(threading.get_ident(),),
+            name="StartupTraceWatchdog",
+            daemon=True,
+        ).start()
+
+    def async_stop_monitor(self) -> None:
+        """Stop monitoring the event loop and end the trace."""
+        self._end = time.perf_counter()
+        self._stop_watchdog.set()
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+
+    def _async_heartbeat(self) -> None:
+        """Flag the event loop as blocked if the heartbeat ran late."""
+        now = time.perf_counter()
+
+        if self._heartbeat is not None and now - self._heartbeat_due > (
+            self.block_threshold
+        ):
+            args = {}  # type: Dict[str, Any]
+            stack = self._blocked_stack
+            if stack is not None:
+                integration = _integration_from_stack(stack)
+                if integration is not None:
+                    args["integration"] = integration
+                args["stack"] = [
+                    f"{frame.filename}:{frame.lineno} {frame.name}"
+                    for frame in stack[-BLOCKED_STACK_DEPTH:]
+                ]
+            self.spans.append(
+                Span(
+                    TRACK_EVENT_LOOP,
+                    "blocked",
+                    CATEGORY_BLOCKED,
+                    self._heartbeat_due,
+                    now,
+                    args,
+                )
+            )
+
+        self._blocked_stack = None
+        interval = self.block_threshold / 2
+        self._heartbeat_due = now + interval
+        assert self._loop is not None
+        self._heartbeat = self._loop.call_later(interval, self._async_heartbeat)
+
+    def _watchdog(self, loop_thread: int) -> None:
+        """Sample the stack of the event loop while it is blocked."""
+        while not self._stop_watchdog.wait(self.block_threshold / 2):
+            if (
+                self._blocked_stack is not None
+                or time.perf_counter() - self._heartbeat_due < self.block_threshold
+            ):
+                continue
+
+            # pylint: disable=protected-access
+            frame = sys._current_frames().get(loop_thread)
+            if frame is not None:
+                self._blocked_stack = traceback.extract_stack(frame)
+
+    def as_trace_events(self) -> Dict[str, Any]:
+        """Return the trace in the Chrome trace event format."""
+        tracks = OrderedDict()  # type: Dict[str, int]
+        events = []
+
+        for span in self.spans:
+            tid = tracks.setdefault(span.track, len(tracks) + 1)
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": span.category,
+                    "ph": "X",
+                    "pid": 1,
+                    "tid": tid,
+                    "ts": round((span.start - self._origin) * 1e6),
+                    "dur": round((span.end - span.start) * 1e6),
+                    "args": span.args,
+                }
+            )
+
+        for track, tid in tracks.items():
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": 1,
+                    "tid": tid,
+                    "args": {"name": track},
+                }
+            )
+
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write(self, path: str) -> None:
+        """Write the trace to a file."""
+        save_json(path, self.as_trace_events())
+        self.path = path
+
+    def summary(self) -> Dict[str, Any]:
+        """Return where the time of startup went."""
+        totals = {}  # type: Dict[str, Dict[str, float]]
+        blocked = {}  # type: Dict[str, float]
+        blocked_total = 0.0
+        blocks = 0
+
+        for span in self.spans:
+            duration = span.end - span.start
+
+            if span.category == CATEGORY_BLOCKED:
+                blocks += 1
+                blocked_total += duration
+                integration = span.args.get("integration", "unknown")
+                blocked[integration] = blocked.get(integration, 0) + duration
+                continue
+
+            category = totals.setdefault(span.category, {})
+            category[span.track] = category.get(span.track, 0) + duration
+
+        end = self._end if self._end is not None else time.perf_counter()
+
+        return {
+            "duration": round(end - self._origin, 2),
+            "slowest_setup": _top(totals.get(CATEGORY_SETUP, {})),
+            "slowest_platform_setup": _top(totals.get(CATEGORY_PLATFORM, {})),
+            "slowest_import": _top(totals.get(CATEGORY_IMPORT, {})),
+            "slowest_requirements": _top(totals.get(CATEGORY_REQUIREMENTS, {})),
+            "event_loop_blocks": blocks,
+            "event_loop_blocked": round(blocked_total, 2),
+            "event_loop_blocked_by": _top(blocked),
+            "trace_file": self.path,
+        }
+
+
+@contextmanager
+def _no_span() -> Iterator:
+    """Do not record anything."""
+    yield
+
+
+def async_span(
+    hass: "HomeAssistant", track: str, name: str, category: str, **args: Any
+) -> Any:
+    """Record a span if the startup is traced."""
+    trace = hass.data.get(DATA_STARTUP_TRACE)
+
+    if trace is None:
+        return _no_span()
+
+    return trace.span(track, name, category, **args)
+
+
+def _integration_from_stack(stack: List[traceback.FrameSummary]) -> Optional[str]:
+    """Return the innermost integration of a stack."""
+    for frame in reversed(stack):
+        match = RE_INTEGRATION_PATH.search(frame.filename)
+        if match:
+            return match.group(1)
+    return None
+
+
+def _top(totals: Dict[str, float]) -> str:
+    """Format the tracks that took the most time."""
+    return ", ".join(
+        f"{track} ({duration:.2f}s)"
+        for track, duration in sorted(
+            totals.items(), key=lambda item: item[1], reverse=True
+        )[:SUMMARY_TOP]
+    )
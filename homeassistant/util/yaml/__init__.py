@@ -1,7 +1,7 @@
 """YAML utility functions."""
 from .const import SECRET_YAML, _SECRET_NAMESPACE
 from .dumper import dump, save_yaml
-from .loader import clear_secret_cache, load_yaml, secret_yaml
+from .loader import clear_secret_cache, load_yaml, load_yaml_cached, secret_yaml
 
 
 __all__ = [
@@ -11,5 +11,6 @@ __all__ = [
     "save_yaml",
     "clear_secret_cache",
     "load_yaml",
+    "load_yaml_cached",
     "secret_yaml",
 ]
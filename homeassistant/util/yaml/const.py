@@ -1,4 +1,7 @@
 """Constants."""
 SECRET_YAML = "secrets.yaml"
 
+# Version of the format of the cache of loaded YAML
+CACHE_VERSION = 1
+
 _SECRET_NAMESPACE = "homeassistant"
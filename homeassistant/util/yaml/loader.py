@@ -1,13 +1,24 @@
 """Custom loader."""
+import hashlib
 import logging
 import os
+import pathlib
+import pickle
 import sys
 import fnmatch
+import tempfile
+import threading
+import time
 from collections import OrderedDict
-from typing import Union, List, Dict, Iterator, overload, TypeVar
+from typing import Any, Union, List, Dict, Iterator, Optional, Tuple, overload, TypeVar
 
 import yaml
 
+try:
+    from yaml import CSafeLoader as FastestAvailableSafeLoader
+except ImportError:
+    from yaml import SafeLoader as FastestAvailableSafeLoader  # type: ignore
+
 try:
     import keyring
 except ImportError:
@@ -18,9 +29,10 @@ try:
 except ImportError:
     credstash = None
 
+from homeassistant.const import __version__
 from homeassistant.exceptions import HomeAssistantError
 
-from .const import _SECRET_NAMESPACE, SECRET_YAML
+from .const import _SECRET_NAMESPACE, CACHE_VERSION, SECRET_YAML
 from .objects import NodeListClass, NodeStrClass
 
 
@@ -32,6 +44,12 @@ __SECRET_CACHE = {}  # type: Dict[str, JSON_TYPE]
 JSON_TYPE = Union[List, Dict, str]  # pylint: disable=invalid-name
 DICT_T = TypeVar("DICT_T", bound=Dict)  # pylint: disable=invalid-name
 
+# The dependencies of the cached load running in a thread
+_RECORDING = threading.local()
+
+# A cache written by another version of Home Assistant or PyYAML is not used
+_CACHE_KEY = (CACHE_VERSION, __version__, yaml.__version__)
+
 
 def clear_secret_cache() -> None:
     """Clear the secret cache.
@@ -55,13 +73,107 @@ class SafeLineLoader(yaml.SafeLoader):
         return node
 
 
+class FastSafeLoader(FastestAvailableSafeLoader):
+    """The safe loader of libyaml if available, or else of PyYAML.
+
+    Unlike SafeLineLoader it doesn't annotate the nodes with their line, the
+    loaded objects get it from the marks of the nodes.
+    """
+
+    def __init__(self, stream: Any) -> None:
+        """Initialize the loader for a stream."""
+        super().__init__(stream)
+        # The parser of libyaml doesn't keep the name of the stream
+        self.name = getattr(stream, "name", "<file>")
+
+
+class _Dependencies:
+    """The files and values a load read, to tell if its result still holds."""
+
+    def __init__(self) -> None:
+        """Initialize the dependencies."""
+        # path -> (mtime, size) of loaded YAML files
+        self.files = {}  # type: Dict[str, Tuple[int, int]]
+        # path -> mtime of directories searched for YAML files
+        self.directories = {}  # type: Dict[str, int]
+        # path -> SHA-256 of secrets files, None if there was none
+        self.secrets = {}  # type: Dict[str, Optional[str]]
+        # name -> value of environment variables
+        self.env_vars = {}  # type: Dict[str, Optional[str]]
+        self.cacheable = True
+
+    def add_file(self, path: str) -> None:
+        """Add a YAML file."""
+        try:
+            self.files[path] = _file_stat(path)
+        except OSError:
+            self.cacheable = False
+
+    def add_directory(self, path: str) -> None:
+        """Add a directory that was searched for YAML files."""
+        try:
+            self.directories[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            self.cacheable = False
+
+    def add_secrets(self, path: str) -> None:
+        """Add a secrets file."""
+        if path not in self.secrets:
+            self.secrets[path] = _file_hash(path)
+
+    def add_env_var(self, name: str) -> None:
+        """Add an environment variable."""
+        self.env_vars[name] = os.getenv(name)
+
+    def unchanged(self) -> bool:
+        """Return if the dependencies are the same as when they were read."""
+        try:
+            return (
+                all(_file_stat(path) == stat for path, stat in self.files.items())
+                and all(
+                    os.stat(path).st_mtime_ns == mtime
+                    for path, mtime in self.directories.items()
+                )
+                and all(
+                    _file_hash(path) == digest for path, digest in self.secrets.items()
+                )
+                and all(
+                    os.getenv(name) == value for name, value in self.env_vars.items()
+                )
+            )
+        except OSError:
+            return False
+
+
+def _recording() -> Optional[_Dependencies]:
+    """Return the dependencies of the cached load running in this thread."""
+    return getattr(_RECORDING, "dependencies", None)
+
+
+def _file_stat(path: str) -> Tuple[int, int]:
+    """Return the modification time and size of a file."""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _file_hash(path: str) -> Optional[str]:
+    """Return the SHA-256 of a file, or None if it doesn't exist."""
+    try:
+        return hashlib.sha256(pathlib.Path(path).read_bytes()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
 def load_yaml(fname: str) -> JSON_TYPE:
     """Load a YAML file."""
     try:
         with open(fname, encoding="utf-8") as conf_file:
+            dependencies = _recording()
+            if dependencies is not None:
+                dependencies.add_file(fname)
             # If configuration file is empty YAML returns None
             # We convert that to an empty dict
-            return yaml.load(conf_file, Loader=SafeLineLoader) or OrderedDict()
+            return yaml.load(conf_file, Loader=FastSafeLoader) or OrderedDict()
     except yaml.YAMLError as exc:
         _LOGGER.error(str(exc))
         raise HomeAssistantError(exc)
@@ -70,6 +182,84 @@ def load_yaml(fname: str) -> JSON_TYPE:
         raise HomeAssistantError(exc)
 
 
+def load_yaml_cached(fname: str, cache_path: str) -> JSON_TYPE:
+    """Load a YAML file, or the result of loading it from a cache.
+
+    The cache holds the loaded YAML with everything it includes and the
+    secrets it uses, with the file and line info of the objects. It is
+    used as long as none of the files, directories, secrets files and
+    environment variables that were read changed. Loads that used secrets
+    of keyring or credstash, or logged an error, are not cached.
+    """
+    start = time.perf_counter()
+    data = _load_cache(cache_path, fname)
+
+    if data is not None:
+        _LOGGER.info(
+            "Loaded %s from cache in %.3f seconds", fname, time.perf_counter() - start
+        )
+        return data
+
+    dependencies = _RECORDING.dependencies = _Dependencies()
+    try:
+        data = load_yaml(fname)
+    finally:
+        del _RECORDING.dependencies
+
+    _LOGGER.info(
+        "Parsed %s from %d YAML files in %.3f seconds",
+        fname,
+        len(dependencies.files),
+        time.perf_counter() - start,
+    )
+
+    if dependencies.cacheable:
+        _save_cache(cache_path, fname, dependencies, data)
+
+    return data
+
+
+def _load_cache(cache_path: str, fname: str) -> Optional[JSON_TYPE]:
+    """Return the cached result of loading a YAML file if still valid."""
+    try:
+        with open(cache_path, "rb") as cache_file:
+            cache_key, cached_fname, dependencies = pickle.load(cache_file)
+            if (
+                cache_key != _CACHE_KEY
+                or cached_fname != fname
+                or not dependencies.unchanged()
+            ):
+                return None
+            return pickle.load(cache_file)
+    except FileNotFoundError:
+        return None
+    except Exception:  # pylint: disable=broad-except
+        _LOGGER.warning("Unable to read YAML cache %s", cache_path, exc_info=True)
+        return None
+
+
+def _save_cache(
+    cache_path: str, fname: str, dependencies: _Dependencies, data: JSON_TYPE
+) -> None:
+    """Cache the result of loading a YAML file."""
+    tmp_filename = ""
+    try:
+        # The file is created with mode 0o600, as it holds the secrets
+        with tempfile.NamedTemporaryFile(
+            dir=os.path.dirname(cache_path), delete=False
+        ) as cache_file:
+            tmp_filename = cache_file.name
+            pickle.dump(
+                (_CACHE_KEY, fname, dependencies), cache_file, pickle.HIGHEST_PROTOCOL
+            )
+            pickle.dump(data, cache_file, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_filename, cache_path)
+    except (OSError, pickle.PicklingError) as err:
+        _LOGGER.warning("Unable to write YAML cache %s: %s", cache_path, err)
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+
+
 # pylint: disable=pointless-statement
 @overload
 def _add_reference(
@@ -129,7 +319,10 @@ def _is_file_valid(name: str) -> bool:
 
 def _find_files(directory: str, pattern: str) -> Iterator[str]:
     """Recursively load files in a directory."""
+    dependencies = _recording()
     for root, dirs, files in os.walk(directory, topdown=True):
+        if dependencies is not None:
+            dependencies.add_directory(root)
         dirs[:] = [d for d in dirs if _is_file_valid(d)]
         for basename in sorted(files):
             if _is_file_valid(basename) and fnmatch.fnmatch(basename, pattern):
@@ -205,14 +398,18 @@ def _ordered_dict(loader: SafeLineLoader, node: yaml.nodes.MappingNode) -> Order
         try:
             hash(key)
         except TypeError:
-            fname = getattr(loader.stream, "name", "")
+            fname = loader.name
             raise yaml.MarkedYAMLError(
                 context=f'invalid key: "{key}"',
                 context_mark=yaml.Mark(fname, 0, line, -1, None, None),
             )
 
         if key in seen:
-            fname = getattr(loader.stream, "name", "")
+            fname = loader.name
+            dependencies = _recording()
+            if dependencies is not None:
+                # Keep logging the error on every load
+                dependencies.cacheable = False
             _LOGGER.error(
                 'YAML file %s contains duplicate key "%s". ' "Check lines %d and %d.",
                 fname,
@@ -235,6 +432,10 @@ def _env_var_yaml(loader: SafeLineLoader, node: yaml.nodes.Node) -> str:
     """Load environment variables and embed it into the configuration YAML."""
     args = node.value.split()
 
+    dependencies = _recording()
+    if dependencies is not None:
+        dependencies.add_env_var(args[0])
+
     # Check for a default value
     if len(args) > 1:
         return os.getenv(args[0], " ".join(args[1:]))
@@ -247,6 +448,11 @@ def _env_var_yaml(loader: SafeLineLoader, node: yaml.nodes.Node) -> str:
 def _load_secret_yaml(secret_path: str) -> JSON_TYPE:
     """Load the secrets yaml from path."""
     secret_path = os.path.join(secret_path, SECRET_YAML)
+
+    dependencies = _recording()
+    if dependencies is not None:
+        dependencies.add_secrets(secret_path)
+
     if secret_path in __SECRET_CACHE:
         return __SECRET_CACHE[secret_path]
 
@@ -292,6 +498,11 @@ def secret_yaml(loader: SafeLineLoader, node: yaml.nodes.Node) -> JSON_TYPE:
         if not os.path.exists(secret_path) or len(secret_path) < 5:
             break  # Somehow we got past the .homeassistant config folder
 
+    dependencies = _recording()
+    if dependencies is not None:
+        # Secrets of keyring and credstash are not written to the cache
+        dependencies.cacheable = False
+
     if keyring:
         # do some keyring stuff
         pwd = keyring.get_password(_SECRET_NAMESPACE, node.value)
@@ -317,18 +528,21 @@ def secret_yaml(loader: SafeLineLoader, node: yaml.nodes.Node) -> JSON_TYPE:
     raise HomeAssistantError(f"Secret {node.value} not defined")
 
 
-yaml.SafeLoader.add_constructor("!include", _include_yaml)
-yaml.SafeLoader.add_constructor(
-    yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG, _ordered_dict
-)
-yaml.SafeLoader.add_constructor(
-    yaml.resolver.BaseResolver.DEFAULT_SEQUENCE_TAG, _construct_seq
-)
-yaml.SafeLoader.add_constructor("!env_var", _env_var_yaml)
-yaml.SafeLoader.add_constructor("!secret", secret_yaml)
-yaml.SafeLoader.add_constructor("!include_dir_list", _include_dir_list_yaml)
-yaml.SafeLoader.add_constructor("!include_dir_merge_list", _include_dir_merge_list_yaml)
-yaml.SafeLoader.add_constructor("!include_dir_named", _include_dir_named_yaml)
-yaml.SafeLoader.add_constructor(
-    "!include_dir_merge_named", _include_dir_merge_named_yaml
-)
+for loader_class in (yaml.SafeLoader, FastSafeLoader):
+    loader_class.add_constructor("!include", _include_yaml)
+    loader_class.add_constructor(
+        yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG, _ordered_dict
+    )
+    loader_class.add_constructor(
+        yaml.resolver.BaseResolver.DEFAULT_SEQUENCE_TAG, _construct_seq
+    )
+    loader_class.add_constructor("!env_var", _env_var_yaml)
+    loader_class.add_constructor("!secret", secret_yaml)
+    loader_class.add_constructor("!include_dir_list", _include_dir_list_yaml)
+    loader_class.add_constructor(
+        "!include_dir_merge_list", _include_dir_merge_list_yaml
+    )
+    loader_class.add_constructor("!include_dir_named", _include_dir_named_yaml)
+    loader_class.add_constructor(
+        "!include_dir_merge_named", _include_dir_merge_named_yaml
+    )
@@ -110,6 +110,10 @@ def get_test_home_assistant():
     asyncio.set_event_loop(loop)
     hass = loop.run_until_complete(async_test_home_assistant(loop))
 
+    # Storage is not mocked here, keep the manifest index out of the
+    # shared testing config.
+    hass.data[loader.DATA_MANIFEST_INDEX] = loader.ManifestIndex(hass, Mock(), {})
+
     stop_event = threading.Event()
 
     def run_loop():
@@ -809,7 +813,7 @@ def mock_restore_cache(hass, states):
 
     last_states = {}
     for state in states:
-        restored_state = state.as_dict()
+        restored_state = dict(state.as_dict())
         restored_state["attributes"] = json.loads(
             json.dumps(restored_state["attributes"], cls=JSONEncoder)
         )
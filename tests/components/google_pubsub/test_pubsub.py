@@ -1,5 +1,6 @@
 """The tests for the Google Pub/Sub component."""
 from datetime import datetime
+from types import MappingProxyType
 
 from homeassistant.components.google_pubsub import DateTimeJSONEncoder as victim
 
@@ -19,3 +20,7 @@ class TestDateTimeJSONEncoder(object):
     def test_nested(self):
         """Test dictionary encoding."""
         assert victim().encode({"foo": "bar"}) == '{"foo": "bar"}'
+
+    def test_read_only_dict(self):
+        """Test read-only dictionary encoding."""
+        assert victim().encode(MappingProxyType({"foo": "bar"})) == '{"foo": "bar"}'
@@ -4,10 +4,14 @@ from datetime import timedelta
 import unittest
 from unittest.mock import patch, sentinel
 
+import aiohttp
+import pytest
+
 from homeassistant.setup import setup_component, async_setup_component
 import homeassistant.core as ha
 import homeassistant.util.dt as dt_util
 from homeassistant.components import history, recorder
+from homeassistant.components.recorder.models import Statistics
 
 from tests.common import (
     init_recorder_component,
@@ -196,6 +200,115 @@ class TestComponentHistory(unittest.TestCase):
         )
         assert states == hist
 
+    def test_get_significant_states_are_lazy(self):
+        """Test attributes are only decoded when used."""
+        zero, four, states = self.record_states()
+        hist = history.get_significant_states(
+            self.hass, zero, four, filters=history.Filters()
+        )
+
+        state = hist["thermostat.test"][-1]
+        assert isinstance(state, history.LazyState)
+        assert state._attributes is None
+        assert state.attributes == states["thermostat.test"][-1].attributes
+        assert state.as_dict() == states["thermostat.test"][-1].as_dict()
+
+    def test_get_significant_states_no_attributes(self):
+        """Test states without attributes are returned if not wanted."""
+        zero, four, states = self.record_states()
+        hist = history.get_significant_states(
+            self.hass, zero, four, filters=history.Filters(), no_attributes=True
+        )
+
+        assert set(hist) == set(states)
+        for entity_id, entity_states in states.items():
+            assert [state.state for state in hist[entity_id]] == [
+                state.state for state in entity_states
+            ]
+            assert all(not state.attributes for state in hist[entity_id])
+
+    def test_get_significant_states_only(self):
+        """Test attribute changes are left out with significant_changes_only."""
+        zero, four, states = self.record_states()
+        # The last thermostat.test state only changes an attribute
+        del states["thermostat.test"][-1]
+        hist = history.get_significant_states(
+            self.hass,
+            zero,
+            four,
+            filters=history.Filters(),
+            significant_changes_only=True,
+        )
+
+        assert states == hist
+
+    def test_stream_significant_states(self):
+        """Test the states are streamed one entity at a time in order."""
+        zero, four, states = self.record_states()
+        stream = history.stream_significant_states(
+            self.hass,
+            zero,
+            four,
+            filters=history.Filters(),
+            entity_order=["thermostat.test2", "light.not_recorded"],
+        )
+
+        first = next(stream)
+        assert first == states["thermostat.test2"]
+        rest = list(stream)
+        assert rest == [
+            states[entity_id]
+            for entity_id in sorted(states)
+            if entity_id != "thermostat.test2"
+        ]
+
+    def test_get_statistics(self):
+        """Test statistics are returned at the resolution of the range."""
+        self.init_recorder()
+        start = dt_util.utcnow() - timedelta(days=30)
+        last_day = start + timedelta(days=29)
+        end = start + timedelta(days=30)
+
+        with recorder.session_scope(hass=self.hass) as session:
+            for period in (300, 3600):
+                for row_start in (start, last_day):
+                    session.add(
+                        Statistics(
+                            entity_id="sensor.power",
+                            period=period,
+                            start=row_start,
+                            count=1,
+                            mean=period,
+                            min=period - 1,
+                            max=period + 1,
+                        )
+                    )
+
+        entity_ids = ["sensor.power", "sensor.other"]
+        assert history.get_statistics(self.hass, last_day, end, entity_ids) == {
+            "sensor.power": [{"start": last_day, "mean": 300, "min": 299, "max": 301}]
+        }
+        assert history.get_statistics(self.hass, start, end, entity_ids) == {
+            "sensor.power": [
+                {"start": start, "mean": 3600, "min": 3599, "max": 3601},
+                {"start": last_day, "mean": 3600, "min": 3599, "max": 3601},
+            ]
+        }
+        # The 5 minute statistics of the range may have been purged
+        with patch.object(self.hass.data[recorder.DATA_INSTANCE], "keep_days", 1):
+            assert history.get_statistics(self.hass, last_day, end, entity_ids) == {
+                "sensor.power": [
+                    {"start": last_day, "mean": 3600, "min": 3599, "max": 3601}
+                ]
+            }
+        assert history.get_statistics(
+            self.hass, last_day, end, entity_ids, period=3600
+        ) == {
+            "sensor.power": [
+                {"start": last_day, "mean": 3600, "min": 3599, "max": 3601}
+            ]
+        }
+
     def test_get_significant_states_with_initial(self):
         """Test that only significant states are returned.
 
@@ -650,3 +763,149 @@ async def test_fetch_period_api_with_include_order(hass, hass_client):
         params={"filter_entity_id": "non.existing,something.else"},
     )
     assert response.status == 200
+
+
+async def test_fetch_period_api_include_order(hass, hass_client):
+    """Test the included entities come first with use_include_order."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(
+        hass,
+        "history",
+        {
+            "history": {
+                "use_include_order": True,
+                "include": {"entities": ["light.living_room"], "domains": ["light"]},
+            }
+        },
+    )
+    for entity_id in ("light.kitchen", "light.living_room", "switch.kitchen"):
+        hass.states.async_set(entity_id, "on")
+    await hass.async_block_till_done()
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    client = await hass_client()
+    response = await client.get(
+        "/api/history/period/{}".format(
+            (dt_util.utcnow() - timedelta(hours=1)).isoformat()
+        )
+    )
+    assert response.status == 200
+    result = await response.json()
+    assert [states[0]["entity_id"] for states in result] == [
+        "light.living_room",
+        "light.kitchen",
+    ]
+
+
+async def test_fetch_period_api_no_attributes(hass, hass_client):
+    """Test the fetch period view for history without attributes."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    hass.states.async_set("light.kitchen", "on", {"brightness": 100})
+    await hass.async_block_till_done()
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    client = await hass_client()
+    response = await client.get(
+        "/api/history/period/{}".format(
+            (dt_util.utcnow() - timedelta(hours=1)).isoformat()
+        ),
+        params={"filter_entity_id": "light.kitchen", "no_attributes": ""},
+    )
+    assert response.status == 200
+    result = await response.json()
+    assert len(result) == 1
+    assert result[0][0]["state"] == "on"
+    assert result[0][0]["attributes"] == {}
+
+
+async def test_fetch_period_api_minimal_response(hass, hass_client):
+    """Test the fetch period view for history with a minimal response."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    for state in ("on", "off", "on"):
+        hass.states.async_set("light.kitchen", state, {"brightness": 100})
+        await hass.async_block_till_done()
+        await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    client = await hass_client()
+    response = await client.get(
+        "/api/history/period/{}".format(
+            (dt_util.utcnow() - timedelta(hours=1)).isoformat()
+        ),
+        params={"filter_entity_id": "light.kitchen", "minimal_response": ""},
+    )
+    assert response.status == 200
+    assert response.headers["Transfer-Encoding"] == "chunked"
+    result = await response.json()
+    assert len(result) == 1
+    first, middle, last = result[0]
+    assert first["attributes"] == {"brightness": 100}
+    assert middle == {"state": "off", "last_changed": middle["last_changed"]}
+    assert last["entity_id"] == "light.kitchen"
+    assert last["state"] == "on"
+
+
+@pytest.mark.parametrize("failing_entity", [0, 1])
+async def test_fetch_period_api_serialize_error(hass, hass_client, failing_entity):
+    """Test a state that can't be serialized fails or aborts the response."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    hass.states.async_set("light.kitchen", "on")
+    hass.states.async_set("light.living_room", "on")
+    await hass.async_block_till_done()
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    client = await hass_client()
+    encode_states = history._encode_states
+    calls = 0
+
+    def failing_encode_states(state_list, minimal_response):
+        """Fail to encode one of the entities."""
+        nonlocal calls
+        calls += 1
+        if calls > failing_entity:
+            raise ValueError("Not serializable")
+        return encode_states(state_list, minimal_response)
+
+    with patch(
+        "homeassistant.components.history._encode_states",
+        side_effect=failing_encode_states,
+    ):
+        response = await client.get(
+            "/api/history/period/{}".format(
+                (dt_util.utcnow() - timedelta(hours=1)).isoformat()
+            ),
+            params={"filter_entity_id": "light.kitchen,light.living_room"},
+        )
+
+        if failing_entity == 0:
+            assert response.status == 500
+        else:
+            assert response.status == 200
+            with pytest.raises(aiohttp.ClientPayloadError):
+                await response.read()
+
+
+async def test_fetch_statistics_api(hass, hass_client):
+    """Test the statistics view for history."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    hass.states.async_set("sensor.power", "10", {"unit_of_measurement": "W"})
+    await hass.async_block_till_done()
+    await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    client = await hass_client()
+    url = "/api/history/statistics/{}".format(
+        (dt_util.utcnow() - timedelta(hours=1)).isoformat()
+    )
+
+    response = await client.get(url, params={"filter_entity_id": "sensor.power"})
+    assert response.status == 200
+    result = await response.json()
+    assert [
+        (row["mean"], row["min"], row["max"]) for row in result["sensor.power"]
+    ] == [(10, 10, 10)]
+
+    response = await client.get(url)
+    assert response.status == 400
+
+    response = await client.get(
+        url, params={"filter_entity_id": "sensor.power", "period": "week"}
+    )
+    assert response.status == 400
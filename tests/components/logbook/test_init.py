@@ -3,6 +3,7 @@
 import logging
 from datetime import timedelta, datetime
 import unittest
+from unittest.mock import patch
 
 import pytest
 import voluptuous as vol
@@ -34,6 +35,9 @@ from homeassistant.components.homekit.const import (
 )
 from homeassistant.setup import setup_component, async_setup_component
 
+from homeassistant.components.recorder.models import States
+from homeassistant.components.recorder.util import session_scope
+
 from tests.common import init_recorder_component, get_test_home_assistant
 
 
@@ -102,6 +106,32 @@ class TestComponentLogbook(unittest.TestCase):
         assert "switch" == last_call.data.get(logbook.ATTR_DOMAIN)
         assert "switch.test_switch" == last_call.data.get(logbook.ATTR_ENTITY_ID)
 
+    def test_get_events_from_states(self):
+        """Test only changed states of existing entities are returned."""
+        self.hass.states.set("light.kitchen", STATE_OFF)
+        self.hass.states.set("light.kitchen", STATE_ON)
+        self.hass.states.set("light.kitchen", STATE_ON, {"brightness": 100})
+        self.hass.states.set("sensor.power", "10", {"unit_of_measurement": "W"})
+        self.hass.states.set("sensor.power", "20", {"unit_of_measurement": "W"})
+        self.hass.states.set("light.hidden", STATE_OFF, {ATTR_HIDDEN: True})
+        self.hass.states.set("light.hidden", STATE_ON, {ATTR_HIDDEN: True})
+        self.hass.states.remove("light.kitchen")
+        self.hass.block_till_done()
+        self.hass.data[recorder.DATA_INSTANCE].block_till_done()
+
+        entries = logbook._get_events(
+            self.hass,
+            {},
+            dt_util.utcnow() - timedelta(hours=1),
+            dt_util.utcnow() + timedelta(hours=1),
+        )
+
+        assert [
+            (entry["entity_id"], entry["message"])
+            for entry in entries
+            if "entity_id" in entry
+        ] == [("light.kitchen", "turned on")]
+
     def test_service_call_create_log_book_entry_no_message(self):
         """Test if service call create log book entry without message."""
         calls = []
@@ -1487,3 +1517,83 @@ async def test_humanify_script_started_event(hass):
     assert event2["domain"] == "script"
     assert event2["message"] == "started"
     assert event2["entity_id"] == "script.bye"
+
+
+async def test_logbook_view_paging(hass, hass_client):
+    """Test the logbook view returns pages of entries."""
+    await hass.async_add_job(init_recorder_component, hass)
+    await async_setup_component(hass, "logbook", {})
+    start = dt_util.as_utc(dt_util.start_of_local_day()) + timedelta(hours=1)
+
+    async def set_states(time, states):
+        """Set states at a time and record them."""
+        with patch("homeassistant.core.dt_util.utcnow", return_value=time):
+            for entity_id, state in states:
+                hass.states.async_set(entity_id, state)
+            await hass.async_block_till_done()
+        await hass.async_add_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    await set_states(start, [("switch.a", STATE_OFF), ("switch.b", STATE_OFF)])
+    await set_states(
+        start + timedelta(seconds=1), [("switch.a", STATE_ON), ("switch.b", STATE_ON)]
+    )
+    await set_states(start + timedelta(minutes=20), [("switch.a", STATE_OFF)])
+    await set_states(start + timedelta(minutes=40), [("switch.a", STATE_ON)])
+    client = await hass_client()
+    url = "/api/logbook/{}".format(dt_util.start_of_local_day().isoformat())
+
+    async def get_page(url, **params):
+        """Return the entries of a page and the link to the next."""
+        response = await client.get(url, params=params or None)
+        assert response.status == 200
+        entries = [
+            (entry["entity_id"], entry["message"]) for entry in await response.json()
+        ]
+        next_link = response.links.get("next")
+        return entries, next_link and next_link["url"].relative()
+
+    # The page is filled up with the events grouped with the last one
+    entries, next_url = await get_page(url, limit=1)
+    assert entries == [("switch.a", "turned on"), ("switch.b", "turned on")]
+    entries, next_url = await get_page(next_url)
+    assert entries == [("switch.a", "turned off")]
+    entries, next_url = await get_page(next_url)
+    assert entries == [("switch.a", "turned on")]
+    assert next_url is None
+
+    # Events with the same time are continued after the id of the last one
+    with session_scope(hass=hass) as session:
+        state_id = (
+            session.query(States.state_id)
+            .filter(States.entity_id == "switch.a")
+            .filter(States.state == STATE_ON)
+            .order_by(States.state_id)
+            .first()
+            .state_id
+        )
+    entries, _ = await get_page(
+        url,
+        after="{}/s{}".format(
+            (start + timedelta(seconds=1)).isoformat().replace("+00:00", "Z"), state_id
+        ),
+    )
+    assert entries == [
+        ("switch.b", "turned on"),
+        ("switch.a", "turned off"),
+        ("switch.a", "turned on"),
+    ]
+
+    response = await client.get(url, params={"limit": 0})
+    assert response.status == 400
+
+    response = await client.get(url, params={"after": "yesterday"})
+    assert response.status == 400
+
+
+def test_integration_constants():
+    """Test the copied Alexa and HomeKit constants match the integrations."""
+    assert logbook.EVENT_ALEXA_SMART_HOME == EVENT_ALEXA_SMART_HOME
+    assert logbook.EVENT_HOMEKIT_CHANGED == EVENT_HOMEKIT_CHANGED
+    assert logbook.ATTR_DISPLAY_NAME == ATTR_DISPLAY_NAME
+    assert logbook.ATTR_VALUE == ATTR_VALUE
+    assert logbook.DOMAIN_HOMEKIT == DOMAIN_HOMEKIT
@@ -16,13 +16,14 @@ from homeassistant.const import (
 )
 from homeassistant.core import callback
 from homeassistant.setup import async_setup_component
-from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.exceptions import ConfigEntryNotReady, HomeAssistantError
 
 from tests.common import (
     MockConfigEntry,
     async_fire_mqtt_message,
     async_mock_mqtt_component,
     fire_mqtt_message,
+    get_system_health_info,
     get_test_home_assistant,
     mock_coro,
     mock_mqtt_component,
@@ -336,6 +337,47 @@ class TestMQTTCallbacks(unittest.TestCase):
         self.hass.block_till_done()
         assert len(self.calls) == 1
 
+    def test_unsubscribe_identical_subscriptions(self):
+        """Test identical subscriptions are removed independently."""
+        unsub = mqtt.subscribe(self.hass, "test-topic", self.record_calls)
+        mqtt.subscribe(self.hass, "test-topic", self.record_calls)
+        self.hass.block_till_done()
+
+        unsub()
+        assert len(self.hass.data["mqtt"].subscriptions) == 1
+
+        with pytest.raises(HomeAssistantError):
+            unsub()
+
+        fire_mqtt_message(self.hass, "test-topic", "test-payload")
+
+        self.hass.block_till_done()
+        assert len(self.calls) == 1
+
+    def test_subscribe_overlapping_topics(self):
+        """Test all matching subscriptions share the decoded message."""
+        unsub_exact = mqtt.subscribe(self.hass, "test-topic/bier/on", self.record_calls)
+        mqtt.subscribe(self.hass, "test-topic/+/on", self.record_calls)
+        mqtt.subscribe(self.hass, "test-topic/#", self.record_calls)
+        mqtt.subscribe(self.hass, "test-topic/#", self.record_calls, encoding=None)
+
+        fire_mqtt_message(self.hass, "test-topic/bier/on", "test-payload")
+
+        self.hass.block_till_done()
+        assert len(self.calls) == 4
+        decoded = [call[0] for call in self.calls if call[0].payload == "test-payload"]
+        assert len(decoded) == 3
+        assert all(message is decoded[0] for message in decoded)
+        assert [call[0].payload for call in self.calls].count(b"test-payload") == 1
+
+        unsub_exact()
+        self.calls.clear()
+
+        fire_mqtt_message(self.hass, "test-topic/bier/on", "test-payload")
+
+        self.hass.block_till_done()
+        assert len(self.calls) == 3
+
     def test_subscribe_topic_not_match(self):
         """Test if subscribed topic is not a match."""
         mqtt.subscribe(self.hass, "test-topic", self.record_calls)
@@ -784,6 +826,43 @@ async def test_message_callback_exception_gets_logged(hass, caplog):
     )
 
 
+async def test_receive_messages_in_batches(hass):
+    """Test messages received by paho are handled in batches."""
+    await async_mock_mqtt_client(hass)
+    calls = []
+
+    @callback
+    def record_calls(msg):
+        """Record calls."""
+        calls.append(msg.payload)
+
+    await mqtt.async_subscribe(hass, "test-topic", record_calls)
+
+    client = hass.data["mqtt"]
+    with mock.patch("homeassistant.components.mqtt.MAX_MESSAGE_BATCH_SIZE", 2):
+        for payload in (b"1", b"2", b"3"):
+            client._mqtt_on_message(
+                None, None, mqtt.Message("test-topic", payload, 0, False)
+            )
+
+        await asyncio.sleep(0)
+        assert calls == ["1", "2"]
+        assert client.batch_size == 2
+
+        await asyncio.sleep(0)
+        assert calls == ["1", "2", "3"]
+        assert client.batch_size == 1
+
+    assert client.max_batch_size == 2
+    assert client.message_latency is not None
+
+    info = await get_system_health_info(hass, mqtt.DOMAIN)
+    assert info["connected"] is False
+    assert info["subscriptions"] == 1
+    assert info["batch_size"] == 1
+    assert info["max_batch_size"] == 2
+
+
 async def test_mqtt_ws_subscription(hass, hass_ws_client):
     """Test MQTT websocket subscription."""
     await async_mock_mqtt_component(hass)
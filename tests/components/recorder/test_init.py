@@ -1,19 +1,36 @@
 """The tests for the Recorder component."""
 # pylint: disable=protected-access
+from datetime import datetime, timedelta
+import json
+import os
+import threading
+import time
 import unittest
 from unittest.mock import patch
 
 import pytest
 
-from homeassistant.core import callback
+from homeassistant.core import Event, callback
 from homeassistant.const import MATCH_ALL
-from homeassistant.setup import async_setup_component
-from homeassistant.components.recorder import Recorder
+from homeassistant.setup import async_setup_component, setup_component
+from homeassistant.util.async_ import run_callback_threadsafe, run_coroutine_threadsafe
+from homeassistant.components.recorder import PurgeTask, Recorder
 from homeassistant.components.recorder.const import DATA_INSTANCE
+from homeassistant.components.recorder.journal import Journal
 from homeassistant.components.recorder.util import session_scope
-from homeassistant.components.recorder.models import States, Events
+from homeassistant.components.recorder.models import (
+    States,
+    StateAttributes,
+    Events,
+    Statistics,
+)
+import homeassistant.util.dt as dt_util
 
-from tests.common import get_test_home_assistant, init_recorder_component
+from tests.common import (
+    get_system_health_info,
+    get_test_home_assistant,
+    init_recorder_component,
+)
 
 
 class TestRecorder(unittest.TestCase):
@@ -189,6 +206,331 @@ def test_saving_state_include_domain_exclude_entity(hass_recorder):
     assert hass.states.get("test.ok").state == "state2"
 
 
+def test_saving_events_in_one_batch(hass_recorder):
+    """Test events queued within the commit interval are saved together."""
+    hass = hass_recorder({"commit_interval": 0.5})
+    instance = hass.data[DATA_INSTANCE]
+
+    with patch.object(
+        instance, "_add_events", wraps=instance._add_events
+    ) as add_events:
+        states = _add_entities(hass, ["test.one", "test.two", "test.three"])
+
+    assert len(add_events.mock_calls) == 1
+    assert len(states) == 3
+
+    with session_scope(hass=hass) as session:
+        event_ids = {event.event_id for event in session.query(Events)}
+        assert {state.event_id for state in session.query(States)} <= event_ids
+
+
+def test_saving_shared_state_attributes(hass_recorder):
+    """Test states with the same attributes share one attributes row."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+
+    states = _add_entities(hass, ["test.one", "test.two"])
+    hass.states.set("test.one", "changed", {"test_attr": 6})
+    hass.block_till_done()
+    # Look up the attributes in the database instead of the cache
+    instance.attributes_ids.clear()
+    hass.states.set("test.two", "changed", {"test_attr": 6})
+    hass.block_till_done()
+    instance.block_till_done()
+
+    with session_scope(hass=hass) as session:
+        db_states = list(session.query(States).order_by(States.state_id))
+        assert [state.to_native() for state in db_states[:2]] == states
+        assert all(state.attributes is None for state in db_states)
+        assert len({state.attributes_id for state in db_states}) == 2
+        assert db_states[0].attributes_id == db_states[1].attributes_id
+        assert db_states[2].attributes_id == db_states[3].attributes_id
+        assert session.query(StateAttributes).count() == 2
+
+
+def test_saving_old_state_ids(hass_recorder):
+    """Test states are linked to the previous state of their entity."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+
+    hass.states.set("test.one", "on")
+    hass.block_till_done()
+    instance.block_till_done()
+    # The old state is in the same batch
+    with patch.object(instance, "commit_interval", 1):
+        hass.states.set("test.one", "off")
+        hass.states.set("test.one", "on")
+        hass.states.remove("test.one")
+        hass.states.set("test.one", "off")
+        hass.block_till_done()
+        instance.block_till_done()
+
+    with session_scope(hass=hass) as session:
+        rows = [
+            (state.state_id, state.old_state_id)
+            for state in session.query(States).order_by(States.state_id)
+        ]
+
+    ids = [state_id for state_id, _ in rows]
+    assert rows == [
+        (ids[0], None),
+        (ids[1], ids[0]),
+        (ids[2], ids[1]),
+        (ids[3], ids[2]),
+        (ids[4], None),
+    ]
+
+
+def test_saving_old_state_ids_after_restart(tmpdir):
+    """Test the first state after a restart is linked to the last recorded."""
+    db_url = "sqlite:///{}".format(tmpdir.join("home-assistant_v2.db"))
+
+    def run_recorder(set_states):
+        """Set states while recording to the database file."""
+        hass = get_test_home_assistant()
+        # The states were set before the recorder started
+        hass.states.set("test.one", "on")
+        hass.states.set("test.removed", "on")
+        setup_component(hass, "recorder", {"recorder": {"db_url": db_url}})
+        hass.start()
+        hass.block_till_done()
+        hass.data[DATA_INSTANCE].block_till_done()
+        # The last states are only looked up for the entities recorded
+        assert hass.data[DATA_INSTANCE].old_state_ids == {}
+        set_states(hass)
+        hass.block_till_done()
+        hass.data[DATA_INSTANCE].block_till_done()
+
+        with session_scope(hass=hass) as session:
+            rows = [
+                (state.entity_id, state.state_id, state.old_state_id)
+                for state in session.query(States).order_by(States.state_id)
+            ]
+
+        hass.stop()
+        return rows
+
+    def first_run(hass):
+        """Record states and remove an entity."""
+        hass.states.set("test.one", "off")
+        hass.states.set("test.removed", "off")
+        hass.states.remove("test.removed")
+
+    def second_run(hass):
+        """Change the states again."""
+        hass.states.set("test.one", "off")
+        hass.states.set("test.removed", "off")
+
+    run_recorder(first_run)
+    rows = run_recorder(second_run)
+
+    one = [row for row in rows if row[0] == "test.one"]
+    assert [old_state_id for _, _, old_state_id in one] == [None, one[0][1]]
+    removed = [row for row in rows if row[0] == "test.removed"]
+    assert [old_state_id for _, _, old_state_id in removed] == [
+        None,
+        removed[0][1],
+        None,
+    ]
+
+
+def test_saving_statistics(hass_recorder):
+    """Test numeric sensors are rolled up in 5 minute and hourly statistics."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+    start = datetime(2019, 9, 1, tzinfo=dt_util.UTC)
+
+    def set_state(entity_id, minutes, state):
+        """Set a state with a unit at a number of minutes after start."""
+        with patch(
+            "homeassistant.core.dt_util.utcnow",
+            return_value=start + timedelta(minutes=minutes),
+        ):
+            hass.states.set(entity_id, state, {"unit_of_measurement": "W"})
+        hass.block_till_done()
+        instance.block_till_done()
+
+    set_state("sensor.power", 0, 10)
+    set_state("sensor.power", 1, 30)
+    set_state("sensor.power", 2, "unavailable")
+    set_state("test.power", 3, 40)
+    # Continue the rollups that are in the database after a restart
+    instance.statistics.rollups.clear()
+    set_state("sensor.power", 4, 20)
+    set_state("sensor.power", 5, 60)
+
+    with session_scope(hass=hass) as session:
+        statistics = [
+            (
+                row.entity_id,
+                row.period,
+                row.start,
+                row.count,
+                row.mean,
+                row.min,
+                row.max,
+            )
+            for row in session.query(Statistics).order_by(
+                Statistics.period, Statistics.start
+            )
+        ]
+
+    start = start.replace(tzinfo=None)
+    assert statistics == [
+        ("sensor.power", 300, start, 3, 20, 10, 30),
+        ("sensor.power", 300, start + timedelta(minutes=5), 1, 60, 60, 60),
+        ("sensor.power", 3600, start, 4, 30, 10, 60),
+    ]
+
+
+def _fire_with_stalled_writer(hass, count):
+    """Fire events while the recorder can not write to the database."""
+    instance = hass.data[DATA_INSTANCE]
+    stalled = threading.Event()
+    save_batch = instance._save_batch
+
+    def stalled_save_batch(events):
+        """Wait for the database to come back."""
+        stalled.wait()
+        save_batch(events)
+
+    with patch.object(instance, "_save_batch", side_effect=stalled_save_batch):
+        for idx in range(count):
+            hass.bus.fire("stress_event", {"idx": idx})
+        hass.block_till_done()
+
+        assert instance.queue.qsize() <= instance.max_queue_size
+
+        stalled.set()
+        instance.block_till_done()
+
+    with session_scope(hass=hass) as session:
+        return [
+            json.loads(event.event_data)["idx"]
+            for event in session.query(Events)
+            .filter_by(event_type="stress_event")
+            .order_by(Events.event_id)
+        ]
+
+
+def test_queue_overflow_drops_oldest(hass_recorder):
+    """Test a full queue drops the oldest events."""
+    hass = hass_recorder({"max_queue_size": 5, "max_batch_size": 1})
+    instance = hass.data[DATA_INSTANCE]
+
+    recorded = _fire_with_stalled_writer(hass, 50)
+
+    assert instance.dropped_events >= 44
+    assert len(recorded) == 50 - instance.dropped_events
+    assert recorded[-5:] == list(range(45, 50))
+
+
+def test_queue_overflow_spills_to_journal(hass_recorder):
+    """Test a full queue spills events to the journal without losing any."""
+    hass = hass_recorder(
+        {"max_queue_size": 5, "max_batch_size": 1, "overflow_policy": "spill"}
+    )
+    instance = hass.data[DATA_INSTANCE]
+
+    recorded = _fire_with_stalled_writer(hass, 50)
+
+    assert recorded == list(range(50))
+    assert instance.dropped_events == 0
+    assert instance.journal_size == 0
+    assert not os.path.exists(instance.journal.path)
+
+
+def test_journal_write_error(tmpdir):
+    """Test events that can't be written are not counted as journaled."""
+    journal = Journal(str(tmpdir.join("missing", "journal")))
+
+    journal.append(Event("test_event"))
+    journal.close()
+
+    assert journal.size == 0
+    assert list(journal.replay()) == []
+    journal.close()
+
+
+def test_queue_overflow_block_keeps_loop_responsive(hass_recorder):
+    """Test the block policy waits for room without blocking the event loop."""
+    hass = hass_recorder(
+        {"max_queue_size": 5, "max_batch_size": 1, "overflow_policy": "block"}
+    )
+    instance = hass.data[DATA_INSTANCE]
+    stalled = threading.Event()
+    save_batch = instance._save_batch
+
+    def stalled_save_batch(events):
+        """Wait for the database to come back."""
+        stalled.wait()
+        save_batch(events)
+
+    with patch.object(instance, "_save_batch", side_effect=stalled_save_batch):
+        for idx in range(50):
+            hass.bus.fire("stress_event", {"idx": idx})
+
+        # The loop keeps running while the events wait for room
+        start = time.monotonic()
+        run_callback_threadsafe(hass.loop, lambda: None).result(timeout=5)
+        assert time.monotonic() - start < 1
+        assert instance.queue.qsize() <= instance.max_queue_size
+
+        stalled.set()
+        hass.block_till_done()
+        instance.block_till_done()
+
+    with session_scope(hass=hass) as session:
+        recorded = [
+            json.loads(event.event_data)["idx"]
+            for event in session.query(Events)
+            .filter_by(event_type="stress_event")
+            .order_by(Events.event_id)
+        ]
+
+    assert recorded == list(range(50))
+    assert instance.dropped_events == 0
+
+
+def test_system_health_info(hass_recorder):
+    """Test the queue metrics are reported to system health."""
+    hass = hass_recorder()
+    _add_entities(hass, ["test.recorder"])
+
+    info = run_coroutine_threadsafe(
+        get_system_health_info(hass, "recorder"), hass.loop
+    ).result()
+
+    assert info["queue_depth"] == 0
+    assert info["max_queue_size"] == 50000
+    assert info["journal_size"] == 0
+    assert info["dropped_events"] == 0
+    assert info["commit_latency"] >= 0
+
+
+def test_purge_resumes_after_restart():
+    """Test a purge interrupted by a restart continues on start."""
+    hass = get_test_home_assistant()
+    progress_path = hass.config.path(".purge_progress")
+
+    with open(progress_path, "w") as fil:
+        json.dump({"keep_days": 3, "repack": False}, fil)
+
+    with patch.object(
+        Recorder, "_purge", autospec=True, side_effect=Recorder._purge
+    ) as purge:
+        init_recorder_component(hass)
+        hass.start()
+        hass.block_till_done()
+        hass.data[DATA_INSTANCE].block_till_done()
+
+    assert purge.call_args[0][1] == PurgeTask(keep_days=3, repack=False)
+    assert not os.path.exists(progress_path)
+    assert not hass.data[DATA_INSTANCE].purging
+
+    hass.stop()
+
+
 def test_recorder_setup_failure():
     """Test some exceptions."""
     hass = get_test_home_assistant()
@@ -222,3 +564,7 @@ async def test_defaults_set(hass):
     assert recorder_config is not None
     assert recorder_config["purge_keep_days"] == 10
     assert recorder_config["purge_interval"] == 1
+    assert recorder_config["commit_interval"] == 0
+    assert recorder_config["max_batch_size"] == 1000
+    assert recorder_config["max_queue_size"] == 50000
+    assert recorder_config["overflow_policy"] == "drop_oldest"
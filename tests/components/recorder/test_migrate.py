@@ -62,6 +62,64 @@ def test_invalid_update():
         migration._apply_update(None, -1, 0)
 
 
+def test_migrate_state_attributes():
+    """Test the attributes of existing states move to state_attributes."""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    models.Base.metadata.create_all(engine)
+    engine.execute(
+        models.States.__table__.insert(),
+        [
+            {"entity_id": "sensor.one", "state": "1", "attributes": '{"unit": "W"}'},
+            {"entity_id": "sensor.two", "state": "2", "attributes": '{"unit": "W"}'},
+            {"entity_id": "sensor.one", "state": "3", "attributes": '{"unit": "kW"}'},
+        ],
+    )
+
+    with patch.object(migration, "ATTRIBUTES_MIGRATION_CHUNK_SIZE", 2), patch.object(
+        migration, "ATTRIBUTES_MIGRATION_CACHE_SIZE", 1
+    ):
+        migration._migrate_state_attributes(engine)
+
+    rows = engine.execute(
+        "SELECT states.attributes, state_attributes.shared_attrs FROM states "
+        "JOIN state_attributes "
+        "ON states.attributes_id = state_attributes.attributes_id "
+        "ORDER BY states.state_id"
+    ).fetchall()
+    assert rows == [
+        (None, '{"unit": "W"}'),
+        (None, '{"unit": "W"}'),
+        (None, '{"unit": "kW"}'),
+    ]
+    assert engine.execute("SELECT COUNT(*) FROM state_attributes").scalar() == 2
+
+
+def test_migrate_old_state_ids():
+    """Test existing states are linked to the previous state of their entity."""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    models.Base.metadata.create_all(engine)
+    engine.execute(
+        models.States.__table__.insert(),
+        [
+            {"entity_id": "light.one", "state": "on"},
+            {"entity_id": "light.two", "state": "on"},
+            {"entity_id": "light.one", "state": "off"},
+            # light.one is removed and added again
+            {"entity_id": "light.one", "state": ""},
+            {"entity_id": "light.one", "state": "on"},
+            {"entity_id": "light.two", "state": "off"},
+        ],
+    )
+
+    with patch.object(migration, "OLD_STATE_MIGRATION_CHUNK_SIZE", 2):
+        migration._migrate_old_state_ids(engine)
+
+    rows = engine.execute(
+        "SELECT state_id, old_state_id FROM states ORDER BY state_id"
+    ).fetchall()
+    assert rows == [(1, None), (2, None), (3, 1), (4, 3), (5, None), (6, 2)]
+
+
 def test_forgiving_add_column():
     """Test that add column will continue if column exists."""
     engine = create_engine("sqlite://", poolclass=StaticPool)
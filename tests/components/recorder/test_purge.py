@@ -7,7 +7,12 @@ from unittest.mock import patch
 from homeassistant.components import recorder
 from homeassistant.components.recorder.const import DATA_INSTANCE
 from homeassistant.components.recorder.purge import purge_old_data
-from homeassistant.components.recorder.models import States, Events
+from homeassistant.components.recorder.models import (
+    States,
+    StateAttributes,
+    Events,
+    Statistics,
+)
 from homeassistant.components.recorder.util import session_scope
 from tests.common import get_test_home_assistant, init_recorder_component
 
@@ -106,6 +111,90 @@ class TestRecorderPurge(unittest.TestCase):
             # we should only have 2 states left after purging
             assert states.count() == 2
 
+    def test_purge_in_chunks(self):
+        """Test deleting old states a chunk at a time."""
+        self._add_test_states()
+        instance = self.hass.data[DATA_INSTANCE]
+
+        with patch(
+            "homeassistant.components.recorder.purge.PURGE_CHUNK_SIZE", 2
+        ), session_scope(hass=self.hass) as session:
+            states = session.query(States)
+
+            assert not purge_old_data(instance, 4, repack=False)
+            assert states.count() == 4
+            assert not purge_old_data(instance, 4, repack=False)
+            assert states.count() == 2
+            assert purge_old_data(instance, 4, repack=False)
+            assert states.count() == 2
+
+        # New databases give the pages of deleted rows back after each chunk
+        assert instance.engine.execute("PRAGMA auto_vacuum").scalar() == 2
+
+    def test_purge_unused_state_attributes(self):
+        """Test deleting state attributes no state refers to anymore."""
+        now = datetime.now()
+        old_state = States(
+            entity_id="test.recorder",
+            state="purgeme",
+            last_changed=now - timedelta(days=11),
+            last_updated=now - timedelta(days=11),
+        )
+        new_state = States(
+            entity_id="test.recorder",
+            state="dontpurgeme",
+            last_changed=now,
+            last_updated=now,
+        )
+
+        self.hass.block_till_done()
+        self.hass.data[DATA_INSTANCE].block_till_done()
+
+        with session_scope(hass=self.hass) as session:
+            old_state.state_attributes = StateAttributes.from_shared_attrs('{"a": 1}')
+            new_state.state_attributes = StateAttributes.from_shared_attrs('{"a": 2}')
+            session.add_all([old_state, new_state])
+
+        purge_old_data(self.hass.data[DATA_INSTANCE], 4, repack=False)
+
+        with session_scope(hass=self.hass) as session:
+            assert [attrs.shared_attrs for attrs in session.query(StateAttributes)] == [
+                '{"a": 2}'
+            ]
+            assert session.query(States).one().to_native().attributes == {"a": 2}
+
+    def test_purge_5minute_statistics(self):
+        """Test deleting old 5 minute statistics and keeping hourly ones."""
+        now = datetime.now()
+
+        self.hass.block_till_done()
+        self.hass.data[DATA_INSTANCE].block_till_done()
+
+        with session_scope(hass=self.hass) as session:
+            for period in (300, 3600):
+                for days in (11, 0):
+                    session.add(
+                        Statistics(
+                            entity_id="sensor.power",
+                            period=period,
+                            start=now - timedelta(days=days),
+                            count=1,
+                            mean=1,
+                            min=1,
+                            max=1,
+                        )
+                    )
+
+        purge_old_data(self.hass.data[DATA_INSTANCE], 4, repack=False)
+
+        with session_scope(hass=self.hass) as session:
+            statistics = session.query(Statistics.period, Statistics.start)
+            assert sorted(statistics) == [
+                (300, now),
+                (3600, now - timedelta(days=11)),
+                (3600, now),
+            ]
+
     def test_purge_old_events(self):
         """Test deleting old events."""
         self._add_test_events()
@@ -120,6 +209,85 @@ class TestRecorderPurge(unittest.TestCase):
             # we should only have 2 events left
             assert events.count() == 2
 
+    def test_purge_keeps_referenced_events(self):
+        """Test a chunk never deletes events that remaining states refer to."""
+        now = datetime.now()
+        eleven_days_ago = now - timedelta(days=11)
+
+        self.hass.block_till_done()
+        self.hass.data[DATA_INSTANCE].block_till_done()
+
+        with session_scope(hass=self.hass) as session:
+            events = [
+                Events(
+                    event_type="state_changed",
+                    origin="LOCAL",
+                    time_fired=eleven_days_ago + timedelta(minutes=minutes),
+                )
+                for minutes in range(3)
+            ]
+            session.add_all(events)
+            session.flush()
+
+            # The states are not in the order of their events
+            for minutes, event in zip(range(3, 0, -1), events):
+                session.add(
+                    States(
+                        entity_id="test.recorder",
+                        state="purgeme",
+                        last_changed=eleven_days_ago + timedelta(minutes=minutes),
+                        last_updated=eleven_days_ago + timedelta(minutes=minutes),
+                        event_id=event.event_id,
+                    )
+                )
+
+            # Old events no state refers to
+            for _ in range(3):
+                session.add(
+                    Events(
+                        event_type="EVENT_TEST_UNREFERENCED",
+                        origin="LOCAL",
+                        time_fired=eleven_days_ago,
+                    )
+                )
+
+        instance = self.hass.data[DATA_INSTANCE]
+
+        with patch(
+            "homeassistant.components.recorder.purge.PURGE_CHUNK_SIZE", 2
+        ), session_scope(hass=self.hass) as session:
+            finished = False
+            while not finished:
+                finished = purge_old_data(instance, 4, repack=False)
+
+                event_ids = {event_id for event_id, in session.query(Events.event_id)}
+                for state in session.query(States):
+                    assert state.event_id in event_ids
+
+            assert session.query(States).count() == 0
+            assert (
+                session.query(Events)
+                .filter(Events.time_fired < now - timedelta(days=4))
+                .count()
+                == 0
+            )
+
+    def test_purge_retries_failed_chunk(self):
+        """Test a chunk that fails is tried again until it failed too often."""
+        from sqlalchemy.exc import OperationalError
+
+        instance = self.hass.data[DATA_INSTANCE]
+        error = OperationalError("DELETE", {}, Exception("database is locked"))
+
+        with patch(
+            "homeassistant.components.recorder.purge._delete_ids", side_effect=error
+        ), patch("homeassistant.components.recorder.purge.time.sleep"):
+            assert not purge_old_data(instance, 4, repack=False)
+            assert not purge_old_data(instance, 4, repack=False)
+            assert purge_old_data(instance, 4, repack=False)
+
+        assert instance.purge_failures == 0
+
     def test_purge_method(self):
         """Test purge method."""
         service_data = {"keep_days": 4}
@@ -173,6 +341,6 @@ class TestRecorderPurge(unittest.TestCase):
                 self.hass.block_till_done()
                 self.hass.data[DATA_INSTANCE].block_till_done()
                 assert (
-                    mock_logger.debug.mock_calls[3][1][0]
+                    mock_logger.debug.mock_calls[5][1][0]
                     == "Vacuuming SQLite to free space"
                 )
@@ -0,0 +1,29 @@
+"""The tests for the recorder queue sensor platform."""
+from homeassistant.components.recorder.const import DATA_INSTANCE
+from homeassistant.setup import setup_component
+
+from tests.common import get_test_home_assistant, init_recorder_component
+
+
+def test_recorder_queue_sensor():
+    """Test the sensor reports the recorder queue metrics."""
+    hass = get_test_home_assistant()
+
+    try:
+        init_recorder_component(hass)
+        hass.start()
+
+        hass.data[DATA_INSTANCE].dropped_events = 3
+        assert setup_component(
+            hass, "sensor", {"sensor": {"platform": "recorder", "name": "queue"}}
+        )
+        hass.block_till_done()
+
+        state = hass.states.get("sensor.queue")
+        assert state.state == "0"
+        assert state.attributes["unit_of_measurement"] == "events"
+        assert state.attributes["dropped_events"] == 3
+        assert state.attributes["journal_size"] == 0
+        assert state.attributes["max_queue_size"] == 50000
+    finally:
+        hass.stop()
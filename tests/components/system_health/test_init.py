@@ -5,6 +5,7 @@ from unittest.mock import Mock
 import pytest
 
 from homeassistant.setup import async_setup_component
+from homeassistant.startup_trace import CATEGORY_SETUP, DATA_STARTUP_TRACE, StartupTrace
 
 from tests.common import mock_coro
 
@@ -94,3 +95,21 @@ async def test_info_endpoint_register_callback_exc(
     assert len(data) == 2
     data = data["lovelace"]
     assert data == {"error": "TEST ERROR"}
+
+
+async def test_info_endpoint_startup_trace(hass, hass_ws_client, mock_system_info):
+    """Test the summary of the startup trace is returned when traced."""
+    trace = hass.data[DATA_STARTUP_TRACE] = StartupTrace()
+    with trace.span("light", "setup", CATEGORY_SETUP):
+        pass
+
+    assert await async_setup_component(hass, "system_health", {})
+    client = await hass_ws_client(hass)
+
+    resp = await client.send_json({"id": 6, "type": "system_health/info"})
+    resp = await client.receive_json()
+    assert resp["success"]
+    data = resp["result"]["startup"]
+
+    assert "light (" in data["slowest_setup"]
+    assert data["event_loop_blocks"] == 0
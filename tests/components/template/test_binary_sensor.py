@@ -242,6 +242,7 @@ class TestBinarySensorTemplate(unittest.TestCase):
             None,
             None,
             None,
+            None,
         ).result()
         assert not vs.should_poll
         assert "motion" == vs.device_class
@@ -302,6 +303,7 @@ class TestBinarySensorTemplate(unittest.TestCase):
             None,
             None,
             None,
+            None,
         ).result()
         mock_render.side_effect = TemplateError("foo")
         run_callback_threadsafe(self.hass.loop, vs.async_check_state).result()
@@ -459,7 +461,7 @@ async def test_invalid_attribute_template(hass, caplog):
 
 
 async def test_no_update_template_match_all(hass, caplog):
-    """Test that we do not update sensors that match on all."""
+    """Test that sensors that match on all track the states they read."""
     hass.states.async_set("binary_sensor.test_sensor", "true")
 
     await setup.async_setup_component(
@@ -526,9 +528,9 @@ async def test_no_update_template_match_all(hass, caplog):
     await hass.async_block_till_done()
 
     assert hass.states.get("binary_sensor.all_state").state == "on"
-    assert hass.states.get("binary_sensor.all_icon").state == "on"
-    assert hass.states.get("binary_sensor.all_entity_picture").state == "on"
-    assert hass.states.get("binary_sensor.all_attribute").state == "on"
+    assert hass.states.get("binary_sensor.all_icon").state == "off"
+    assert hass.states.get("binary_sensor.all_entity_picture").state == "off"
+    assert hass.states.get("binary_sensor.all_attribute").state == "off"
 
     await hass.helpers.entity_component.async_update_entity("binary_sensor.all_state")
     await hass.helpers.entity_component.async_update_entity("binary_sensor.all_icon")
@@ -543,3 +545,61 @@ async def test_no_update_template_match_all(hass, caplog):
     assert hass.states.get("binary_sensor.all_icon").state == "off"
     assert hass.states.get("binary_sensor.all_entity_picture").state == "off"
     assert hass.states.get("binary_sensor.all_attribute").state == "off"
+
+
+async def test_rate_limit_shared(hass):
+    """Test that the templates of a binary sensor share one rate limit."""
+    hass.states.async_set("sensor.power", "0")
+
+    await setup.async_setup_component(
+        hass,
+        "binary_sensor",
+        {
+            "binary_sensor": {
+                "platform": "template",
+                "sensors": {
+                    "limited": {
+                        "value_template": "{{ states('sensor.power') | int > 0 }}",
+                        "icon_template": "mdi:numeric-{{ states('sensor.power') }}",
+                        "rate_limit": {"seconds": 5},
+                    }
+                },
+            }
+        },
+    )
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_START)
+    await hass.async_block_till_done()
+    assert hass.states.get("binary_sensor.limited").state == "off"
+
+    # The first state written at startup starts a period
+    now = dt_util.utcnow() + timedelta(seconds=5)
+    with mock.patch("homeassistant.util.dt.utcnow") as mock_utcnow:
+        mock_utcnow.return_value = now
+        async_fire_time_changed(hass, now)
+        await hass.async_block_till_done()
+
+        writes = []
+        hass.bus.async_listen(
+            "state_changed",
+            lambda event: writes.append(event.data["new_state"])
+            if event.data["entity_id"] == "binary_sensor.limited"
+            else None,
+        )
+
+        hass.states.async_set("sensor.power", "1")
+        await hass.async_block_till_done()
+        assert len(writes) == 1
+        assert writes[0].state == "on"
+        assert writes[0].attributes["icon"] == "mdi:numeric-1"
+
+        for power in range(2, 10):
+            hass.states.async_set("sensor.power", str(power))
+        await hass.async_block_till_done()
+        assert len(writes) == 1
+
+        mock_utcnow.return_value = now = now + timedelta(seconds=5)
+        async_fire_time_changed(hass, now)
+        await hass.async_block_till_done()
+        assert len(writes) == 2
+        assert writes[1].state == "on"
+        assert writes[1].attributes["icon"] == "mdi:numeric-9"
@@ -1,8 +1,15 @@
 """The test for the Template sensor platform."""
+from datetime import timedelta
+
 from homeassistant.const import EVENT_HOMEASSISTANT_START
 from homeassistant.setup import setup_component, async_setup_component
+import homeassistant.util.dt as dt_util
 
-from tests.common import get_test_home_assistant, assert_setup_component
+from tests.common import (
+    async_fire_time_changed,
+    get_test_home_assistant,
+    assert_setup_component,
+)
 
 
 class TestTemplateSensor:
@@ -406,7 +413,7 @@ async def test_invalid_attribute_template(hass, caplog):
 
 
 async def test_no_template_match_all(hass, caplog):
-    """Test that we do not allow sensors that match on all."""
+    """Test that sensors that match on all track the states they read."""
     hass.states.async_set("sensor.test_sensor", "startup")
 
     await async_setup_component(
@@ -490,10 +497,10 @@ async def test_no_template_match_all(hass, caplog):
     await hass.async_block_till_done()
 
     assert hass.states.get("sensor.invalid_state").state == "2"
-    assert hass.states.get("sensor.invalid_icon").state == "startup"
-    assert hass.states.get("sensor.invalid_entity_picture").state == "startup"
-    assert hass.states.get("sensor.invalid_friendly_name").state == "startup"
-    assert hass.states.get("sensor.invalid_attribute").state == "startup"
+    assert hass.states.get("sensor.invalid_icon").state == "hello"
+    assert hass.states.get("sensor.invalid_entity_picture").state == "hello"
+    assert hass.states.get("sensor.invalid_friendly_name").state == "hello"
+    assert hass.states.get("sensor.invalid_attribute").state == "hello"
 
     await hass.helpers.entity_component.async_update_entity("sensor.invalid_state")
     await hass.helpers.entity_component.async_update_entity("sensor.invalid_icon")
@@ -510,3 +517,101 @@ async def test_no_template_match_all(hass, caplog):
     assert hass.states.get("sensor.invalid_entity_picture").state == "hello"
     assert hass.states.get("sensor.invalid_friendly_name").state == "hello"
     assert hass.states.get("sensor.invalid_attribute").state == "hello"
+
+
+async def test_rate_limit(hass):
+    """Test coalescing the updates of a fast changing state."""
+    hass.states.async_set("sensor.power", "0")
+
+    await async_setup_component(
+        hass,
+        "sensor",
+        {
+            "sensor": {
+                "platform": "template",
+                "sensors": {
+                    "limited": {
+                        "value_template": "{{ states.sensor.power.state }}",
+                        "rate_limit": {"seconds": 5},
+                    },
+                    "limited_match_all": {
+                        "value_template": "{{ states.sensor.power.state }}",
+                        "icon_template": "mdi:{{ 1 + 1 }}",
+                        "rate_limit": {"seconds": 5},
+                    },
+                },
+            }
+        },
+    )
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_START)
+    await hass.async_block_till_done()
+
+    hass.states.async_set("sensor.power", "1")
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.limited").state == "1"
+    assert hass.states.get("sensor.limited_match_all").state == "1"
+
+    for power in range(2, 10):
+        hass.states.async_set("sensor.power", str(power))
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.limited").state == "1"
+    assert hass.states.get("sensor.limited_match_all").state == "1"
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=5))
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.limited").state == "9"
+    assert hass.states.get("sensor.limited_match_all").state == "9"
+
+
+async def test_rate_limit_shared(hass):
+    """Test that the templates of a sensor share one rate limit."""
+    hass.states.async_set("sensor.power", "0")
+
+    await async_setup_component(
+        hass,
+        "sensor",
+        {
+            "sensor": {
+                "platform": "template",
+                "sensors": {
+                    "limited": {
+                        "value_template": "{{ states('sensor.power') }}",
+                        "icon_template": "mdi:numeric-{{ states('sensor.power') }}",
+                        "attribute_templates": {
+                            "power": "{{ states('sensor.power') }}"
+                        },
+                        "rate_limit": {"seconds": 5},
+                    }
+                },
+            }
+        },
+    )
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_START)
+    await hass.async_block_till_done()
+
+    writes = []
+    hass.bus.async_listen(
+        "state_changed",
+        lambda event: writes.append(event.data["new_state"])
+        if event.data["entity_id"] == "sensor.limited"
+        else None,
+    )
+
+    hass.states.async_set("sensor.power", "1")
+    await hass.async_block_till_done()
+    assert len(writes) == 1
+    assert writes[0].state == "1"
+    assert writes[0].attributes["icon"] == "mdi:numeric-1"
+    assert writes[0].attributes["power"] == "1"
+
+    for power in range(2, 10):
+        hass.states.async_set("sensor.power", str(power))
+    await hass.async_block_till_done()
+    assert len(writes) == 1
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=5))
+    await hass.async_block_till_done()
+    assert len(writes) == 2
+    assert writes[1].state == "9"
+    assert writes[1].attributes["icon"] == "mdi:numeric-9"
+    assert writes[1].attributes["power"] == "9"
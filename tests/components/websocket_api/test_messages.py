@@ -0,0 +1,43 @@
+"""Tests for WebSocket API messages."""
+import json
+from unittest.mock import patch
+
+from homeassistant.core import Event, State
+from homeassistant.components.websocket_api import const, messages
+
+
+def test_cached_event_message():
+    """Test an event is serialized once for all subscribers."""
+    event = Event(
+        "state_changed",
+        {
+            "entity_id": "light.kitchen",
+            "old_state": None,
+            "new_state": State("light.kitchen", "on"),
+        },
+    )
+
+    with patch.object(
+        messages.const, "JSON_DUMP", side_effect=const.JSON_DUMP
+    ) as mock_dump:
+        first = json.loads(messages.cached_event_message(1, event))
+        second = json.loads(messages.cached_event_message(2, event))
+
+    assert len(mock_dump.mock_calls) == 1
+    assert first == json.loads(const.JSON_DUMP(messages.event_message(1, event)))
+    assert first["id"] == 1
+    assert second["id"] == 2
+    assert first["type"] == second["type"] == "event"
+    assert first["event"] == second["event"]
+    assert first["event"]["data"]["new_state"]["state"] == "on"
+
+
+def test_cached_event_message_not_serializable():
+    """Test an event that can't be serialized is returned as dict."""
+    event = Event("test_event", {"value": object()})
+
+    assert messages.cached_event_message(5, event) == {
+        "id": 5,
+        "type": "event",
+        "event": event,
+    }
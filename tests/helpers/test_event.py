@@ -10,8 +10,9 @@ import pytest
 from homeassistant.core import callback
 from homeassistant.setup import async_setup_component
 import homeassistant.core as ha
-from homeassistant.const import MATCH_ALL
+from homeassistant.const import EVENT_TIME_CHANGED, MATCH_ALL
 from homeassistant.helpers.event import (
+    RateLimitedCall,
     async_call_later,
     async_track_point_in_time,
     async_track_point_in_utc_time,
@@ -20,9 +21,11 @@ from homeassistant.helpers.event import (
     async_track_sunrise,
     async_track_sunset,
     async_track_template,
+    async_track_template_result,
     async_track_time_change,
     async_track_time_interval,
     async_track_utc_time_change,
+    async_get_time_scheduler,
 )
 from homeassistant.helpers.template import Template
 from homeassistant.components import sun
@@ -233,6 +236,198 @@ async def test_track_template(hass):
     assert len(wildercard_runs) == 2
 
 
+async def test_track_template_result(hass):
+    """Test tracking the states read by a template."""
+    runs = []
+
+    template_domain = Template("{{ states.sensor | count }}", hass)
+    template_entity = Template(
+        "{% if is_state('switch.test', 'on') %}"
+        "{{ states.sensor.first.state }}{% else %}{{ states.sensor.second.state }}"
+        "{% endif %}",
+        hass,
+    )
+
+    @ha.callback
+    def domain_listener(event, result):
+        runs.append(("domain", event.data["entity_id"], result))
+
+    @ha.callback
+    def entity_listener(event, result):
+        runs.append(("entity", event.data["entity_id"], result))
+
+    hass.states.async_set("switch.test", "off")
+    async_track_template_result(hass, template_domain, domain_listener)
+    unsub = async_track_template_result(hass, template_entity, entity_listener)
+
+    # Other domains are not read by the templates
+    hass.states.async_set("light.test", "on")
+    await hass.async_block_till_done()
+    assert runs == []
+
+    hass.states.async_set("sensor.first", "1")
+    await hass.async_block_till_done()
+    assert runs == [("domain", "sensor.first", "1")]
+    runs.clear()
+
+    hass.states.async_set("sensor.second", "2")
+    await hass.async_block_till_done()
+    assert runs == [("domain", "sensor.second", "2"), ("entity", "sensor.second", "2")]
+    runs.clear()
+
+    # The count does not read the states of the sensors
+    hass.states.async_set("sensor.second", "3")
+    await hass.async_block_till_done()
+    assert runs == [("entity", "sensor.second", "3")]
+    runs.clear()
+
+    # The template reads the first sensor from now on
+    hass.states.async_set("switch.test", "on")
+    await hass.async_block_till_done()
+    assert runs == [("entity", "switch.test", "1")]
+    runs.clear()
+
+    hass.states.async_set("sensor.second", "4")
+    hass.states.async_set("sensor.first", "5")
+    await hass.async_block_till_done()
+    assert runs == [("entity", "sensor.first", "5")]
+    runs.clear()
+
+    unsub()
+    hass.states.async_remove("sensor.first")
+    await hass.async_block_till_done()
+    assert runs == [("domain", "sensor.first", "1")]
+
+
+async def test_track_template_result_rate_limit(hass):
+    """Test coalescing the renders of a template."""
+    runs = []
+
+    @ha.callback
+    def listener(event, result):
+        runs.append(result)
+
+    template_power = Template("{{ states('sensor.power') }}", hass)
+    unsub = async_track_template_result(
+        hass, template_power, listener, rate_limit=timedelta(seconds=1)
+    )
+
+    hass.states.async_set("sensor.power", "1")
+    await hass.async_block_till_done()
+    assert runs == ["1"]
+
+    hass.states.async_set("sensor.power", "2")
+    hass.states.async_set("sensor.power", "3")
+    await hass.async_block_till_done()
+    assert runs == ["1"]
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=1))
+    await hass.async_block_till_done()
+    assert runs == ["1", "3"]
+
+    hass.states.async_set("sensor.power", "4")
+    await hass.async_block_till_done()
+    unsub()
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=2))
+    await hass.async_block_till_done()
+    assert runs == ["1", "3"]
+
+
+async def test_rate_limited_call(hass):
+    """Test a rate limited call runs again once the period passed."""
+    calls = []
+    limited = RateLimitedCall(hass, timedelta(seconds=1), calls.append)
+    now = dt_util.utcnow()
+
+    with patch("homeassistant.util.dt.utcnow", return_value=now):
+        limited.async_call(1)
+        limited.async_call(2)
+        await hass.async_block_till_done()
+        assert calls == [2]
+
+        limited.async_call(3)
+        limited.async_call(4)
+        await hass.async_block_till_done()
+        assert calls == [2]
+
+    with patch("homeassistant.util.dt.utcnow", return_value=now + timedelta(seconds=2)):
+        async_fire_time_changed(hass, now + timedelta(seconds=2))
+        await hass.async_block_till_done()
+        assert calls == [2, 4]
+
+    with patch("homeassistant.util.dt.utcnow", return_value=now + timedelta(seconds=4)):
+        limited.async_call(5)
+        await hass.async_block_till_done()
+    assert calls == [2, 4, 5]
+
+
+async def test_rate_limited_call_shared(hass):
+    """Test actions sharing a rate limit run at most once per period."""
+    calls = []
+    limited = RateLimitedCall(hass, timedelta(seconds=1))
+    now = dt_util.utcnow()
+
+    @ha.callback
+    def first(value):
+        calls.append(("first", value))
+        limited.async_call_action(last, value)
+
+    @ha.callback
+    def second(value):
+        calls.append(("second", value))
+
+    @ha.callback
+    def last(value):
+        calls.append(("last", value))
+
+    with patch("homeassistant.util.dt.utcnow", return_value=now):
+        limited.async_call_action(first, 1)
+        limited.async_call_action(second, 1)
+        limited.async_call_action(first, 2)
+        await hass.async_block_till_done()
+        # Actions called by a running action run in the same run
+        assert calls == [("first", 2), ("second", 1), ("last", 2)]
+
+        calls.clear()
+        limited.async_call_action(second, 3)
+        limited.async_call_action(first, 3)
+        limited.async_call_action(second, 4)
+        await hass.async_block_till_done()
+        assert calls == []
+
+    with patch("homeassistant.util.dt.utcnow", return_value=now + timedelta(seconds=2)):
+        async_fire_time_changed(hass, now + timedelta(seconds=2))
+        await hass.async_block_till_done()
+        assert calls == [("second", 4), ("first", 3), ("last", 3)]
+
+        calls.clear()
+        limited.async_call_action(first, 5)
+        limited.async_call_action(second, 5)
+        limited.async_cancel_action(second)
+
+    with patch("homeassistant.util.dt.utcnow", return_value=now + timedelta(seconds=4)):
+        async_fire_time_changed(hass, now + timedelta(seconds=4))
+        await hass.async_block_till_done()
+    assert calls == [("first", 5), ("last", 5)]
+
+
+async def test_track_template_no_states(hass):
+    """Test tracking a template condition that reads no states."""
+    runs = []
+
+    @ha.callback
+    def run_callback(entity_id, old_state, new_state):
+        runs.append(entity_id)
+
+    async_track_template(hass, Template("{{ true }}", hass), run_callback)
+    async_track_template(hass, Template("true", hass), run_callback)
+
+    hass.states.async_set("light.test", "on")
+    await hass.async_block_till_done()
+    assert runs == ["light.test"]
+
+
 async def test_track_same_state_simple_trigger(hass):
     """Test track_same_change with trigger simple."""
     thread_runs = []
@@ -629,6 +824,29 @@ async def test_periodic_task_minute(hass):
     assert len(specific_runs) == 2
 
 
+async def test_periodic_task_unsubscribe_in_action(hass):
+    """Test a periodic task that removes itself from its action."""
+    specific_runs = []
+    unsub = None
+
+    @ha.callback
+    def action(now):
+        """Record the run and remove the listener."""
+        specific_runs.append(1)
+        unsub()
+
+    unsub = async_track_utc_time_change(hass, action, second=0)
+
+    _send_time_changed(hass, datetime(2014, 5, 24, 12, 0, 0))
+    await hass.async_block_till_done()
+    assert len(specific_runs) == 1
+
+    for minute in range(1, 5):
+        _send_time_changed(hass, datetime(2014, 5, 24, 12, minute, 0))
+        await hass.async_block_till_done()
+    assert len(specific_runs) == 1
+
+
 async def test_periodic_task_hour(hass):
     """Test periodic tasks per hour."""
     specific_runs = []
@@ -835,3 +1053,74 @@ async def test_async_call_later(hass):
     assert p_action is action
     assert p_point == now + timedelta(seconds=3)
     assert remove is mock()
+
+
+async def test_time_trackers_share_one_listener(hass):
+    """Test time trackers do not add a time changed listener each."""
+    now = dt_util.utcnow()
+    listeners = hass.bus.async_listeners().get(EVENT_TIME_CHANGED, 0)
+
+    unsubs = [
+        async_track_point_in_utc_time(hass, lambda now: None, now + timedelta(hours=1))
+        for _ in range(10)
+    ]
+    unsubs.append(async_track_utc_time_change(hass, lambda now: None, second=0))
+
+    assert hass.bus.async_listeners()[EVENT_TIME_CHANGED] == listeners + 1
+    assert len(async_get_time_scheduler(hass)) == 11
+
+    for unsub in unsubs:
+        unsub()
+
+    assert len(async_get_time_scheduler(hass)) == 0
+
+
+async def test_point_in_time_fires_without_time_changed(hass):
+    """Test a point in time fires from the loop timer."""
+    runs = []
+
+    @callback
+    def action(now):
+        """Record the run."""
+        runs.append(now)
+
+    now = dt_util.utcnow()
+    point_in_time = now + timedelta(seconds=10)
+
+    with patch.object(hass.loop, "call_at") as mock_call_at, patch(
+        "homeassistant.util.dt.utcnow", return_value=now
+    ):
+        async_track_point_in_utc_time(hass, action, point_in_time)
+
+    assert mock_call_at.call_count == 1
+    when, timer_fired = mock_call_at.call_args[0]
+    assert when == pytest.approx(hass.loop.time() + 10, abs=1)
+
+    with patch("homeassistant.util.dt.utcnow", return_value=point_in_time):
+        timer_fired()
+
+    assert runs == [point_in_time]
+
+
+async def test_time_tracker_errors_are_isolated(hass):
+    """Test a failing time tracker does not prevent others from running."""
+    runs = []
+    now = datetime(2014, 5, 24, 12, 0, 0, tzinfo=dt_util.UTC)
+
+    @callback
+    def bad_action(now):
+        """Raise an exception."""
+        raise ValueError
+
+    @callback
+    def action(now):
+        """Record the run."""
+        runs.append(now)
+
+    async_track_point_in_utc_time(hass, bad_action, now)
+    async_track_point_in_utc_time(hass, action, now)
+
+    async_fire_time_changed(hass, now)
+    await hass.async_block_till_done()
+
+    assert runs == [now]
@@ -20,6 +20,7 @@ from homeassistant.const import (
     STATE_NOT_HOME,
 )
 from homeassistant.components.sun import STATE_ABOVE_HORIZON, STATE_BELOW_HORIZON
+from homeassistant.components.mysensors import switch as mysensors_switch
 
 from tests.common import async_mock_service
 
@@ -213,3 +214,9 @@ async def test_as_number_invalid_cases(hass):
     for _state in ("", "foo", "foo.bar", None, False, True, object, object()):
         with pytest.raises(ValueError):
             state.state_as_number(ha.State("domain.test", _state, {}))
+
+
+def test_mysensors_constants():
+    """Test the copied mysensors constants match the integration."""
+    assert state.ATTR_IR_CODE == mysensors_switch.ATTR_IR_CODE
+    assert state.SERVICE_SEND_IR_CODE == mysensors_switch.SERVICE_SEND_IR_CODE
@@ -60,6 +60,9 @@ def assert_result_info(info, result, entities=None, domains=None, all_states=Fal
         assert all([info.filter_lifecycle(domain + ".entity") for domain in domains])
     else:
         assert not hasattr(info, "_domains")
+    assert info.all_states == all_states
+    assert info.entities == frozenset(entities or ())
+    assert info.domains == frozenset(domains or ())
 
 
 def test_template_equality():
@@ -101,6 +104,142 @@ def test_invalid_template(hass):
         tmpl.async_render()
 
 
+def test_compiled_template_cache(hass):
+    """Test identical templates share their compiled code."""
+    cache = template.CompiledTemplateCache(template.MAX_COMPILED_CACHE_SIZE)
+
+    with patch.object(template, "_COMPILED_CACHE", cache):
+        tmpl_one = template.Template("{{ 1 + 1 }}", hass)
+        tmpl_two = template.Template("{{ 1 + 1 }}", hass)
+        assert tmpl_one.async_render() == "2"
+        assert tmpl_two.async_render() == "2"
+        template.Template("{{ 1 + 1 }}").ensure_valid()
+
+    # pylint: disable=protected-access
+    assert tmpl_one._compiled_code is tmpl_two._compiled_code
+    assert len(cache) == 1
+    assert cache.misses == 1
+    assert cache.hits == 2
+    assert cache.size > 0
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.size == 0
+
+
+def test_compiled_template_cache_expression(hass):
+    """Test identical templates share their parsed expression."""
+    cache = template.CompiledTemplateCache(template.MAX_COMPILED_CACHE_SIZE)
+    hass.states.async_set("sensor.power", "25")
+
+    with patch.object(template, "_COMPILED_CACHE", cache), patch.object(
+        template, "_parse_expression", wraps=template._parse_expression
+    ) as mock_parse:
+        for _ in range(2):
+            tmpl = template.Template("{{ states('sensor.power') | float > 20 }}", hass)
+            assert tmpl.async_render_fast() == "True"
+
+    assert mock_parse.call_count == 1
+    assert len(cache) == 1
+    assert cache.misses == 1
+    assert cache.hits == 1
+    assert cache.size > 0
+
+
+def test_compiled_template_cache_eviction():
+    """Test the least recently used templates are evicted."""
+    cache = template.CompiledTemplateCache(template.MAX_COMPILED_CACHE_SIZE)
+    cache.compile(template._NO_HASS_ENV, "{{ 1 }}")
+    entry_size = cache.size
+    cache.max_size = entry_size * 2
+
+    cache.compile(template._NO_HASS_ENV, "{{ 2 }}")
+    assert cache.get("{{ 1 }}") is not None
+    cache.compile(template._NO_HASS_ENV, "{{ 3 }}")
+
+    assert len(cache) == 2
+    assert cache.size <= cache.max_size
+    assert cache.get("{{ 1 }}") is not None
+    assert cache.get("{{ 2 }}") is None
+    assert cache.get("{{ 3 }}") is not None
+
+    with pytest.raises(TemplateError):
+        cache.compile(template._NO_HASS_ENV, "{{")
+    assert len(cache) == 2
+
+
+def test_precompile():
+    """Test precompiling the templates of a configuration."""
+    cache = template.CompiledTemplateCache(template.MAX_COMPILED_CACHE_SIZE)
+    config = {
+        "sensor": [
+            {"platform": "template", "value_template": "{{ states('sensor.a') }}"},
+            {"platform": "mqtt", "value_template": "{{ value_json.temp }}"},
+        ],
+        "automation": {"condition": {"value_template": "{{ true }}"}},
+        "invalid": "{{",
+        "name": "Home",
+    }
+
+    with patch.object(template, "_COMPILED_CACHE", cache):
+        assert template.precompile(config) == 3
+
+    assert len(cache) == 3
+    assert cache.get("{{ value_json.temp }}") is not None
+
+
+@pytest.mark.parametrize(
+    "template_str, compiled",
+    [
+        ("{{ states('sensor.power') | float > 20 }}", True),
+        ("{{ states('sensor.missing') | float > 20 }}", True),
+        ("{{ 10 < states('sensor.power') | float <= 30 }}", True),
+        (
+            "{{ is_state('light.kitchen', 'on') and not is_state('light.hall', 'on') }}",
+            True,
+        ),
+        ("{{ is_state_attr('sensor.power', 'unit', 'W') or false }}", True),
+        ("{{ state_attr('sensor.power', 'unit') in ['W', 'kW'] }}", True),
+        ("{{ states.sensor.power.state | int * 2 - 1 }}", True),
+        ("{{ states['sensor.power'].attributes.unit }}", True),
+        ("{{ states.sensor.missing.state }}", True),
+        ("{{ trigger.to_state.state == 'on' }}", True),
+        ("{{ undefined_variable == 3 }}", True),
+        ("  {{ true }}\n", True),
+        ("{{ states | count }}", True),
+        ("{{ states.light | map(attribute='state') | join(',') }}", False),
+        ("{% if is_state('light.kitchen', 'on') %}on{% endif %}", False),
+        ("{{ 'a' ~ states('sensor.power') }}", False),
+        ("value {{ states('sensor.power') }}", False),
+    ],
+)
+def test_render_fast(hass, template_str, compiled):
+    """Test evaluating simple expressions gives the Jinja result."""
+    hass.states.async_set("sensor.power", "25.5", {"unit": "W"})
+    hass.states.async_set("light.kitchen", "on")
+    hass.states.async_set("light.hall", "off")
+    variables = {"trigger": {"to_state": hass.states.get("light.kitchen")}}
+
+    tmpl = template.Template(template_str, hass)
+    assert tmpl.async_render_fast(variables) == tmpl.async_render(variables)
+    # pylint: disable=protected-access
+    assert bool(tmpl._expression) == compiled
+
+
+def test_render_fast_variables(hass):
+    """Test variables replace the functions of simple expressions."""
+    hass.states.async_set("light.kitchen", "on")
+    tmpl = template.Template("{{ is_state('light.kitchen', 'on') }}", hass)
+
+    assert tmpl.async_render_fast() == "True"
+    assert tmpl.async_render_fast({"is_state": lambda *args: False}) == "False"
+
+    with pytest.raises(TemplateError):
+        template.Template(
+            "{{ states.sensor.missing.state + 1 }}", hass
+        ).async_render_fast()
+
+
 def test_referring_states_by_entity_id(hass):
     """Test referring states by entity id."""
     hass.states.async_set("test.object", "happy")
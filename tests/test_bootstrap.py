@@ -5,8 +5,11 @@ import os
 from unittest.mock import Mock, patch
 import logging
 
+import pytest
+
 import homeassistant.config as config_util
 from homeassistant import bootstrap
+from homeassistant.startup_trace import DATA_STARTUP_TRACE, STARTUP_TRACE_FILENAME
 import homeassistant.util.dt as dt_util
 
 from tests.common import (
@@ -56,7 +59,9 @@ def test_home_assistant_core_config_validation(hass):
 
 async def test_async_from_config_file_not_mount_deps_folder(loop):
     """Test that we not mount the deps folder inside async_from_config_file."""
-    hass = Mock(async_add_executor_job=Mock(side_effect=lambda *args: mock_coro()))
+    hass = Mock(
+        data={}, async_add_executor_job=Mock(side_effect=lambda *args: mock_coro())
+    )
 
     with patch("homeassistant.bootstrap.is_virtual_env", return_value=False), patch(
         "homeassistant.bootstrap.async_enable_logging", return_value=mock_coro()
@@ -233,3 +238,127 @@ async def test_setup_after_deps_not_present(hass, caplog):
     assert "first_dep" not in hass.config.components
     assert "second_dep" in hass.config.components
     assert order == ["root", "second_dep"]
+
+
+async def test_trace_startup(hass, tmpdir):
+    """Test the startup trace is written when startup is traced."""
+    hass.config.config_dir = str(tmpdir)
+
+    with patch("homeassistant.startup_trace.StartupTrace.async_start_monitor"):
+        assert await bootstrap.async_from_config_dict(
+            {"group": {}}, hass, enable_log=False, trace_startup=True
+        )
+
+    trace = hass.data[DATA_STARTUP_TRACE]
+    assert trace.path == str(tmpdir.join(STARTUP_TRACE_FILENAME))
+    assert os.path.isfile(trace.path)
+    assert {(span.track, span.name) for span in trace.spans} >= {
+        ("bootstrap", "core config"),
+        ("bootstrap", "stage 2"),
+        ("group", "setup"),
+    }
+
+
+async def test_setup_after_deps_without_waiting_for_others(hass):
+    """Test integrations don't wait for unrelated slow integrations."""
+    chain_done = asyncio.Event()
+    order = []
+
+    async def slow_setup(hass, config):
+        await chain_done.wait()
+        order.append("slow")
+        return True
+
+    def gen_domain_setup(domain):
+        async def async_setup(hass, config):
+            order.append(domain)
+            if domain == "second_dep":
+                chain_done.set()
+            return True
+
+        return async_setup
+
+    mock_integration(hass, MockModule(domain="slow", async_setup=slow_setup))
+    mock_integration(
+        hass, MockModule(domain="root", async_setup=gen_domain_setup("root"))
+    )
+    mock_integration(
+        hass,
+        MockModule(
+            domain="first_dep",
+            async_setup=gen_domain_setup("first_dep"),
+            dependencies=["root"],
+        ),
+    )
+    mock_integration(
+        hass,
+        MockModule(
+            domain="second_dep",
+            async_setup=gen_domain_setup("second_dep"),
+            partial_manifest={"after_dependencies": ["first_dep"]},
+        ),
+    )
+
+    await bootstrap._async_set_up_integrations(
+        hass, {"slow": {}, "root": {}, "first_dep": {}, "second_dep": {}}
+    )
+
+    assert order == ["root", "first_dep", "second_dep", "slow"]
+
+
+async def test_setup_after_deps_wait_timeout(hass, caplog):
+    """Test integrations stop waiting for an integration that takes too long."""
+    dependent_set_up = asyncio.Event()
+
+    async def slow_setup(hass, config):
+        await dependent_set_up.wait()
+        return True
+
+    async def dependent_setup(hass, config):
+        dependent_set_up.set()
+        return True
+
+    mock_integration(hass, MockModule(domain="slow", async_setup=slow_setup))
+    mock_integration(
+        hass,
+        MockModule(
+            domain="dependent",
+            async_setup=dependent_setup,
+            partial_manifest={"after_dependencies": ["slow"]},
+        ),
+    )
+
+    with patch("homeassistant.bootstrap.SETUP_WAIT_TIMEOUT", 0.01):
+        await bootstrap._async_set_up_integrations(hass, {"slow": {}, "dependent": {}})
+
+    assert "slow" in hass.config.components
+    assert "dependent" in hass.config.components
+    assert "Setup of slow is taking longer than 0.01 seconds" in caplog.text
+
+
+@pytest.mark.parametrize(
+    "default,core_config", [(1, {}), (64, {"max_concurrent_setups": 1})]
+)
+async def test_setup_max_concurrent(hass, default, core_config):
+    """Test the number of integrations set up at the same time is limited."""
+    running = 0
+    max_running = 0
+
+    async def async_setup(hass, config):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0)
+        running -= 1
+        return True
+
+    for domain in ("first", "second", "third"):
+        mock_integration(hass, MockModule(domain=domain, async_setup=async_setup))
+
+    with patch("homeassistant.bootstrap.MAX_CONCURRENT_SETUPS", default):
+        await bootstrap._async_set_up_integrations(
+            hass, {"homeassistant": core_config, "first": {}, "second": {}, "third": {}}
+        )
+
+    assert max_running == 1
+    assert {"first", "second", "third"} <= hass.config.components
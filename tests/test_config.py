@@ -194,6 +194,8 @@ def test_core_config_schema():
         {"customize": "bla"},
         {"customize": {"light.sensor": 100}},
         {"customize": {"entity_id": []}},
+        {"max_concurrent_setups": 0},
+        {"setup_wait_timeout": "soon"},
     ):
         with pytest.raises(MultipleInvalid):
             config_util.CORE_CONFIG_SCHEMA(value)
@@ -205,6 +207,8 @@ def test_core_config_schema():
             "longitude": "123.45",
             CONF_UNIT_SYSTEM: CONF_UNIT_SYSTEM_METRIC,
             "customize": {"sensor.temperature": {"hidden": True}},
+            "max_concurrent_setups": 8,
+            "setup_wait_timeout": 60,
         }
     )
 
@@ -2,6 +2,7 @@
 # pylint: disable=protected-access
 import asyncio
 import functools
+import json
 import logging
 import os
 import unittest
@@ -15,6 +16,7 @@ import pytest
 
 import homeassistant.core as ha
 from homeassistant.exceptions import InvalidEntityFormatError, InvalidStateError
+from homeassistant.helpers.json import JSONEncoder
 from homeassistant.util.async_ import run_coroutine_threadsafe
 import homeassistant.util.dt as dt_util
 from homeassistant.util.unit_system import METRIC_SYSTEM
@@ -1176,3 +1178,166 @@ def test_context():
     assert c.user_id == 23
     assert c.parent_id == 100
     assert c.id is not None
+
+
+async def test_listen_entity_state(hass):
+    """Test listening for state changes of specific entities."""
+    calls = []
+
+    @ha.callback
+    def listener(event):
+        """Record the event."""
+        calls.append(event)
+
+    unsub = hass.bus.async_listen_entity_state(
+        ["light.Kitchen", "light.bowl", "light.bowl"], listener
+    )
+    assert hass.bus.async_listeners()[EVENT_STATE_CHANGED] == 1
+
+    hass.states.async_set("light.kitchen", "on")
+    hass.states.async_set("light.living_room", "on")
+    hass.states.async_set("light.bowl", "on")
+    await hass.async_block_till_done()
+
+    assert [event.data["entity_id"] for event in calls] == [
+        "light.kitchen",
+        "light.bowl",
+    ]
+
+    unsub()
+    assert EVENT_STATE_CHANGED not in hass.bus.async_listeners()
+
+    hass.states.async_set("light.kitchen", "off")
+    await hass.async_block_till_done()
+    assert len(calls) == 2
+
+
+async def test_async_fire_runs_callbacks_inline(hass, caplog):
+    """Test callback listeners run inline and failures are isolated."""
+    calls = []
+
+    @ha.callback
+    def bad_listener(event):
+        """Raise an exception."""
+        raise ValueError("bad listener")
+
+    @ha.callback
+    def listener(event):
+        """Record the event."""
+        calls.append(event)
+
+    async def coro_listener(event):
+        """Record the event from a coroutine."""
+        calls.append(event)
+
+    hass.bus.async_listen("test_event", bad_listener)
+    hass.bus.async_listen("test_event", listener)
+    hass.bus.async_listen("test_event", coro_listener)
+    inline_count = hass.bus.inline_dispatch_count
+    scheduled_count = hass.bus.scheduled_dispatch_count
+
+    hass.bus.async_fire("test_event")
+    assert len(calls) == 1
+    assert "bad listener" in caplog.text
+    assert hass.bus.inline_dispatch_count == inline_count + 2
+    assert hass.bus.scheduled_dispatch_count == scheduled_count + 1
+
+    await hass.async_block_till_done()
+    assert len(calls) == 2
+
+
+async def test_async_fire_schedules_callbacks(hass):
+    """Test callback listeners are scheduled when inline dispatch is off."""
+    calls = []
+
+    @ha.callback
+    def listener(event):
+        """Record the event."""
+        calls.append(event)
+
+    hass.bus.inline_callbacks = False
+    hass.bus.async_listen("test_event", listener)
+    scheduled_count = hass.bus.scheduled_dispatch_count
+
+    hass.bus.async_fire("test_event")
+    assert len(calls) == 0
+    assert hass.bus.scheduled_dispatch_count == scheduled_count + 1
+
+    await hass.async_block_till_done()
+    assert len(calls) == 1
+
+
+async def test_async_listen_with_event_filter(hass, caplog):
+    """Test the event filter decides which events reach the listener."""
+    calls = []
+
+    @ha.callback
+    def listener(event):
+        """Record the event."""
+        calls.append(event)
+
+    @ha.callback
+    def event_filter(event):
+        """Only pass events with even numbers."""
+        return event.data["number"] % 2 == 0
+
+    @ha.callback
+    def bad_filter(event):
+        """Raise an exception."""
+        raise ValueError("bad filter")
+
+    unsub = hass.bus.async_listen("test_event", listener, event_filter)
+    hass.bus.async_listen("test_event", listener, bad_filter)
+
+    for number in range(4):
+        hass.bus.async_fire("test_event", {"number": number})
+    await hass.async_block_till_done()
+
+    assert [event.data["number"] for event in calls] == [0, 2]
+    assert "bad filter" in caplog.text
+
+    unsub()
+    hass.bus.async_fire("test_event", {"number": 4})
+    await hass.async_block_till_done()
+    assert len(calls) == 2
+
+
+def test_state_as_dict_is_cached():
+    """Test the dict representation is built once and is read-only."""
+    state = ha.State("light.kitchen", "on", {"brightness": 100})
+
+    as_dict = state.as_dict()
+    assert state.as_dict() is as_dict
+    assert as_dict["attributes"] is state.attributes
+
+    with pytest.raises(TypeError):
+        as_dict["state"] = "off"
+    with pytest.raises(TypeError):
+        as_dict["context"]["user_id"] = "abcd"
+
+    assert state == ha.State.from_dict(as_dict)
+    assert json.loads(json.dumps(as_dict, cls=JSONEncoder)) == {
+        "entity_id": "light.kitchen",
+        "state": "on",
+        "attributes": {"brightness": 100},
+        "last_changed": state.last_changed.isoformat(),
+        "last_updated": state.last_updated.isoformat(),
+        "context": state.context.as_dict(),
+    }
+
+
+async def test_async_set_shares_unchanged_attributes(hass):
+    """Test consecutive states share attributes that did not change."""
+    hass.states.async_set("light.kitchen", "on", {"brightness": 100})
+    first = hass.states.get("light.kitchen")
+
+    hass.states.async_set("light.kitchen", "off", {"brightness": 100})
+    second = hass.states.get("light.kitchen")
+
+    assert second.attributes is first.attributes
+
+    hass.states.async_set("light.kitchen", "off", {"brightness": 50})
+    third = hass.states.get("light.kitchen")
+
+    assert third.attributes is not second.attributes
+    assert third.attributes == {"brightness": 50}
@@ -1,12 +1,24 @@
 """Test to verify that we can load components."""
+from datetime import timedelta
+import json
+import os
+import pathlib
+
 from asynctest.mock import ANY, patch
 import pytest
 
+from homeassistant.const import __version__
 import homeassistant.loader as loader
 from homeassistant.components import http, hue
 from homeassistant.components.hue import light as hue_light
+import homeassistant.util.dt as dt_util
 
-from tests.common import MockModule, async_mock_service, mock_integration
+from tests.common import (
+    MockModule,
+    async_fire_time_changed,
+    async_mock_service,
+    mock_integration,
+)
 
 
 async def test_component_dependencies(hass):
@@ -126,6 +138,20 @@ async def test_get_integration(hass):
     assert hue_light == integration.get_platform("light")
 
 
+async def test_import_times(hass):
+    """Test the time it took to import a module is recorded."""
+    integration = await loader.async_get_integration(hass, "hue")
+    integration.get_component()
+    integration.get_platform("light")
+
+    import_times = hass.data[loader.DATA_IMPORT_TIMES]
+    assert set(import_times) == {
+        "homeassistant.components.hue",
+        "homeassistant.components.hue.light",
+    }
+    assert all(duration >= 0 for duration in import_times.values())
+
+
 async def test_get_integration_legacy(hass):
     """Test resolving integration."""
     integration = await loader.async_get_integration(hass, "test_embedded")
@@ -236,3 +262,115 @@ async def test_get_config_flows(hass):
         flows = await loader.async_get_config_flows(hass)
         assert "test_2" in flows
         assert "test_1" not in flows
+
+
+def _http_manifest_path():
+    """Return the path of the manifest of the http integration."""
+    return os.path.join(os.path.dirname(http.__file__), "manifest.json")
+
+
+def _mock_manifest_index(hass_storage, manifests, ha_version=__version__):
+    """Store a manifest index."""
+    hass_storage[loader.MANIFEST_INDEX_STORAGE_KEY] = {
+        "version": loader.MANIFEST_INDEX_STORAGE_VERSION,
+        "key": loader.MANIFEST_INDEX_STORAGE_KEY,
+        "data": {"ha_version": ha_version, "manifests": manifests},
+    }
+
+
+async def test_manifest_index_saved(hass, hass_storage):
+    """Test resolved manifests are added to the stored index."""
+    await loader.async_get_integration(hass, "http")
+    await loader.async_get_custom_components(hass)
+
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=loader.MANIFEST_INDEX_SAVE_DELAY)
+    )
+    await hass.async_block_till_done()
+
+    data = hass_storage[loader.MANIFEST_INDEX_STORAGE_KEY]["data"]
+    assert data["ha_version"] == __version__
+
+    path = _http_manifest_path()
+    assert data["manifests"][path] == [
+        os.stat(path).st_mtime,
+        json.loads(pathlib.Path(path).read_text()),
+    ]
+    assert {entry[1]["domain"] for entry in data["manifests"].values()} == {
+        "http",
+        "test",
+        "test_package",
+    }
+
+
+async def test_manifest_index_loaded(hass, hass_storage):
+    """Test integrations are resolved from the stored index."""
+    path = _http_manifest_path()
+    _mock_manifest_index(
+        hass_storage,
+        {
+            path: [
+                os.stat(path).st_mtime,
+                {
+                    "domain": "http",
+                    "name": "Indexed HTTP",
+                    "dependencies": [],
+                    "requirements": [],
+                },
+            ]
+        },
+    )
+
+    await loader.async_get_custom_components(hass)
+
+    with patch("homeassistant.loader.Integration.resolve_from_root") as mock_resolve:
+        integration = await loader.async_get_integration(hass, "http")
+
+    assert not mock_resolve.called
+    assert integration.name == "Indexed HTTP"
+    assert integration.get_component() is http
+
+
+@pytest.mark.parametrize("mtime_offset,ha_version", [(1, __version__), (0, "0.1.0")])
+async def test_manifest_index_invalidated(hass, hass_storage, mtime_offset, ha_version):
+    """Test changed manifests and other versions are not used from the index."""
+    path = _http_manifest_path()
+    _mock_manifest_index(
+        hass_storage,
+        {
+            path: [
+                os.stat(path).st_mtime + mtime_offset,
+                {
+                    "domain": "http",
+                    "name": "Indexed HTTP",
+                    "dependencies": [],
+                    "requirements": [],
+                },
+            ]
+        },
+        ha_version,
+    )
+
+    integration = await loader.async_get_integration(hass, "http")
+    assert integration.name == "HTTP"
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {},
+        {"ha_version": __version__},
+        {"ha_version": __version__, "manifests": []},
+        {"ha_version": __version__, "manifests": {_http_manifest_path(): None}},
+    ],
+)
+async def test_manifest_index_malformed(hass, hass_storage, data):
+    """Test a malformed index is ignored."""
+    hass_storage[loader.MANIFEST_INDEX_STORAGE_KEY] = {
+        "version": loader.MANIFEST_INDEX_STORAGE_VERSION,
+        "key": loader.MANIFEST_INDEX_STORAGE_KEY,
+        "data": data,
+    }
+
+    integration = await loader.async_get_integration(hass, "http")
+    assert integration.name == "HTTP"
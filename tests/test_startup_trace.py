@@ -0,0 +1,133 @@
+"""Test the startup trace."""
+import asyncio
+import json
+import time
+
+from homeassistant import setup, startup_trace
+from homeassistant.startup_trace import StartupTrace
+
+from tests.common import (
+    MockModule,
+    MockPlatform,
+    mock_entity_platform,
+    mock_integration,
+)
+
+
+def test_trace_events(tmpdir):
+    """Test spans are written as Chrome trace events."""
+    trace = StartupTrace()
+
+    with trace.span("light", "setup", startup_trace.CATEGORY_SETUP):
+        with trace.span("light", "import", startup_trace.CATEGORY_IMPORT):
+            pass
+    with trace.span("switch", "setup", startup_trace.CATEGORY_SETUP, entries=2):
+        pass
+
+    path = str(tmpdir.join("trace.json"))
+    trace.write(path)
+
+    with open(path) as fil:
+        events = json.load(fil)["traceEvents"]
+
+    spans = [event for event in events if event["ph"] == "X"]
+    assert [(span["name"], span["cat"], span["tid"]) for span in spans] == [
+        ("import", "import", 1),
+        ("setup", "setup", 1),
+        ("setup", "setup", 2),
+    ]
+    assert spans[2]["args"] == {"entries": 2}
+    assert spans[0]["ts"] >= spans[1]["ts"]
+
+    names = {event["tid"]: event["args"]["name"] for event in events[3:]}
+    assert names == {1: "light", 2: "switch"}
+
+    summary = trace.summary()
+    assert summary["slowest_setup"].startswith(("light", "switch"))
+    assert summary["event_loop_blocks"] == 0
+    assert summary["trace_file"] == path
+
+
+async def test_blocked_event_loop(hass):
+    """Test blocking the event loop is flagged with the blocking stack."""
+    trace = StartupTrace(block_threshold=0.05)
+    trace.async_start_monitor(hass.loop)
+
+    await asyncio.sleep(0.05)
+    time.sleep(0.2)
+    await asyncio.sleep(0.05)
+
+    trace.async_stop_monitor()
+
+    blocked = [
+        span for span in trace.spans if span.category == startup_trace.CATEGORY_BLOCKED
+    ]
+    assert len(blocked) == 1
+    assert blocked[0].end - blocked[0].start >= 0.15
+    assert "test_blocked_event_loop" in blocked[0].args["stack"][-1]
+
+    summary = trace.summary()
+    assert summary["event_loop_blocks"] == 1
+    assert summary["event_loop_blocked_by"].startswith("unknown")
+
+
+def test_integration_from_stack():
+    """Test blocking stacks are attributed to the innermost integration."""
+    stack = [
+        type("Frame", (), {"filename": filename})
+        for filename in (
+            "/srv/homeassistant/setup.py",
+            "/srv/homeassistant/components/sensor/__init__.py",
+            "/config/custom_components/hue/light.py",
+            "/usr/lib/python3.7/socket.py",
+        )
+    ]
+    # pylint: disable=protected-access
+    assert startup_trace._integration_from_stack(stack) == "hue"
+    assert startup_trace._integration_from_stack(stack[:2]) == "sensor"
+    assert startup_trace._integration_from_stack(stack[:1]) is None
+
+
+async def test_setup_component_spans(hass):
+    """Test the phases of setting up an integration are traced."""
+    trace = hass.data[startup_trace.DATA_STARTUP_TRACE] = StartupTrace()
+    mock_integration(hass, MockModule("dep"))
+    mock_integration(hass, MockModule("comp", dependencies=["dep"]))
+
+    assert await setup.async_setup_component(hass, "comp", {})
+
+    spans = {(span.track, span.name) for span in trace.spans}
+    assert {
+        ("comp", "dependencies"),
+        ("comp", "config"),
+        ("comp", "setup"),
+        ("dep", "config"),
+        ("dep", "setup"),
+    } <= spans
+
+
+async def test_platform_spans(hass):
+    """Test platforms of an integration are traced on their own tracks."""
+    trace = hass.data[startup_trace.DATA_STARTUP_TRACE] = StartupTrace()
+
+    async def async_setup_platform(hass, config, async_add_entities, info=None):
+        """Set up a platform slowly."""
+        await asyncio.sleep(0.01)
+
+    for domain in ("light", "sensor"):
+        mock_entity_platform(
+            hass,
+            f"{domain}.slow",
+            MockPlatform(async_setup_platform=async_setup_platform),
+        )
+
+    await asyncio.gather(
+        setup.async_setup_component(hass, "light", {"light": {"platform": "slow"}}),
+        setup.async_setup_component(hass, "sensor", {"sensor": {"platform": "slow"}}),
+    )
+
+    platforms = [
+        span for span in trace.spans if span.category == startup_trace.CATEGORY_PLATFORM
+    ]
+    assert sorted(span.track for span in platforms) == ["light.slow", "sensor.slow"]
+    assert platforms[0].end > platforms[1].start
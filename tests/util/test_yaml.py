@@ -6,9 +6,12 @@ import logging
 from unittest.mock import patch
 
 import pytest
+import yaml as pyyaml
 
+from homeassistant.const import __version__
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.util.yaml import loader as yaml_loader
+from homeassistant.util.yaml.const import CACHE_VERSION
 import homeassistant.util.yaml as yaml
 from homeassistant.config import YAML_CONFIG_FILE, load_yaml_config_file
 from tests.common import get_test_config_dir, patch_yaml_files
@@ -460,3 +463,135 @@ def test_duplicate_key(caplog):
     with patch_yaml_files(files):
         load_yaml_config_file(YAML_CONFIG_FILE)
     assert "contains duplicate key" in caplog.text
+
+
+@pytest.fixture
+def config_tree(tmpdir):
+    """Create a configuration that includes a directory and uses a secret."""
+    tmpdir.join(YAML_CONFIG_FILE).write(
+        "homeassistant:\n"
+        "  name: !secret name\n"
+        "sensor: !include_dir_merge_named sensors\n"
+    )
+    tmpdir.join(yaml.SECRET_YAML).write("name: Home\n")
+    sensors = tmpdir.mkdir("sensors")
+    sensors.join("one.yaml").write("one:\n  platform: template\n  name: !secret name\n")
+    sensors.join("two.yaml").write("two:\n  platform: template\n")
+    yaml.clear_secret_cache()
+    yield tmpdir
+    yaml.clear_secret_cache()
+
+
+def _touch(path):
+    """Move the modification time of a file or directory forward."""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_load_yaml_cached(config_tree):
+    """Test loading an unchanged configuration skips parsing it."""
+    config_path = str(config_tree.join(YAML_CONFIG_FILE))
+    cache_path = str(config_tree.join(".config_cache"))
+
+    conf = yaml.load_yaml_cached(config_path, cache_path)
+    assert os.path.isfile(cache_path)
+
+    with patch.object(yaml_loader, "load_yaml") as mock_load:
+        cached = yaml.load_yaml_cached(config_path, cache_path)
+
+    assert not mock_load.called
+    assert cached == conf
+    assert cached["homeassistant"]["name"] == "Home"
+    assert list(cached["sensor"]) == ["one", "two"]
+    assert cached["sensor"]["two"].__config_file__ == str(
+        config_tree.join("sensors", "two.yaml")
+    )
+    assert cached["sensor"]["two"].__line__ == 1
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda tree: tree.join("sensors", "two.yaml").write(
+            "three:\n  platform: template\n"
+        ),
+        lambda tree: tree.join("sensors", "three.yaml").write(
+            "three:\n  platform: template\n"
+        ),
+        lambda tree: tree.join("sensors", "two.yaml").remove(),
+        lambda tree: tree.join(yaml.SECRET_YAML).write("name: Away\n"),
+    ],
+)
+def test_load_yaml_cached_invalidated(config_tree, change):
+    """Test a change to a file the configuration reads invalidates the cache."""
+    config_path = str(config_tree.join(YAML_CONFIG_FILE))
+    cache_path = str(config_tree.join(".config_cache"))
+    conf = yaml.load_yaml_cached(config_path, cache_path)
+
+    change(config_tree)
+    _touch(str(config_tree.join("sensors")))
+    yaml.clear_secret_cache()
+
+    assert yaml.load_yaml_cached(config_path, cache_path) != conf
+    assert yaml.load_yaml_cached(config_path, cache_path) == yaml.load_yaml(config_path)
+
+
+@pytest.mark.parametrize(
+    "cache_key",
+    [(CACHE_VERSION, "0.1.0", pyyaml.__version__), (CACHE_VERSION, __version__, "3.0")],
+)
+def test_load_yaml_cached_other_version(config_tree, cache_key):
+    """Test a cache written by another Home Assistant or PyYAML is not used."""
+    config_path = str(config_tree.join(YAML_CONFIG_FILE))
+    cache_path = str(config_tree.join(".config_cache"))
+
+    with patch.object(yaml_loader, "_CACHE_KEY", cache_key):
+        yaml.load_yaml_cached(config_path, cache_path)
+
+    with patch.object(
+        yaml_loader, "load_yaml", wraps=yaml_loader.load_yaml
+    ) as mock_load:
+        yaml.load_yaml_cached(config_path, cache_path)
+
+    assert mock_load.called
+
+
+def test_load_yaml_cached_environment_variable(config_tree):
+    """Test a changed environment variable invalidates the cache."""
+    config_tree.join(YAML_CONFIG_FILE).write("password: !env_var PASSWORD secret\n")
+    config_path = str(config_tree.join(YAML_CONFIG_FILE))
+    cache_path = str(config_tree.join(".config_cache"))
+
+    assert yaml.load_yaml_cached(config_path, cache_path)["password"] == "secret"
+
+    with patch.dict(os.environ, {"PASSWORD": "other"}):
+        assert yaml.load_yaml_cached(config_path, cache_path)["password"] == "other"
+
+
+def test_load_yaml_cached_not_cacheable(config_tree, caplog):
+    """Test loads that logged an error or used keyring are not cached."""
+    config_tree.join(YAML_CONFIG_FILE).write("key: thing1\nkey: thing2\n")
+    config_path = str(config_tree.join(YAML_CONFIG_FILE))
+    cache_path = str(config_tree.join(".config_cache"))
+
+    yaml.load_yaml_cached(config_path, cache_path)
+    assert "contains duplicate key" in caplog.text
+    assert not os.path.exists(cache_path)
+
+    config_tree.join(YAML_CONFIG_FILE).write("password: !secret keyring_pw\n")
+    with patch.object(yaml_loader, "keyring", FakeKeyring({"keyring_pw": "pw"})):
+        assert yaml.load_yaml_cached(config_path, cache_path)["password"] == "pw"
+    assert not os.path.exists(cache_path)
+
+
+def test_load_yaml_cached_corrupt(config_tree, caplog):
+    """Test a corrupt cache is ignored."""
+    config_path = str(config_tree.join(YAML_CONFIG_FILE))
+    cache_path = str(config_tree.join(".config_cache"))
+    config_tree.join(".config_cache").write("corrupt")
+
+    conf = yaml.load_yaml_cached(config_path, cache_path)
+
+    assert conf["homeassistant"]["name"] == "Home"
+    assert "Unable to read YAML cache" in caplog.text
+    assert yaml.load_yaml_cached(config_path, cache_path) == conf